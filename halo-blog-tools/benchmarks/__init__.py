@@ -0,0 +1,6 @@
+"""
+离线基准测试
+
+基于进程内的 Halo API 替身（``benchmarks.halo_stub``）端到端运行各个工具，
+不依赖真实的 Halo 站点。运行方式见各脚本的模块说明。
+"""
@@ -0,0 +1,108 @@
+"""
+插件冷启动基准
+
+在全新的子进程中执行与 ``python -m main`` 相同的启动路径（导入 main、
+PluginRegistration 读取 manifest 并解析 provider 与全部工具源文件），
+借助 ``-X importtime`` 统计总耗时以及本插件各模块的导入开销。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.cold_start -n 10
+    python -m benchmarks.cold_start --top 15   # 同时列出导入最慢的模块
+"""
+
+from typing import Any, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# 不经由 benchmarks.harness 获取路径，避免父进程提前导入 dify_plugin
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import main
+from dify_plugin import DifyPluginEnv
+from dify_plugin.core.plugin_registration import PluginRegistration
+registration = PluginRegistration(DifyPluginEnv())
+print('__startup_ms__', (time.perf_counter() - started) * 1000)
+"""
+
+# 属于本插件的顶层模块
+_OWN_PACKAGES = ('main', 'tools', 'utils', 'provider')
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """解析 ``-X importtime`` 输出：模块名 -> (self 微秒, cumulative 微秒)"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|', 2))
+        if self_us.isdigit():
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once() -> dict[str, Any]:
+    env = dict(os.environ, INSTALL_METHOD=os.environ.get('INSTALL_METHOD', 'local'))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _STARTUP_SCRIPT],
+        cwd=PLUGIN_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    startup_ms = next(float(line.split()[1]) for line in completed.stdout.splitlines()
+                      if line.startswith('__startup_ms__'))
+    return {'startup_ms': startup_ms, 'modules': parse_importtime(completed.stderr)}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help='列出累计导入耗时最高的 N 个模块')
+    parser.add_argument('--output', default='', help='将结果保存为 JSON')
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    startup = [run['startup_ms'] for run in runs]
+
+    own: dict[str, list[int]] = {}
+    for run in runs:
+        for name, (_, cumulative) in run['modules'].items():
+            if name.split('.')[0] in _OWN_PACKAGES:
+                own.setdefault(name, []).append(cumulative)
+
+    report = {
+        'runs': args.runs,
+        'startup_ms': {
+            'median': round(statistics.median(startup), 1),
+            'min': round(min(startup), 1),
+            'max': round(max(startup), 1),
+        },
+        'plugin_imports_ms': {name: round(statistics.median(values) / 1000, 2)
+                              for name, values in sorted(own.items())},
+    }
+
+    print(f"冷启动 {args.runs} 次：中位数 {report['startup_ms']['median']}ms "
+          f"（最小 {report['startup_ms']['min']}ms，最大 {report['startup_ms']['max']}ms）")
+    print("本插件模块导入耗时（累计，中位数）：")
+    for name, value in report['plugin_imports_ms'].items():
+        print(f"  {name:<32}{value:>8.2f} ms")
+
+    if args.top:
+        last = runs[-1]['modules']
+        print(f"\n累计导入耗时最高的 {args.top} 个模块（最后一次运行）：")
+        for name, (_, cumulative) in sorted(last.items(), key=lambda x: x[1][1], reverse=True)[:args.top]:
+            print(f"  {name:<48}{cumulative / 1000:>8.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+批量操作的自适应并发基准
+
+用替身模拟两类站点，批量创建 ``-n`` 条动态（与 halo-moment-batch-create 相同的请求）：
+
+- small：只有 ``--small-workers`` 个工作线程，超出的请求排队，排队超过 ``--small-queue``
+  个时返回 503
+- large：``--large-workers`` 个工作线程，足够承接最大并发
+
+每个请求在替身中耗时 ``--latency`` 秒。对比三种方式：
+
+- fixed-4：原先的默认值，固定 4 个并发
+- fixed-16：固定为允许的最大并发
+- adaptive：``utils.concurrency`` 的 AIMD 窗口，上限 16
+
+输出耗时、失败数（503）、平均延迟，以及 adaptive 的最高窗口、结束窗口和降窗次数。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency -n 400 --latency 0.02
+"""
+
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.harness import PLUGIN_ROOT  # noqa: F401  保证 utils 可导入
+from benchmarks.halo_stub import OWNER, HaloStub
+
+from utils import json_codec
+from utils.concurrency import AdaptiveConcurrency, map_adaptive
+from utils.halo_client import create_session
+from utils.moments import MOMENTS_PATH, build_moment, new_moment_name
+
+MAX_CONCURRENCY = 16
+
+
+def run(stub: HaloStub, mode: str, count: int) -> dict[str, Any]:
+    session = create_session(stub.credentials()['access_token'])
+    stub.stats.reset()
+    latencies: list[float] = []
+
+    def create(index: int) -> bool:
+        payload = build_moment(f"第 {index} 条动态", OWNER, [], 'PUBLIC', [])
+        payload['metadata']['name'] = new_moment_name()
+        start = time.perf_counter()
+        response = session.post(f"{stub.base_url}{MOMENTS_PATH}", data=json_codec.dumps(payload), timeout=30)
+        latencies.append(time.perf_counter() - start)
+        return response.status_code in (200, 201)
+
+    items = list(range(count))
+    controller = None
+    started = time.perf_counter()
+    if mode == 'adaptive':
+        controller = AdaptiveConcurrency('benchmark', MAX_CONCURRENCY)
+        outcomes = [ok for _, ok in map_adaptive(create, items, controller)]
+    else:
+        workers = int(mode.split('-')[1])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(create, items))
+    wall = time.perf_counter() - started
+    session.close()
+
+    return {
+        'wall': wall,
+        'failed': outcomes.count(False),
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'controller': controller.to_dict() if controller else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--count', type=int, default=200, help='每轮创建的动态数')
+    parser.add_argument('--latency', type=float, default=0.05, help='替身处理每个请求的秒数')
+    parser.add_argument('--small-workers', type=int, default=4)
+    parser.add_argument('--small-queue', type=int, default=4)
+    parser.add_argument('--large-workers', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    sites = {
+        'small': (args.small_workers, args.small_queue),
+        'large': (args.large_workers, None),
+    }
+    print(f"每轮创建 {args.count} 条动态，替身处理每个请求 {args.latency * 1000:.0f}ms")
+    print(f"{'站点':<8}{'模式':<12}{'耗时(s)':>10}{'失败':>8}{'平均延迟(ms)':>14}{'最高窗口':>10}{'结束窗口':>10}{'降窗':>6}")
+    for site, (workers, max_queue) in sites.items():
+        stub = HaloStub(latency=args.latency).start()
+        try:
+            stub.workers = workers
+            stub.max_queue = max_queue
+            for mode in ('fixed-4', f'fixed-{MAX_CONCURRENCY}', 'adaptive'):
+                result = run(stub, mode, args.count)
+                controller = result['controller']
+                window = (f"{controller['peak']:>10}{controller['window']:>10}{controller['cuts']:>6}"
+                          if controller else f"{'-':>10}{'-':>10}{'-':>6}")
+                print(f"{site:<8}{mode:<12}{result['wall']:>10.2f}{result['failed']:>8}"
+                      f"{result['mean_ms']:>14.0f}{window}")
+        finally:
+            stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+并行分支扇出基准
+
+模拟 Dify 工作流并行分支在同一时刻调用同一个工具、传入相同参数：N 个线程用同一组
+参数同时调用工具，替身为每个请求注入延迟。分别在开启和关闭读请求合并时运行，报告
+发出的请求数和整体耗时。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.fanout -b 16
+    python -m benchmarks.fanout --tools halo-post-get,halo-tags-list --latency-ms 50
+"""
+
+from typing import Any, Optional
+import argparse
+import sys
+import threading
+import time
+
+from benchmarks.harness import SCENARIOS, invoke, load_all_tools, seeded_stub
+from utils.halo_client import HaloSession
+
+DEFAULT_TOOLS = 'halo-post-get,halo-tags-list,halo-categories-list,halo-post-list'
+
+
+def fan_out(stub, name: str, branches: int) -> dict[str, Any]:
+    """branches 个线程同时以相同参数调用工具"""
+    credentials = stub.credentials()
+    parameters = SCENARIOS[name](stub)
+    barrier = threading.Barrier(branches)
+    failures = []
+
+    def branch() -> None:
+        barrier.wait()
+        if not invoke(name, credentials, parameters).ok:
+            failures.append(name)
+
+    stub.stats.reset()
+    threads = [threading.Thread(target=branch) for _ in range(branches)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+        'requests': stub.stats.snapshot()['requests'],
+        'failures': len(failures),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-b', '--branches', type=int, default=16, help='同时调用的分支数')
+    parser.add_argument('--tools', default=DEFAULT_TOOLS, help='逗号分隔的工具名')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='替身为每个请求注入的延迟')
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.tools.split(',') if name.strip()]
+    load_all_tools(names)
+    stub = seeded_stub(latency=args.latency_ms / 1000)
+    try:
+        # 先调用一次，让用户、索引等缓存就绪，只比较工具本身的请求
+        for name in names:
+            invoke(name, stub.credentials(), SCENARIOS[name](stub))
+
+        print(f"{'工具':<24}{'合并':>6}{'请求数':>8}{'耗时(ms)':>10}{'失败':>6}")
+        for name in names:
+            for coalesce in (False, True):
+                HaloSession.coalesce_reads = coalesce
+                result = fan_out(stub, name, args.branches)
+                print(f"{name:<24}{'是' if coalesce else '否':>6}{result['requests']:>8}"
+                      f"{result['elapsed_ms']:>10.1f}{result['failures']:>6}")
+    finally:
+        HaloSession.coalesce_reads = True
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,683 @@
+"""
+本地 Halo API 替身
+
+在进程内启动一个 HTTP 服务器，模拟工具会调用的 content.halo.run、
+api.console.halo.run、uc.api.content.halo.run 与 moment.halo.run 接口，
+数据保存在内存中，并统计请求数、收发字节数和连接数。
+"""
+
+from typing import Any, Callable, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+OWNER = "admin"
+
+_ROUTE = re.compile(
+    r'^/apis/(?P<group>[^/]+)/v1alpha1/(?P<resource>[^/]+)'
+    r'(?:/(?P<name>[^/]+))?(?:/(?P<sub>[^/]+))?$'
+)
+
+# 由 Extension API 管理的资源
+_EXTENSIONS = {
+    ('content.halo.run', 'posts'): 'Post',
+    ('content.halo.run', 'tags'): 'Tag',
+    ('content.halo.run', 'categories'): 'Category',
+    ('content.halo.run', 'snapshots'): 'Snapshot',
+    ('moment.halo.run', 'moments'): 'Moment',
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _creation_key(obj: dict[str, Any]) -> tuple[str, str]:
+    """列表默认排序：创建时间、名称倒序（时间相同时按名称保证顺序稳定）"""
+    return obj['metadata']['creationTimestamp'], obj['metadata']['name']
+
+
+class StubStats:
+    """请求统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            # 因超出处理能力返回 429 的请求数
+            self.throttled = 0
+            # 因排队已满返回 503 的请求数
+            self.overloaded = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.connections = 0
+            self.open_connections = 0
+            self.peak_connections = 0
+            self.by_route: dict[str, int] = {}
+
+    def record(self, route: str, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.by_route[route] = self.by_route.get(route, 0) + 1
+
+    def record_throttled(self) -> None:
+        with self._lock:
+            self.throttled += 1
+
+    def record_overloaded(self) -> None:
+        with self._lock:
+            self.overloaded += 1
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+            self.open_connections += 1
+            self.peak_connections = max(self.peak_connections, self.open_connections)
+
+    def connection_closed(self) -> None:
+        with self._lock:
+            self.open_connections -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'overloaded': self.overloaded,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'connections': self.connections,
+                'peak_connections': self.peak_connections,
+                'by_route': dict(self.by_route),
+            }
+
+
+class _Server(ThreadingHTTPServer):
+    # 默认的监听队列只有 5，并发连接较多时新连接会卡在握手上
+    request_queue_size = 128
+
+
+class HaloStub:
+    """
+    内存版 Halo 站点
+
+    用法::
+
+        with HaloStub() as stub:
+            stub.seed(posts=50, tags=20, categories=8, moments=30)
+            credentials = stub.credentials()
+    """
+
+    def __init__(self, latency: float = 0.0):
+        # 每个请求在响应前额外等待的秒数，用于模拟慢速站点
+        self.latency = latency
+        # 关闭后模拟未提供 Console 列表接口的旧版动态插件
+        self.moment_console_api = True
+        # 每秒能处理的请求数，超出时返回 429 和 Retry-After；None 为不限
+        self.capacity: Optional[float] = None
+        self.retry_after = 1
+        # 同时处理的请求数，超出的请求排队，用于模拟工作线程有限的站点；None 为不限
+        self.workers: Optional[int] = None
+        # 排队请求数的上限，超出时直接返回 503；None 为不限
+        self.max_queue: Optional[int] = None
+        self._busy = 0
+        self._queued = 0
+        self._slots = threading.Condition()
+        self._bucket = float('inf')
+        self._bucket_at = time.monotonic()
+        self.stats = StubStats()
+        self._lock = threading.RLock()
+        self._store: dict[str, dict[str, dict]] = {kind: {} for kind in _EXTENSIONS.values()}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 生命周期 ----
+
+    def start(self) -> 'HaloStub':
+        stub = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.stub = stub
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'HaloStub':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def credentials(self) -> dict[str, str]:
+        return {'base_url': self.base_url, 'access_token': 'pat_benchmark_token_0000'}
+
+    def admit(self) -> bool:
+        """按 capacity 判断当前请求能否处理（令牌桶，容量为一秒的请求数）"""
+        if not self.capacity:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._bucket = min(self.capacity, self._bucket + (now - self._bucket_at) * self.capacity)
+            self._bucket_at = now
+            if self._bucket < 1:
+                return False
+            self._bucket -= 1
+            return True
+
+    def occupy(self) -> bool:
+        """按 workers 占用一个处理槽位，必要时排队；队列已满返回 False"""
+        if not self.workers:
+            return True
+        with self._slots:
+            if self._busy >= self.workers:
+                if self.max_queue is not None and self._queued >= self.max_queue:
+                    return False
+                self._queued += 1
+                while self._busy >= self.workers:
+                    self._slots.wait()
+                self._queued -= 1
+            self._busy += 1
+            return True
+
+    def release(self) -> None:
+        if not self.workers:
+            return
+        with self._slots:
+            self._busy -= 1
+            self._slots.notify()
+
+    # ---- 数据 ----
+
+    @staticmethod
+    def _metadata(name: str) -> dict[str, Any]:
+        return {
+            'name': name,
+            'version': 1,
+            'creationTimestamp': _now(),
+            'annotations': {},
+            'labels': {},
+        }
+
+    def add(self, kind: str, obj: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            metadata = obj.setdefault('metadata', {})
+            name = metadata.get('name') or f"{metadata.get('generateName', kind.lower() + '-')}{uuid.uuid4().hex[:8]}"
+            if name in self._store[kind]:
+                raise KeyError(name)
+            base = self._metadata(name)
+            base['annotations'].update(metadata.get('annotations') or {})
+            base['labels'].update(metadata.get('labels') or {})
+            obj['metadata'] = base
+            obj.setdefault('apiVersion', f"{'moment' if kind == 'Moment' else 'content'}.halo.run/v1alpha1")
+            obj['kind'] = kind
+            obj.setdefault('spec', {})
+            obj.setdefault('status', {})
+            self._store[kind][name] = obj
+            return obj
+
+    def get(self, kind: str, name: str) -> Optional[dict[str, Any]]:
+        return self._store[kind].get(name)
+
+    def items(self, kind: str) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._store[kind].values())
+
+    def seed(self, posts: int = 20, tags: int = 10, categories: int = 6, moments: int = 20,
+             content_size: int = 2000) -> None:
+        """生成一批形态接近真实站点的数据"""
+        body = ("Halo 是一款强大易用的开源建站工具。" * (content_size // 18 + 1))[:content_size]
+
+        tag_names = []
+        for i in range(tags):
+            tag = self.add('Tag', {
+                'metadata': {'name': f"tag-{i:04d}"},
+                'spec': {'displayName': f"标签{i}", 'slug': f"tag-{i}", 'color': '#6366f1', 'cover': ''},
+            })
+            tag_names.append(tag['metadata']['name'])
+
+        category_names = []
+        for i in range(categories):
+            # 每三个分类一组：第一个为根分类，其余两个挂在它下面
+            category = self.add('Category', {
+                'metadata': {'name': f"category-{i:04d}"},
+                'spec': {'displayName': f"分类{i}", 'slug': f"category-{i}", 'description': '',
+                         'cover': '', 'template': '', 'priority': i, 'children': []},
+            })
+            category_names.append(category['metadata']['name'])
+            if i % 3:
+                parent = self.get('Category', category_names[i - i % 3])
+                parent['spec']['children'].append(category['metadata']['name'])
+
+        for i in range(posts):
+            name = f"post-{i:05d}"
+            content_json = json.dumps({'rawType': 'markdown', 'raw': body, 'content': body})
+            self.add('Post', {
+                'metadata': {'name': name, 'labels': {
+                    'content.halo.run/published': str(i % 4 != 0).lower(),
+                }, 'annotations': {
+                    'content.halo.run/content-json': content_json,
+                    'content.halo.run/preferred-editor': 'default',
+                    'content.halo.run/content-type': 'markdown',
+                }},
+                'spec': {
+                    'title': f"示例文章 {i}", 'slug': f"post-{i}", 'template': '', 'cover': '',
+                    'deleted': False, 'publish': i % 4 != 0, 'pinned': False, 'allowComment': True,
+                    'visible': 'PUBLIC', 'priority': 0,
+                    'excerpt': {'autoGenerate': True, 'raw': ''},
+                    'categories': [category_names[i % len(category_names)]] if category_names else [],
+                    'tags': [tag_names[j % len(tag_names)] for j in range(i, i + 3)] if tag_names else [],
+                    'owner': OWNER, 'htmlMetas': [],
+                    'baseSnapshot': f"snapshot-{name}", 'headSnapshot': f"snapshot-{name}",
+                    'releaseSnapshot': f"snapshot-{name}",
+                },
+            })
+            self.add('Snapshot', {
+                'metadata': {'name': f"snapshot-{name}"},
+                'spec': {'subjectRef': {'kind': 'Post', 'name': name}, 'rawType': 'markdown',
+                         'rawPatch': body, 'contentPatch': body, 'owner': OWNER},
+            })
+
+        for i in range(moments):
+            self.add('Moment', {
+                'metadata': {'name': f"moment-seed-{i:05d}"},
+                'spec': {
+                    'content': {'raw': f"动态 {i}", 'html': f"<p>动态 {i}</p>",
+                                'medium': [{'type': 'PHOTO', 'url': f"https://cdn.example.com/{i}.png",
+                                            'originType': 'image/png'}] if i % 2 else []},
+                    'owner': OWNER, 'tags': [f"标签{i % max(tags, 1)}"], 'visible': 'PUBLIC',
+                    'approved': True, 'allowComment': True,
+                    # 每小时一条，便于按时间窗口筛选
+                    'releaseTime': (datetime.now(timezone.utc) - timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                },
+            })
+
+        self._refresh_counts()
+
+    def _refresh_counts(self) -> None:
+        """根据文章重算标签和分类的 postCount"""
+        with self._lock:
+            tag_counts: dict[str, int] = {}
+            category_counts: dict[str, int] = {}
+            for post in self._store['Post'].values():
+                for tag in post['spec'].get('tags') or []:
+                    tag_counts[tag] = tag_counts.get(tag, 0) + 1
+                for category in post['spec'].get('categories') or []:
+                    category_counts[category] = category_counts.get(category, 0) + 1
+            for name, tag in self._store['Tag'].items():
+                tag['status'] = {'postCount': tag_counts.get(name, 0), 'visiblePostCount': tag_counts.get(name, 0),
+                                 'permalink': f"/tags/{tag['spec'].get('slug', name)}"}
+            for name, category in self._store['Category'].items():
+                category['status'] = {'postCount': category_counts.get(name, 0),
+                                      'visiblePostCount': category_counts.get(name, 0),
+                                      'permalink': f"/categories/{category['spec'].get('slug', name)}"}
+
+    def listed_post(self, post: dict[str, Any]) -> dict[str, Any]:
+        """Console / UC 文章列表中的 ListedPost 结构"""
+        spec = post['spec']
+        return {
+            'post': post,
+            'categories': [c for c in (self.get('Category', n) for n in spec.get('categories') or []) if c],
+            'tags': [t for t in (self.get('Tag', n) for n in spec.get('tags') or []) if t],
+            'contributors': [],
+            'owner': {'name': spec.get('owner', OWNER), 'displayName': 'Administrator'},
+            'stats': {'visit': 0, 'upvote': 0, 'comment': 0},
+        }
+
+    def listed_moment(self, moment: dict[str, Any]) -> dict[str, Any]:
+        """动态插件 Console API 中的 ListedMoment 结构"""
+        return {
+            'moment': moment,
+            'owner': {'name': moment['spec'].get('owner', OWNER), 'displayName': 'Administrator'},
+            'stats': {'upvote': 0, 'totalComment': 0, 'approvedComment': 0},
+        }
+
+    def filter_posts(self, posts: list[dict[str, Any]], query: dict[str, list[str]]) -> list[dict[str, Any]]:
+        """按 Console / UC 文章列表的查询参数筛选"""
+        keyword = query.get('keyword', [''])[0]
+        phase = query.get('publishPhase', [''])[0]
+        category = query.get('categoryWithChildren', [''])[0]
+        if keyword:
+            posts = [p for p in posts if keyword in p['spec'].get('title', '')]
+        if phase:
+            published = phase == 'PUBLISHED'
+            posts = [p for p in posts
+                     if (p['metadata']['labels'].get('content.halo.run/published') == 'true') == published]
+        if category:
+            names, pending = set(), [category]
+            while pending:
+                current = pending.pop()
+                names.add(current)
+                node = self.get('Category', current)
+                if node:
+                    pending.extend(c for c in node['spec'].get('children') or [] if c not in names)
+            posts = [p for p in posts if names & set(p['spec'].get('categories') or [])]
+        if 'labelSelector' in query:
+            posts = [p for p in posts if match_labels(p, query['labelSelector'])]
+        if 'fieldSelector' in query:
+            posts = [p for p in posts if match_fields(p, query['fieldSelector'])]
+        return posts
+
+    def post_content(self, name: str) -> Optional[dict[str, Any]]:
+        post = self.get('Post', name)
+        if not post:
+            return None
+        snapshot = self.get('Snapshot', post['spec'].get('headSnapshot') or '')
+        if snapshot:
+            spec = snapshot['spec']
+            return {'raw': spec.get('rawPatch', ''), 'content': spec.get('contentPatch', ''),
+                    'rawType': spec.get('rawType', 'markdown')}
+        return {'raw': '', 'content': '', 'rawType': 'markdown'}
+
+
+def match_labels(obj: dict[str, Any], selectors: list[str]) -> bool:
+    """支持 ``key=value``、``key!=value``、``key``、``!key`` 形式的 labelSelector"""
+    labels = obj['metadata'].get('labels') or {}
+    for selector in (part.strip() for value in selectors for part in value.split(',')):
+        if not selector:
+            continue
+        if '!=' in selector:
+            key, value = selector.split('!=', 1)
+            if labels.get(key) == value:
+                return False
+        elif '=' in selector:
+            key, value = selector.split('=', 1)
+            if labels.get(key) != value:
+                return False
+        elif selector.startswith('!'):
+            if selector[1:] in labels:
+                return False
+        elif selector not in labels:
+            return False
+    return True
+
+
+def _field_values(obj: dict[str, Any], path: str) -> list[str]:
+    value: Any = obj
+    for part in path.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None:
+        return []
+    return [str(v) for v in value] if isinstance(value, list) else [str(value).lower() if isinstance(value, bool) else str(value)]
+
+
+def match_fields(obj: dict[str, Any], selectors: list[str]) -> bool:
+    """支持 ``path=value``、``path!=value`` 形式的 fieldSelector，列表字段按包含判断"""
+    for selector in (part.strip() for value in selectors for part in value.split(',')):
+        if not selector:
+            continue
+        if '!=' in selector:
+            path, value = selector.split('!=', 1)
+            if value in _field_values(obj, path):
+                return False
+        elif '=' in selector:
+            path, value = selector.split('=', 1)
+            if value not in _field_values(obj, path):
+                return False
+    return True
+
+
+def list_result(items: list[dict[str, Any]], query: dict[str, list[str]]) -> dict[str, Any]:
+    """按 Halo ListResult 的格式分页"""
+    total = len(items)
+    size = int(query.get('size', ['0'])[0] or 0)
+    page = int(query.get('page', ['0'])[0] or 0)
+    if size <= 0:
+        page_items = items
+        page, size, total_pages = 0, 0, 1 if total else 0
+    else:
+        # Halo 的页码从 1 开始，page=0 等同于第一页
+        start = (max(page, 1) - 1) * size
+        page_items = items[start:start + size]
+        total_pages = (total + size - 1) // size
+    index = max(page, 1)
+    return {
+        'page': page, 'size': size, 'total': total, 'items': page_items,
+        'first': index <= 1, 'last': index >= total_pages,
+        'hasNext': index < total_pages, 'hasPrevious': index > 1,
+        'totalPages': total_pages,
+    }
+
+
+def filter_moments(moments: list[dict[str, Any]], query: dict[str, list[str]]) -> list[dict[str, Any]]:
+    """按动态插件 Console API 的查询参数筛选，并按发布时间倒序"""
+    def first(key: str) -> str:
+        return query.get(key, [''])[0]
+
+    def match(moment: dict[str, Any]) -> bool:
+        spec = moment['spec']
+        if first('keyword') and first('keyword') not in spec['content'].get('raw', ''):
+            return False
+        if first('tag') and first('tag') not in (spec.get('tags') or []):
+            return False
+        if first('visible') and spec.get('visible') != first('visible'):
+            return False
+        if first('approved') and str(spec.get('approved', False)).lower() != first('approved'):
+            return False
+        released = spec.get('releaseTime') or moment['metadata']['creationTimestamp']
+        # 时间戳均为 UTC 的 ISO 8601 字符串，统一截到秒后可直接比较
+        if first('startDate') and released[:19] < first('startDate')[:19]:
+            return False
+        if first('endDate') and released[:19] > first('endDate')[:19]:
+            return False
+        return True
+
+    return sorted((m for m in moments if match(m)),
+                  key=lambda m: m['spec'].get('releaseTime') or m['metadata']['creationTimestamp'], reverse=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 头部和正文分两次写出，关闭 Nagle 避免与客户端延迟 ACK 叠加出 40ms 停顿
+    disable_nagle_algorithm = True
+    stub: HaloStub
+
+    def setup(self) -> None:
+        super().setup()
+        self.stub.stats.connection_opened()
+
+    def finish(self) -> None:
+        try:
+            super().finish()
+        finally:
+            self.stub.stats.connection_closed()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        body = None
+        if raw:
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = None
+
+        if not self.stub.admit():
+            self.stub.stats.record_throttled()
+            data = b'{"title":"Too Many Requests"}'
+            self.send_response(429)
+            self.send_header('Retry-After', str(self.stub.retry_after))
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        if not self.stub.occupy():
+            self.stub.stats.record_overloaded()
+            data = b'{"title":"Service Unavailable"}'
+            self.send_response(503)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        try:
+            if self.stub.latency:
+                time.sleep(self.stub.latency)
+            status, payload, route = self._route(method, parts.path, query, body)
+        finally:
+            self.stub.release()
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+        self.stub.stats.record(f"{method} {route}", len(raw), len(data))
+
+    def do_GET(self) -> None:
+        self._dispatch('GET')
+
+    def do_POST(self) -> None:
+        self._dispatch('POST')
+
+    def do_PUT(self) -> None:
+        self._dispatch('PUT')
+
+    def do_DELETE(self) -> None:
+        self._dispatch('DELETE')
+
+    def do_HEAD(self) -> None:
+        self._dispatch('HEAD')
+
+    def _route(self, method: str, path: str, query: dict, body: Any) -> tuple[int, Any, str]:
+        stub = self.stub
+        match = _ROUTE.match(path)
+        if not match:
+            return 404, {'title': 'Not Found'}, path
+        group, resource, name, sub = match.group('group', 'resource', 'name', 'sub')
+        route = f"{group}/{resource}" + ('/{name}' if name else '') + (f"/{sub}" if sub else '')
+
+        if self.headers.get('Authorization', '') != f"Bearer {stub.credentials()['access_token']}":
+            return 401, {'title': 'Unauthorized'}, route
+
+        # 当前用户
+        if group == 'api.console.halo.run' and resource == 'users' and name == '-':
+            user = {'metadata': {'name': OWNER}, 'spec': {'displayName': 'Administrator'}}
+            return 200, user if sub == 'profile' else {'user': user, 'roles': []}, route
+
+        # 文章内容（Console API）
+        if group == 'api.console.halo.run' and resource == 'posts' and name and sub == 'content':
+            content = stub.post_content(name)
+            if content is None:
+                return 404, {'title': 'Not Found'}, route
+            if method == 'PUT':
+                return 200, stub.get('Post', name), route
+            return 200, content, route
+
+        # 文章列表（Console / UC API）
+        if group in ('api.console.halo.run', 'uc.api.content.halo.run') and resource == 'posts' \
+                and name is None and method == 'GET':
+            posts = sorted(stub.items('Post'), key=_creation_key, reverse=True)
+            if group == 'uc.api.content.halo.run':
+                posts = [p for p in posts if p['spec'].get('owner') == OWNER]
+            posts = stub.filter_posts(posts, query)
+            return 200, list_result([stub.listed_post(p) for p in posts], query), route
+
+        # 发布 / 取消发布
+        if resource == 'posts' and name and sub in ('publish', 'unpublish') and method == 'PUT':
+            post = stub.get('Post', name)
+            if not post:
+                return 404, {'title': 'Not Found'}, route
+            post['spec']['publish'] = sub == 'publish'
+            post['metadata']['labels']['content.halo.run/published'] = str(sub == 'publish').lower()
+            return 200, post, route
+
+        # 动态列表（动态插件的 Console API，支持服务端筛选）
+        if group == 'console.api.moment.halo.run' and resource == 'moments' and name is None \
+                and method == 'GET' and stub.moment_console_api:
+            return 200, list_result([stub.listed_moment(m) for m in filter_moments(stub.items('Moment'), query)],
+                                    query), route
+
+        kind = _EXTENSIONS.get((group, resource))
+        if not kind or sub:
+            return 404, {'title': 'Not Found'}, route
+
+        if name is None:
+            if method == 'GET':
+                items = sorted(stub.items(kind), key=_creation_key, reverse=True)
+                if 'labelSelector' in query:
+                    items = [item for item in items if match_labels(item, query['labelSelector'])]
+                if 'fieldSelector' in query:
+                    items = [item for item in items if match_fields(item, query['fieldSelector'])]
+                return 200, list_result(items, query), route
+            if method == 'POST' and isinstance(body, dict):
+                try:
+                    created = stub.add(kind, copy.deepcopy(body))
+                except KeyError:
+                    return 409, {'title': 'Conflict'}, route
+                if kind in ('Tag', 'Category', 'Post'):
+                    stub._refresh_counts()
+                return 201, created, route
+            return 405, {'title': 'Method Not Allowed'}, route
+
+        obj = stub.get(kind, name)
+        if obj is None:
+            return 404, {'title': 'Not Found'}, route
+        if method == 'GET':
+            return 200, obj, route
+        if method == 'PUT' and isinstance(body, dict):
+            with stub._lock:
+                # 与 Halo 一致的乐观锁：带了版本号但已过期时返回 409
+                version = (body.get('metadata') or {}).get('version')
+                if version is not None and version != obj['metadata'].get('version'):
+                    return 409, {'title': 'Conflict'}, route
+                body = copy.deepcopy(body)
+                body['metadata'] = {**obj['metadata'], **body.get('metadata', {})}
+                body['metadata']['version'] = obj['metadata'].get('version', 0) + 1
+                stub._store[kind][name] = body
+            return 200, body, route
+        if method == 'DELETE':
+            with stub._lock:
+                stub._store[kind].pop(name, None)
+            return 200, obj, route
+        return 405, {'title': 'Method Not Allowed'}, route
+
+
+def run_forever(latency: float = 0.0, seed: Optional[Callable[[HaloStub], None]] = None) -> None:
+    """独立运行替身，便于手动调试"""
+    stub = HaloStub(latency=latency).start()
+    (seed or (lambda s: s.seed()))(stub)
+    print(f"Halo stub listening on {stub.base_url} token={stub.credentials()['access_token']}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    run_forever()
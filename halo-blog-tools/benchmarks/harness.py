@@ -0,0 +1,157 @@
+"""
+基准测试公共部分：按 Dify 的方式加载工具类、定义调用场景并执行 ``_invoke``。
+"""
+
+from typing import Any, Callable, Optional
+import json
+import logging
+import os
+import sys
+import time
+
+import yaml
+
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PLUGIN_ROOT not in sys.path:
+    sys.path.insert(0, PLUGIN_ROOT)
+# 基准默认不使用持久化缓存，避免上一次运行留下的记录影响请求数
+os.environ.setdefault('HALO_DISK_CACHE', 'false')
+# 后台任务记录只保存在内存数据库中，不在工作目录留下文件
+os.environ.setdefault('HALO_JOBS_PATH', ':memory:')
+
+from dify_plugin import Tool  # noqa: E402
+from dify_plugin.core.utils.class_loader import load_single_subclass_from_source  # noqa: E402
+
+from benchmarks.halo_stub import HaloStub  # noqa: E402
+from utils.credentials import forget_credentials  # noqa: E402
+from utils.halo_client import get_session  # noqa: E402
+from utils.site_stats import invalidate_site_stats  # noqa: E402
+
+_tool_classes: dict[str, type] = {}
+
+
+def tool_sources() -> dict[str, str]:
+    """读取 provider 声明的全部工具：工具名 -> 源文件相对路径"""
+    with open(os.path.join(PLUGIN_ROOT, 'provider', 'halo-blog-tools.yaml'), encoding='utf-8') as f:
+        provider = yaml.safe_load(f)
+    sources = {}
+    for tool_yaml in provider['tools']:
+        with open(os.path.join(PLUGIN_ROOT, tool_yaml), encoding='utf-8') as f:
+            spec = yaml.safe_load(f)
+        sources[spec['identity']['name']] = spec['extra']['python']['source']
+    return sources
+
+
+def load_tool(name: str) -> type:
+    """与 dify_plugin 的 PluginRegistration 相同的方式加载工具类"""
+    if name not in _tool_classes:
+        source = tool_sources()[name]
+        _tool_classes[name] = load_single_subclass_from_source(
+            module_name=os.path.splitext(source)[0].replace('/', '.'),
+            script_path=os.path.join(PLUGIN_ROOT, source),
+            parent_type=Tool,
+        )
+    return _tool_classes[name]
+
+
+def load_all_tools(names: list[str]) -> None:
+    """
+    预先加载工具类
+
+    部分工具在导入时会调用 ``logging.basicConfig(level=INFO)``，加载完成后把根日志
+    级别调回 WARNING，避免逐请求的调试日志刷屏并干扰计时。
+    """
+    for name in names:
+        load_tool(name)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+class Invocation:
+    """一次工具调用的结果"""
+
+    __slots__ = ('tool', 'elapsed', 'texts', 'jsons', 'error')
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.elapsed = 0.0
+        self.texts: list[str] = []
+        self.jsons: list[dict] = []
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        if self.error or any(text.startswith('❌') for text in self.texts):
+            return False
+        return all(payload.get('success', True) for payload in self.jsons)
+
+
+def invoke(name: str, credentials: dict[str, str], parameters: dict[str, Any]) -> Invocation:
+    """执行一次工具调用并收集全部消息"""
+    result = Invocation(name)
+    tool = load_tool(name).from_credentials(credentials)
+    start = time.perf_counter()
+    try:
+        for message in tool._invoke(parameters):
+            payload = message.message
+            if hasattr(payload, 'json_object'):
+                result.jsons.append(payload.json_object)
+            elif hasattr(payload, 'text'):
+                result.texts.append(payload.text)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+_ARTICLE = "# 基准测试\n\n" + "这是一段用于基准测试的 Markdown 正文。\n\n" * 200
+
+
+def _disposable_post(stub: HaloStub) -> str:
+    post = stub.add('Post', {'spec': {'title': '待删除文章', 'slug': 'to-delete', 'publish': False,
+                                      'tags': ['tag-0000'], 'categories': ['category-0000'], 'owner': 'admin'},
+                             'metadata': {'generateName': 'post-'}})
+    return post['metadata']['name']
+
+
+def _cold_setup(stub: HaloStub) -> dict[str, Any]:
+    """丢弃凭据验证结果和统计快照，每次都测完整的验证和统计路径"""
+    credentials = stub.credentials()
+    forget_credentials(credentials['base_url'], credentials['access_token'])
+    invalidate_site_stats(get_session(credentials['base_url'], credentials['access_token']))
+    return {}
+
+
+# 每个工具的调用参数，接收替身实例以便准备一次性数据
+SCENARIOS: dict[str, Callable[[HaloStub], dict[str, Any]]] = {
+    'halo-setup': _cold_setup,
+    'halo-post-list': lambda stub: {'page': 0, 'size': 20},
+    'halo-post-get': lambda stub: {'post_id': 'post-00001', 'include_content': True},
+    'halo-post-create': lambda stub: {
+        'title': '基准测试文章', 'content': _ARTICLE, 'tags': '标签1,标签2', 'categories': '分类1',
+        'publish_immediately': True,
+    },
+    'halo-post-update': lambda stub: {'post_id': 'post-00002', 'title': '更新后的标题', 'content': _ARTICLE},
+    'halo-post-delete': lambda stub: {'post_id': _disposable_post(stub), 'confirm': True},
+    'halo-post-migrate-content': lambda stub: {'dry_run': True},
+    'halo-moment-create': lambda stub: {
+        'content': '基准测试动态', 'tags': '标签1', 'media_urls': 'https://cdn.example.com/a.png',
+    },
+    'halo-moment-batch-create': lambda stub: {
+        'moments': json.dumps([{'content': f'批量动态 {i}', 'tags': '标签1'} for i in range(20)]),
+        'concurrency': 4,
+    },
+    'halo-moment-list': lambda stub: {'page': 0, 'size': 10},
+    'halo-categories-list': lambda stub: {'page': 0, 'size': 50},
+    'halo-tags-list': lambda stub: {'page': 0, 'size': 50},
+    'halo-metrics': lambda stub: {'format': 'json'},
+    'halo-job-status': lambda stub: {},
+    # 不存在的任务：只测查询路径的开销
+    'halo-job-cancel': lambda stub: {'job_id': 'job-000000000000'},
+}
+
+
+def seeded_stub(latency: float = 0.0) -> HaloStub:
+    """启动替身并写入默认数据集"""
+    stub = HaloStub(latency=latency).start()
+    stub.seed(posts=200, tags=60, categories=12, moments=100)
+    return stub
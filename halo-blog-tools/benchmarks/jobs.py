@@ -0,0 +1,80 @@
+"""
+后台任务基准
+
+替身每个请求耗时 ``--latency`` 秒，用 halo-moment-batch-create 创建 ``-n`` 条动态：
+
+- foreground：原先的做法，工具调用一直持续到全部动态创建完毕
+- background：``background=true``，记录工具调用返回任务 ID 的耗时，再轮询
+  halo-job-status 直到任务结束，记录任务总耗时
+
+前台调用超过插件清单的 120 秒限制时会被 Dify 中途切断；后台模式下工具调用本身
+只需要几毫秒。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.jobs
+    python -m benchmarks.jobs -n 2000 --latency 0.05
+"""
+
+from typing import Optional
+import argparse
+import json
+import sys
+import time
+
+from benchmarks import harness
+from benchmarks.halo_stub import HaloStub
+
+TOOLS = ['halo-moment-batch-create', 'halo-job-status']
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--count', type=int, default=500, help='创建的动态数')
+    parser.add_argument('--latency', type=float, default=0.02, help='替身处理每个请求的秒数')
+    parser.add_argument('--poll', type=float, default=0.2, help='轮询任务状态的间隔秒数')
+    args = parser.parse_args(argv)
+
+    harness.load_all_tools(TOOLS)
+    stub = HaloStub(latency=args.latency).start()
+    try:
+        stub.seed(posts=10, tags=10, categories=4, moments=0)
+        credentials = stub.credentials()
+        parameters = {'moments': json.dumps([f'后台任务动态 {i}' for i in range(args.count)]), 'concurrency': 16}
+
+        foreground = harness.invoke('halo-moment-batch-create', credentials, parameters)
+        if not foreground.ok:
+            print(f"前台调用失败: {foreground.error or foreground.texts[-1:]}")
+            return 1
+
+        submitted = harness.invoke('halo-moment-batch-create', credentials, {**parameters, 'background': True})
+        if not submitted.ok or not submitted.jsons:
+            print(f"提交后台任务失败: {submitted.error or submitted.texts[-1:]}")
+            return 1
+        job_id = submitted.jsons[-1]['job_id']
+        start = time.perf_counter()
+        polls = 0
+        while True:
+            status = harness.invoke('halo-job-status', credentials, {'job_id': job_id})
+            polls += 1
+            job = status.jsons[-1]['job']
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(args.poll)
+        job_elapsed = time.perf_counter() - start + submitted.elapsed
+        result = job['result'] or {}
+
+        print(f"创建 {args.count} 条动态，替身处理每个请求 {args.latency * 1000:.0f}ms")
+        print(f"{'模式':<12}{'工具调用(ms)':>14}{'完成耗时(s)':>14}{'成功':>8}")
+        print(f"{'foreground':<12}{foreground.elapsed * 1000:>14.1f}{foreground.elapsed:>14.2f}"
+              f"{foreground.jsons[-1]['succeeded']:>8}")
+        print(f"{'background':<12}{submitted.elapsed * 1000:>14.1f}{job_elapsed:>14.2f}"
+              f"{result.get('succeeded', 0):>8}")
+        print(f"任务 {job_id} 结束状态 {job['status']}，轮询 {polls} 次")
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+JSON 编解码基准
+
+在形态接近真实站点的 Halo 载荷上对比三种编解码方式：
+
+- old：原先的做法。请求体 ``json.dumps(obj)`` 得到 str（非 ASCII 字符转义为 ``\\uXXXX``），
+  再由 requests / http.client 编码为 bytes；响应 ``json.loads(content.decode('utf-8'))``
+- stdlib：``utils.json_codec`` 未安装 orjson 时的退回实现，紧凑格式，直接产出 bytes
+- orjson：``utils.json_codec`` 安装了 orjson 时的实现（未安装时跳过），输出 UTF-8 不转义
+
+编码载荷为 post-create 提交的快照、post-update / 迁移工具 PUT 的整篇文章和一条动态；
+解码载荷为单篇文章、文章内容接口、文章列表页、标签列表页和动态列表页的响应体。
+另外列出原先与当前实现的请求体大小：orjson 不转义中文，正文较长时请求体明显变小。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.json_codec
+    python -m benchmarks.json_codec --content-kb 100 -n 7
+"""
+
+from typing import Any, Callable, Optional
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.harness import PLUGIN_ROOT  # noqa: F401  保证 utils 可导入
+from benchmarks.halo_stub import HaloStub
+
+from utils import json_codec
+
+
+def _old_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode('utf-8')
+
+
+def _old_loads(data: bytes) -> Any:
+    return json.loads(data.decode('utf-8'))
+
+
+# 实现名 -> (编码, 解码)
+CODECS: dict[str, tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    'old': (_old_dumps, _old_loads),
+    'stdlib': (json_codec._stdlib_dumps, json_codec._stdlib_loads),
+}
+if json_codec.orjson is not None:
+    CODECS['orjson'] = (json_codec._orjson_dumps, json_codec.orjson.loads)
+
+
+def build_payloads(stub: HaloStub, page_size: int) -> tuple[dict[str, Any], dict[str, bytes]]:
+    """返回 (待编码的请求体, 待解码的响应体)"""
+    post = stub.get('Post', 'post-00000')
+    snapshot = stub.get('Snapshot', 'snapshot-post-00000')
+    body = snapshot['spec']['rawPatch']
+    moment = stub.items('Moment')[0]
+
+    requests_out = {
+        'snapshot': {'apiVersion': 'content.halo.run/v1alpha1', 'kind': 'Snapshot',
+                     'metadata': {'name': 'snapshot-new', 'annotations': {}}, 'spec': snapshot['spec']},
+        'post-put': post,
+        'moment': {'apiVersion': 'moment.halo.run/v1alpha1', 'kind': 'Moment',
+                   'metadata': {'name': 'moment-new'}, 'spec': moment['spec']},
+    }
+
+    posts = stub.items('Post')[:page_size]
+    responses_in = {
+        'post-get': post,
+        'post-content': {'rawType': 'markdown', 'raw': body, 'content': body},
+        'post-list': {'page': 1, 'size': page_size, 'total': len(posts), 'hasNext': False,
+                      'items': [stub.listed_post(p) for p in posts]},
+        'tags-list': {'page': 1, 'size': 100, 'total': 100, 'hasNext': False, 'items': stub.items('Tag')[:100]},
+        'moment-list': {'page': 1, 'size': page_size, 'total': page_size, 'hasNext': False,
+                        'items': [stub.listed_moment(m) for m in stub.items('Moment')[:page_size]]},
+    }
+    # 响应体按 Halo（Jackson）的方式输出：紧凑格式、UTF-8、非 ASCII 字符不转义
+    encoded = {name: json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+               for name, value in responses_in.items()}
+    return requests_out, encoded
+
+
+def timed(func: Callable[[Any], Any], value: Any, runs: int) -> float:
+    """单次调用耗时（微秒，取中位数）"""
+    loops = max(1, int(0.05 / max(_once(func, value), 1e-7)))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(value)
+        timings.append((time.perf_counter() - start) / loops * 1e6)
+    return statistics.median(timings)
+
+
+def _once(func: Callable[[Any], Any], value: Any) -> float:
+    start = time.perf_counter()
+    func(value)
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--content-kb', type=int, default=20, help='文章正文的字符数（千）')
+    parser.add_argument('--size', type=int, default=20, help='列表每页条数')
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    stub = HaloStub()
+    stub.seed(posts=args.size, tags=100, categories=6, moments=args.size, content_size=args.content_kb * 1000)
+    requests_out, responses_in = build_payloads(stub, args.size)
+
+    names = list(CODECS)
+    print(f"当前使用：{json_codec.BACKEND}；正文 {args.content_kb}K 字符，列表每页 {args.size} 条")
+    header = ''.join(f"{name + '(us)':>13}" for name in names)
+
+    print()
+    print(f"{'编码':<14}{'old(KB)':>10}{'当前(KB)':>10}{header}")
+    for label, value in requests_out.items():
+        old_kb = len(_old_dumps(value)) / 1024
+        new_kb = len(json_codec.dumps(value)) / 1024
+        cells = ''.join(f"{timed(CODECS[name][0], value, args.runs):>13.1f}" for name in names)
+        print(f"{label:<14}{old_kb:>10.1f}{new_kb:>10.1f}{cells}")
+
+    print()
+    print(f"{'解码':<14}{'响应(KB)':>10}{header}")
+    for label, data in responses_in.items():
+        cells = ''.join(f"{timed(CODECS[name][1], data, args.runs):>13.1f}" for name in names)
+        print(f"{label:<14}{len(data) / 1024:>10.1f}{cells}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+精简文章元数据基准
+
+对比迁移前后文章列表的响应体大小和解码耗时：替身中的文章按旧版本插件的方式在
+``content.halo.run/content-json`` 注解里带完整正文；先测量一次列表，再用
+halo-post-migrate-content 移除注解，然后再测量一次。同时用 halo-post-create
+创建一篇新文章，确认精简写入模式下不再写入该注解。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.lean_posts
+    python -m benchmarks.lean_posts --posts 500 --content-kb 20 --size 100
+"""
+
+from typing import Any, Optional
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.harness import invoke, load_all_tools
+from benchmarks.halo_stub import HaloStub
+
+from utils.halo_client import get_session
+from utils.post_content import CONTENT_JSON_ANNOTATION
+
+# Console 列表（halo-post-list 使用）和扩展 API 列表
+LIST_PATHS = {
+    'console': '/apis/api.console.halo.run/v1alpha1/posts',
+    'extension': '/apis/content.halo.run/v1alpha1/posts',
+}
+
+
+def measure_lists(stub: HaloStub, size: int, runs: int) -> dict[str, dict[str, Any]]:
+    """每个列表接口取第一页，记录响应体大小和 response.json() 的耗时"""
+    session = get_session(stub.base_url, stub.credentials()['access_token'])
+    results = {}
+    for label, path in LIST_PATHS.items():
+        timings = []
+        body_bytes = 0
+        for _ in range(runs):
+            response = session.get(f"{stub.base_url}{path}", params={'page': 1, 'size': size}, timeout=60)
+            body_bytes = len(response.content)
+            start = time.perf_counter()
+            response.json()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = {'kb': body_bytes / 1024, 'decode_ms': statistics.median(timings)}
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=200, help='文章数')
+    parser.add_argument('--content-kb', type=int, default=20, help='每篇文章正文的字符数（千）')
+    parser.add_argument('--size', type=int, default=100, help='列表每页文章数')
+    parser.add_argument('--concurrency', type=int, default=8, help='迁移并发数')
+    parser.add_argument('-n', '--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    load_all_tools(['halo-post-migrate-content', 'halo-post-create'])
+    stub = HaloStub().start()
+    try:
+        stub.seed(posts=args.posts, tags=10, categories=6, moments=0, content_size=args.content_kb * 1000)
+        credentials = stub.credentials()
+
+        before = measure_lists(stub, args.size, args.runs)
+
+        stub.stats.reset()
+        migration = invoke('halo-post-migrate-content', credentials,
+                           {'dry_run': False, 'concurrency': args.concurrency})
+        summary = migration.jsons[-1] if migration.jsons else {}
+        requests_made = stub.stats.snapshot()['requests']
+
+        after = measure_lists(stub, args.size, args.runs)
+
+        created = invoke('halo-post-create', credentials, {'title': '精简写入', 'content': '正文' * 1000})
+        post_id = next((payload.get('post_id') for payload in created.jsons if payload.get('post_id')), '')
+        post = stub.get('Post', post_id) or {}
+        lean = CONTENT_JSON_ANNOTATION not in (post.get('metadata', {}).get('annotations') or {})
+
+        print(f"{args.posts} 篇文章，每篇正文 {args.content_kb}K 字符，列表每页 {args.size} 篇")
+        print(f"{'列表接口':<12}{'迁移前(KB)':>12}{'迁移后(KB)':>12}{'解码前(ms)':>12}{'解码后(ms)':>12}")
+        for label in LIST_PATHS:
+            print(f"{label:<12}{before[label]['kb']:>12.0f}{after[label]['kb']:>12.0f}"
+                  f"{before[label]['decode_ms']:>12.1f}{after[label]['decode_ms']:>12.1f}")
+        print(f"迁移：{summary.get('succeeded', 0)}/{summary.get('total', 0)} 篇成功，"
+              f"{requests_made} 个请求，{migration.elapsed * 1000:.0f} ms，"
+              f"移除 {summary.get('saved_chars', 0) / 1024:.0f}K 字符")
+        print(f"新建文章不含 content-json 注解：{'是' if lean else '否'}")
+    finally:
+        stub.stop()
+    return 0 if migration.ok and lean else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
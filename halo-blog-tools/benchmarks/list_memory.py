@@ -0,0 +1,107 @@
+"""
+文章列表解码内存基准
+
+对同一页文章列表比较三种解码方式的峰值内存和耗时：
+
+- json：``response.json()`` 解析整页后再格式化（原先的做法）
+- incremental：响应体整体读入后逐条解码为 Post 模型
+- stream：``stream=True`` 边收边逐条解码
+
+替身中每篇文章的 ``content.halo.run/content-json`` 注解带完整正文，与旧版本 post-create
+写入的数据一致。响应体先从替身取回一次，之后每轮用预先分配的 BytesIO 充当套接字，
+峰值内存只统计客户端的读取和解码，不含同进程替身序列化响应的开销。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.list_memory
+    python -m benchmarks.list_memory --size 100 --content-kb 50 -n 5
+"""
+
+from typing import Any, Callable, Optional
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import HaloStub
+
+import requests
+from utils.halo_client import get_session
+from utils.post_query import format_post, read_post_page
+
+POSTS_PATH = '/apis/content.halo.run/v1alpha1/posts'
+
+
+def _decode_json(response: requests.Response) -> list[dict[str, Any]]:
+    return [format_post(item) for item in response.json().get('items', [])]
+
+
+def _decode_incremental(response: requests.Response) -> list[dict[str, Any]]:
+    response.content
+    return [post.to_dict() for post in read_post_page(response).get('items', [])]
+
+
+def _decode_stream(response: requests.Response) -> list[dict[str, Any]]:
+    return [post.to_dict() for post in read_post_page(response).get('items', [])]
+
+
+DECODERS: dict[str, Callable[[requests.Response], list[dict[str, Any]]]] = {
+    'json': _decode_json,
+    'incremental': _decode_incremental,
+    'stream': _decode_stream,
+}
+
+
+def _replay(body: bytes) -> requests.Response:
+    """构造尚未读取响应体的 Response，响应体从内存中的“套接字”读取"""
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def measure(decode: Callable, body: bytes, runs: int) -> dict[str, Any]:
+    timings, peaks = [], []
+    for _ in range(runs):
+        response = _replay(body)
+        tracemalloc.start()
+        start = time.perf_counter()
+        posts = decode(response)
+        timings.append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        del posts, response
+    return {'ms': statistics.median(timings), 'peak_kb': statistics.median(peaks) / 1024}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100, help='每页文章数')
+    parser.add_argument('--content-kb', type=int, default=20, help='每篇文章正文的字符数（千）')
+    parser.add_argument('-n', '--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    stub = HaloStub().start()
+    try:
+        stub.seed(posts=args.size, tags=10, categories=6, moments=0, content_size=args.content_kb * 1000)
+        session = get_session(stub.base_url, stub.credentials()['access_token'])
+        url = f"{stub.base_url}{POSTS_PATH}"
+        params = {'page': 1, 'size': args.size}
+        body = session.get(url, params=params, timeout=30).content
+
+        print(f"每页 {args.size} 篇，响应体 {len(body) / 1024:.0f} KB")
+        print(f"{'方式':<14}{'峰值内存(KB)':>14}{'耗时(ms)':>10}")
+        for name, decode in DECODERS.items():
+            result = measure(decode, body, args.runs)
+            print(f"{name:<14}{result['peak_kb']:>14.0f}{result['ms']:>10.1f}")
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+并发负载测试
+
+模拟插件进程内同时处理多个 Dify 工具调用：N 个线程（或 asyncio 任务）按给定比例
+混合调用 create/update/get/list 等工具，目标为本地 Halo 替身，可注入服务端延迟。
+报告吞吐量、各工具的尾延迟、错误率以及替身观察到的连接数。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.load_test --workers 32 --duration 20
+    python -m benchmarks.load_test --mode asyncio --workers 64 --latency-ms 50 \\
+        --mix post-get=6,post-list=3,post-create=1,post-update=1
+"""
+
+from typing import Any, Optional
+
+# harness 会导入 dify_plugin 并完成 gevent 的 monkey patch，必须先于 concurrent.futures 导入，
+# 否则线程池模块里的全局锁是未打补丁的系统锁，多个 greenlet 同时提交任务时会卡死整个进程
+from benchmarks.harness import SCENARIOS, Invocation, invoke, load_all_tools, seeded_stub  # isort: skip
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MIX = 'post-get=5,post-list=3,post-create=1,post-update=1'
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """解析 ``post-get=5,post-list=3`` 形式的调用比例，工具名可省略 ``halo-`` 前缀"""
+    mix = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if not name.startswith('halo-'):
+            name = f"halo-{name}"
+        if name not in SCENARIOS:
+            raise ValueError(f"未知工具: {name}")
+        mix[name] = int(weight or 1)
+    if not mix:
+        raise ValueError("调用比例不能为空")
+    return mix
+
+
+class LoadRecorder:
+    """线程安全地收集每次调用的结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.last_error: dict[str, str] = {}
+
+    def record(self, result: Invocation) -> None:
+        with self._lock:
+            self.latencies.setdefault(result.tool, []).append(result.elapsed * 1000)
+            if not result.ok:
+                self.errors[result.tool] = self.errors.get(result.tool, 0) + 1
+                message = result.error or next((t for t in result.texts if t.startswith('❌')), '')
+                self.last_error[result.tool] = message[:200]
+
+    @property
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LoadTest:
+    def __init__(self, mix: dict[str, int], workers: int, duration: float,
+                 invocations: Optional[int], latency: float, seed: int):
+        self.mix = mix
+        self.workers = workers
+        self.duration = duration
+        self.invocations = invocations
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.recorder = LoadRecorder()
+        self._issued = 0
+        self._issue_lock = threading.Lock()
+        self._deadline = 0.0
+        self.stub = None
+
+    def _next_tool(self) -> Optional[str]:
+        """按比例抽取下一个调用；达到次数或时间上限时返回 None"""
+        with self._issue_lock:
+            if self.invocations is not None and self._issued >= self.invocations:
+                return None
+            if self.invocations is None and time.perf_counter() >= self._deadline:
+                return None
+            self._issued += 1
+            return self.random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+
+    def _run_one(self, name: str) -> None:
+        parameters = SCENARIOS[name](self.stub)
+        self.recorder.record(invoke(name, self.stub.credentials(), parameters))
+
+    def _worker(self) -> None:
+        while (name := self._next_tool()) is not None:
+            self._run_one(name)
+
+    def run_threads(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(self._worker) for _ in range(self.workers)]:
+                future.result()
+
+    def run_asyncio(self) -> None:
+        async def task(loop: asyncio.AbstractEventLoop, executor: ThreadPoolExecutor) -> None:
+            while (name := self._next_tool()) is not None:
+                await loop.run_in_executor(executor, self._run_one, name)
+
+        async def main() -> None:
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                await asyncio.gather(*(task(loop, executor) for _ in range(self.workers)))
+
+        asyncio.run(main())
+
+    def run(self, mode: str) -> dict[str, Any]:
+        load_all_tools(list(self.mix))
+        self.stub = seeded_stub(latency=self.latency)
+        try:
+            self.stub.stats.reset()
+            started = time.perf_counter()
+            self._deadline = started + self.duration
+            if mode == 'asyncio':
+                self.run_asyncio()
+            else:
+                self.run_threads()
+            elapsed = time.perf_counter() - started
+            http = self.stub.stats.snapshot()
+        finally:
+            self.stub.stop()
+        return self.report(mode, elapsed, http)
+
+    def report(self, mode: str, elapsed: float, http: dict[str, Any]) -> dict[str, Any]:
+        tools = {}
+        for name, values in sorted(self.recorder.latencies.items()):
+            errors = self.recorder.errors.get(name, 0)
+            tools[name] = {
+                'invocations': len(values),
+                'errors': errors,
+                'error_rate': round(errors / len(values), 4),
+                'last_error': self.recorder.last_error.get(name),
+                'latency_ms': {
+                    'p50': round(statistics.median(values), 2),
+                    'p95': round(_percentile(values, 0.95), 2),
+                    'p99': round(_percentile(values, 0.99), 2),
+                    'max': round(max(values), 2),
+                },
+            }
+        total = self.recorder.total
+        total_errors = sum(self.recorder.errors.values())
+        return {
+            'config': {
+                'mode': mode, 'workers': self.workers, 'mix': self.mix,
+                'server_latency_ms': round(self.latency * 1000, 1),
+            },
+            'elapsed_seconds': round(elapsed, 3),
+            'invocations': total,
+            'throughput_per_second': round(total / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(total_errors / total, 4) if total else 0.0,
+            'http': {
+                'requests': http['requests'],
+                'requests_per_second': round(http['requests'] / elapsed, 2) if elapsed else 0.0,
+                'bytes_in': http['bytes_in'],
+                'bytes_out': http['bytes_out'],
+                'connections_opened': http['connections'],
+                'peak_open_connections': http['peak_connections'],
+            },
+            'tools': tools,
+        }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    config, http = report['config'], report['http']
+    print(f"模式 {config['mode']} / 并发 {config['workers']} / 服务端延迟 {config['server_latency_ms']}ms")
+    print(f"共 {report['invocations']} 次调用，耗时 {report['elapsed_seconds']}s，"
+          f"吞吐 {report['throughput_per_second']}/s，错误率 {report['error_rate']:.2%}")
+    print(f"HTTP 请求 {http['requests']}（{http['requests_per_second']}/s），"
+          f"新建连接 {http['connections_opened']}，峰值并发连接 {http['peak_open_connections']}")
+    print()
+    header = f"{'tool':<24}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, row in report['tools'].items():
+        latency = row['latency_ms']
+        print(f"{name:<24}{row['invocations']:>7}{row['errors']:>8}{latency['p50']:>10.1f}"
+              f"{latency['p95']:>10.1f}{latency['p99']:>10.1f}{latency['max']:>10.1f}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threads', 'asyncio'], default='threads')
+    parser.add_argument('-w', '--workers', type=int, default=16)
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='持续时间（秒）')
+    parser.add_argument('-n', '--invocations', type=int, default=None, help='总调用次数，设置后忽略 --duration')
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='替身对每个请求额外注入的延迟')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='', help='将报告保存为 JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    test = LoadTest(mix, args.workers, args.duration, args.invocations, args.latency_ms / 1000, args.seed)
+    report = test.run(args.mode)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+数据模型微基准
+
+对比两种处理 Halo 资源的方式：
+
+- dict：原先的做法，缓存里保存整份原始 JSON，输出时逐层 ``.get()`` 拷贝出新的 dict
+- model：``utils.models`` 的 slots 模型，``from_json`` 解码一次，只保留用到的字段
+
+分别测量标签/分类索引和文章列表的单条解码耗时、解码结果常驻内存的大小，以及标签/分类
+索引写入持久化缓存时的大小。常驻内存只统计保留下来的对象：原先的索引保留原始条目，
+列表工具保留拷贝出的 dict，model 方式解码后原始条目即被释放。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.models
+    python -m benchmarks.models --items 5000 -n 5
+"""
+
+from typing import Any, Callable, Optional
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import PLUGIN_ROOT  # noqa: F401  保证 utils 可导入
+from benchmarks.halo_stub import HaloStub
+
+from utils.models import Category, Post, Tag
+
+
+def _dict_tag(item: dict[str, Any]) -> dict[str, Any]:
+    spec = item.get('spec', {})
+    status = item.get('status', {})
+    metadata = item.get('metadata', {})
+    return {
+        'id': metadata.get('name', ''),
+        'name': spec.get('displayName', ''),
+        'slug': spec.get('slug', ''),
+        'description': spec.get('description', ''),
+        'cover': spec.get('cover', ''),
+        'color': spec.get('color', ''),
+        'visible_in_list': spec.get('visibleInList', True),
+        'permalink': status.get('permalink', ''),
+        'post_count': status.get('postCount', 0),
+        'visible_post_count': status.get('visiblePostCount', 0),
+        'creation_time': metadata.get('creationTimestamp')
+    }
+
+
+def _dict_category(item: dict[str, Any]) -> dict[str, Any]:
+    spec = item.get('spec', {})
+    status = item.get('status', {})
+    metadata = item.get('metadata', {})
+    return {
+        'id': metadata.get('name', ''),
+        'name': spec.get('displayName', ''),
+        'slug': spec.get('slug', ''),
+        'description': spec.get('description', ''),
+        'cover': spec.get('cover', ''),
+        'color': spec.get('color', ''),
+        'priority': spec.get('priority', 0),
+        'visible_in_list': spec.get('visibleInList', True),
+        'hide_from_list': spec.get('hideFromList', False),
+        'prevent_parent_post_cascade_query': spec.get('preventParentPostCascadeQuery', False),
+        'parent': spec.get('parent', ''),
+        'children': spec.get('children', []),
+        'template': spec.get('template', ''),
+        'permalink': status.get('permalink', ''),
+        'post_count': status.get('postCount', 0),
+        'visible_post_count': status.get('visiblePostCount', 0),
+        'creation_time': metadata.get('creationTimestamp'),
+        'full_path': status.get('fullPath', '')
+    }
+
+
+def _dict_post(item: dict[str, Any]) -> dict[str, Any]:
+    listed = isinstance(item.get('post'), dict)
+    post = item['post'] if listed else item
+    spec = post.get('spec', {})
+    status = post.get('status', {})
+    metadata = post.get('metadata', {})
+    formatted = {
+        'id': metadata.get('name', ''),
+        'title': spec.get('title', '未知标题'),
+        'slug': spec.get('slug', ''),
+        'excerpt': spec.get('excerpt', ''),
+        'cover': spec.get('cover', ''),
+        'published': spec.get('publish', False),
+        'pinned': spec.get('pinned', False),
+        'allowComment': spec.get('allowComment', True),
+        'visible': spec.get('visible', 'PUBLIC'),
+        'priority': spec.get('priority', 0),
+        'tags': spec.get('tags', []),
+        'categories': spec.get('categories', []),
+        'publishTime': spec.get('publishTime'),
+        'permalink': status.get('permalink', ''),
+        'excerpt_from_content': status.get('excerpt', ''),
+        'word_count': status.get('size', 0),
+        'creation_time': metadata.get('creationTimestamp'),
+        'last_modified': status.get('lastModifyTime')
+    }
+    if listed:
+        formatted['tag_names'] = [t.get('spec', {}).get('displayName', '') for t in item.get('tags') or []]
+        formatted['category_names'] = [c.get('spec', {}).get('displayName', '') for c in item.get('categories') or []]
+    return formatted
+
+
+# 资源 -> (原始条目生成函数, dict 方式, model 方式)
+CASES: dict[str, tuple[Callable[[HaloStub], list[dict[str, Any]]], Callable, Callable]] = {
+    'tags': (lambda stub: stub.items('Tag'), _dict_tag, Tag.from_json),
+    'categories': (lambda stub: stub.items('Category'), _dict_category, Category.from_json),
+    'posts': (lambda stub: [stub.listed_post(p) for p in stub.items('Post')], _dict_post, Post.from_json),
+}
+
+
+def decode_time(items: list[dict[str, Any]], decode: Callable, runs: int) -> float:
+    """每条的解码耗时（微秒，取中位数）"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for item in items:
+            decode(item)
+        timings.append((time.perf_counter() - start) / len(items) * 1e6)
+    return statistics.median(timings)
+
+
+def retained_bytes(body: str, keep: Callable[[list[dict[str, Any]]], Any]) -> int:
+    """从 JSON 文本解码后保留 keep() 的结果，返回常驻内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    kept = keep(json.loads(body)['items'])
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000, help='每种资源的条数')
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    stub = HaloStub()
+    stub.seed(posts=args.items, tags=args.items, categories=args.items, moments=0, content_size=200)
+
+    print(f"每种资源 {args.items} 条")
+    print(f"{'资源':<12}{'dict(us)':>10}{'model(us)':>11}{'原始条目(KB)':>14}{'dict(KB)':>10}{'model(KB)':>11}")
+    for resource, (source, as_dict, as_model) in CASES.items():
+        items = source(stub)
+        body = json.dumps({'items': items})
+        dict_us = decode_time(items, as_dict, args.runs)
+        model_us = decode_time(items, as_model, args.runs)
+        # 原先的缓存保留原始条目；列表工具保留拷贝出的 dict；模型只保留自身
+        raw_kb = retained_bytes(body, lambda parsed: parsed) / 1024
+        dict_kb = retained_bytes(body, lambda parsed: [as_dict(item) for item in parsed]) / 1024
+        model_kb = retained_bytes(body, lambda parsed: [as_model(item) for item in parsed]) / 1024
+        print(f"{resource:<12}{dict_us:>10.2f}{model_us:>11.2f}{raw_kb:>14.0f}{dict_kb:>10.0f}{model_kb:>11.0f}")
+
+    # 标签/分类索引写入持久化缓存时的大小：原先保存原始条目，现在保存模型的定长列表
+    print()
+    print(f"{'持久化索引':<12}{'原始条目(KB)':>14}{'模型行(KB)':>12}")
+    for resource in ('tags', 'categories'):
+        source, _, as_model = CASES[resource]
+        items = source(stub)
+        raw_kb = len(json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8')) / 1024
+        rows = [as_model(item).to_row() for item in items]
+        rows_kb = len(json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8')) / 1024
+        print(f"{resource:<12}{raw_kb:>14.0f}{rows_kb:>12.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
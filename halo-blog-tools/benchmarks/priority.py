@@ -0,0 +1,122 @@
+"""
+优先级通道基准
+
+替身只有 ``--site-workers`` 个工作线程（超出的请求在站点排队），每个请求耗时
+``--latency`` 秒。``--batch`` 个线程在批量通道持续读取文章，模拟批量任务；
+同时一个交互线程逐个读取文章，模拟聊天应用里的 halo-post-get。对比：
+
+- idle：没有批量任务时交互请求的延迟
+- off：会话不限制在途请求（HALO_MAX_IN_FLIGHT=0），交互请求与批量请求一起在站点排队
+- lanes：会话最多 ``--slots`` 个在途请求，其中 ``--reserved`` 个留给交互通道
+
+输出交互请求的 p50/p99 延迟、批量请求的吞吐，以及交互请求在通道中排队的次数。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.priority
+    python -m benchmarks.priority --batch 48 --slots 8 --reserved 2 -d 10
+"""
+
+from typing import Any, Optional
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.harness import PLUGIN_ROOT  # noqa: F401  保证 utils 可导入
+from benchmarks.halo_stub import HaloStub
+
+from utils.halo_client import create_session
+from utils.metrics import registry
+from utils.priority import BATCH, LaneScheduler, priority
+
+POSTS_PATH = '/apis/content.halo.run/v1alpha1/posts'
+
+
+def run(stub: HaloStub, lanes: Optional[LaneScheduler], batch_threads: int, duration: float,
+        posts: int) -> dict[str, Any]:
+    session = create_session(stub.credentials()['access_token'])
+    session.lanes = lanes
+    # 每个请求都要真正到达替身
+    session.coalesce_reads = False
+    registry.reset()
+    deadline = time.monotonic() + duration
+    interactive: list[float] = []
+    batch_done = [0]
+    lock = threading.Lock()
+
+    def bulk(index: int) -> None:
+        i = index
+        with priority(BATCH):
+            while time.monotonic() < deadline:
+                session.get(f"{stub.base_url}{POSTS_PATH}/post-{i % posts:05d}", timeout=60)
+                with lock:
+                    batch_done[0] += 1
+                i += batch_threads
+
+    def user() -> None:
+        i = 0
+        # 等批量任务先占满站点
+        time.sleep(min(0.5, duration / 4))
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            session.get(f"{stub.base_url}{POSTS_PATH}/post-{i % posts:05d}", timeout=60)
+            interactive.append(time.perf_counter() - start)
+            i += 1
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=bulk, args=(i,)) for i in range(batch_threads)]
+    threads.append(threading.Thread(target=user))
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+    session.close()
+
+    waits = registry.to_dict()['lanes'].get('interactive', {}).get('waits', 0)
+    return {
+        'p50_ms': statistics.median(interactive) * 1000,
+        'p99_ms': statistics.quantiles(interactive, n=100)[-1] * 1000 if len(interactive) >= 100
+        else max(interactive) * 1000,
+        'samples': len(interactive),
+        'batch_per_second': batch_done[0] / wall,
+        'interactive_waits': waits,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02, help='替身处理每个请求的秒数')
+    parser.add_argument('--site-workers', type=int, default=8, help='替身同时处理的请求数')
+    parser.add_argument('--batch', type=int, default=32, help='批量通道的线程数')
+    parser.add_argument('--slots', type=int, default=8, help='lanes 模式的在途请求上限')
+    parser.add_argument('--reserved', type=int, default=2, help='lanes 模式留给交互通道的槽位')
+    parser.add_argument('-d', '--duration', type=float, default=6.0, help='每种模式的持续秒数')
+    args = parser.parse_args(argv)
+
+    stub = HaloStub(latency=args.latency).start()
+    try:
+        stub.seed(posts=100, tags=10, categories=6, moments=0, content_size=2000)
+        stub.workers = args.site_workers
+        modes = {
+            'idle': (0, lambda: None),
+            'off': (args.batch, lambda: None),
+            'lanes': (args.batch, lambda: LaneScheduler(args.slots, args.reserved)),
+        }
+        print(f"替身 {args.site_workers} 个工作线程、每个请求 {args.latency * 1000:.0f}ms，"
+              f"{args.batch} 个批量线程，lanes 为 {args.slots} 个槽位（交互预留 {args.reserved} 个）")
+        print(f"{'模式':<8}{'交互 p50(ms)':>14}{'交互 p99(ms)':>14}{'样本':>8}{'批量/秒':>10}{'交互排队':>10}")
+        for mode, (batch_threads, make) in modes.items():
+            result = run(stub, make(), batch_threads, args.duration, 100)
+            print(f"{mode:<8}{result['p50_ms']:>14.1f}{result['p99_ms']:>14.1f}{result['samples']:>8}"
+                  f"{result['batch_per_second']:>10.1f}{result['interactive_waits']:>10}")
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
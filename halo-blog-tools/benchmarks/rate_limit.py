@@ -0,0 +1,115 @@
+"""
+客户端限流基准
+
+替身按 ``--capacity`` 模拟一个每秒只能处理固定请求数的小站点，超出时返回 429 和
+``Retry-After``。多个线程在 ``--duration`` 秒内持续读取文章，对比：
+
+- off：不限流（原先的做法），429 直接返回给调用方
+- adaptive：不设固定上限，收到 429 后按 Retry-After 暂停并进入 AIMD 限流
+- fixed：速率上限设为 ``--limit``（默认为站点能力的 1.5 倍），收到 429 时同样降速
+
+输出调用方拿到的成功/失败数、成功吞吐、站点返回 429 的次数以及成功请求的 p95 延迟。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.rate_limit
+    python -m benchmarks.rate_limit --capacity 50 -w 32 -d 10
+"""
+
+from typing import Any, Optional
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.harness import PLUGIN_ROOT  # noqa: F401  保证 utils 可导入
+from benchmarks.halo_stub import HaloStub
+
+from utils.halo_client import create_session
+from utils.rate_limit import RateLimiter
+
+POSTS_PATH = '/apis/content.halo.run/v1alpha1/posts'
+
+
+def run(stub: HaloStub, limiter: Optional[RateLimiter], workers: int, duration: float,
+        posts: int) -> dict[str, Any]:
+    session = create_session(stub.credentials()['access_token'])
+    session.limiter = limiter
+    # 每个请求都要真正到达替身
+    session.coalesce_reads = False
+    stub.stats.reset()
+    deadline = time.monotonic() + duration
+    latencies: list[float] = []
+    failed = [0]
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        i = index
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = session.get(f"{stub.base_url}{POSTS_PATH}/post-{i % posts:05d}", timeout=30)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    failed[0] += 1
+            i += workers
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+    session.close()
+
+    stats = stub.stats.snapshot()
+    return {
+        'ok': len(latencies),
+        'failed': failed[0],
+        'ok_per_second': len(latencies) / wall,
+        'throttled': stats['throttled'],
+        'p95_ms': statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 20 else 0.0,
+        'rate': limiter.rate if limiter else None,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacity', type=float, default=50, help='替身每秒能处理的请求数')
+    parser.add_argument('--limit', type=float, default=None, help='fixed 模式的速率上限，默认为 capacity 的 1.5 倍')
+    parser.add_argument('-w', '--workers', type=int, default=32)
+    parser.add_argument('-d', '--duration', type=float, default=8.0, help='每种模式的持续秒数')
+    args = parser.parse_args(argv)
+    limit = args.limit or args.capacity * 1.5
+
+    stub = HaloStub().start()
+    try:
+        stub.seed(posts=100, tags=10, categories=6, moments=0, content_size=2000)
+        stub.capacity = args.capacity
+        modes = {
+            'off': lambda: None,
+            'adaptive': lambda: RateLimiter(stub.base_url),
+            'fixed': lambda: RateLimiter(stub.base_url, limit),
+        }
+
+        print(f"站点能力 {args.capacity:g} 次/秒，{args.workers} 个线程，每种模式 {args.duration:g} 秒，"
+              f"fixed 上限 {limit:g} 次/秒")
+        print(f"{'模式':<10}{'成功':>8}{'失败':>8}{'成功/秒':>10}{'站点 429':>10}{'p95(ms)':>10}{'结束速率':>10}")
+        for mode, make in modes.items():
+            # 每种模式之间让替身的令牌桶回满
+            time.sleep(1.0)
+            result = run(stub, make(), args.workers, args.duration, 100)
+            rate = f"{result['rate']:.1f}" if result['rate'] is not None else '-'
+            print(f"{mode:<10}{result['ok']:>8}{result['failed']:>8}{result['ok_per_second']:>10.1f}"
+                  f"{result['throttled']:>10}{result['p95_ms']:>10.0f}{rate:>10}")
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
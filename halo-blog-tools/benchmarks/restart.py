@@ -0,0 +1,81 @@
+"""
+重启后首次调用基准
+
+模拟插件重新部署：每一轮都在全新的子进程中对同一个 Halo 替身依次执行一组工具调用，
+统计这组调用发出的请求数和耗时。开启持久化缓存时，第一轮写入缓存文件，之后的轮次
+应直接从磁盘恢复用户、能力表和标签/分类索引；关闭时每一轮都要重新查询。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.restart -n 3
+    python -m benchmarks.restart --latency-ms 20
+"""
+
+from typing import Any, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.harness import PLUGIN_ROOT, seeded_stub
+
+# 子进程中执行的调用：发布文章需要用户、标签、分类和能力表，按分类筛选需要分类树
+_CALLS = [
+    ('halo-post-create', {'title': '重启基准', 'content': '正文', 'tags': '标签1', 'categories': '分类1'}),
+    ('halo-post-list', {'page': 0, 'size': 10, 'category': '分类1'}),
+    ('halo-moment-create', {'content': '重启基准动态'}),
+]
+
+_CHILD_SCRIPT = """
+import json, sys, time
+from benchmarks.harness import invoke, load_all_tools
+credentials, calls = json.loads(sys.argv[1])
+load_all_tools([name for name, _ in calls])
+started = time.perf_counter()
+failed = [name for name, params in calls if not invoke(name, credentials, params).ok]
+print('__restart__', json.dumps({'elapsed_ms': (time.perf_counter() - started) * 1000, 'failed': failed}))
+"""
+
+
+def run_round(stub, env: dict[str, str]) -> dict[str, Any]:
+    stub.stats.reset()
+    completed = subprocess.run(
+        [sys.executable, '-c', _CHILD_SCRIPT, json.dumps([stub.credentials(), _CALLS])],
+        cwd=PLUGIN_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    line = next(line for line in completed.stdout.splitlines() if line.startswith('__restart__'))
+    result = json.loads(line.split(' ', 1)[1])
+    result['requests'] = stub.stats.snapshot()['requests']
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--rounds', type=int, default=3, help='每种配置重启的轮数')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='替身为每个请求注入的延迟')
+    args = parser.parse_args(argv)
+
+    stub = seeded_stub(latency=args.latency_ms / 1000)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            configs = {
+                '关闭持久化缓存': {'HALO_DISK_CACHE': 'false'},
+                '开启持久化缓存': {'HALO_DISK_CACHE': 'true',
+                                   'HALO_DISK_CACHE_PATH': os.path.join(tmp, 'cache.sqlite3')},
+            }
+            for label, overrides in configs.items():
+                env = dict(os.environ, HALO_WARMUP='false', **overrides)
+                print(label)
+                for i in range(args.rounds):
+                    result = run_round(stub, env)
+                    failed = f"，失败: {', '.join(result['failed'])}" if result['failed'] else ''
+                    print(f"  第{i + 1}轮：{result['requests']:>3} 个请求，{result['elapsed_ms']:8.1f} ms{failed}")
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
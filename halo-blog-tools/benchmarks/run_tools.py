@@ -0,0 +1,186 @@
+"""
+端到端工具基准测试
+
+对本地 Halo 替身逐个执行每个工具的 ``_invoke``，统计延迟、请求数、收发字节数
+和峰值内存，并与 ``benchmarks/baseline.json`` 对比以发现回归。
+
+用法（在 halo-blog-tools 目录下）::
+
+    python -m benchmarks.run_tools                    # 运行并与基线对比
+    python -m benchmarks.run_tools --update-baseline  # 运行并覆盖基线
+    python -m benchmarks.run_tools --tools halo-post-get,halo-post-list -n 20
+"""
+
+from typing import Any, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import PLUGIN_ROOT, SCENARIOS, invoke, load_all_tools, seeded_stub
+
+BASELINE_PATH = os.path.join(PLUGIN_ROOT, 'benchmarks', 'baseline.json')
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_tool(stub, name: str, iterations: int) -> dict[str, Any]:
+    """对单个工具执行多次调用并汇总"""
+    credentials = stub.credentials()
+
+    latencies, requests_made, bytes_in, bytes_out = [], [], [], []
+    failures, last_error = 0, None
+    for _ in range(iterations):
+        parameters = SCENARIOS[name](stub)
+        stub.stats.reset()
+        result = invoke(name, credentials, parameters)
+        stats = stub.stats.snapshot()
+        latencies.append(result.elapsed * 1000)
+        requests_made.append(stats['requests'])
+        bytes_in.append(stats['bytes_in'])
+        bytes_out.append(stats['bytes_out'])
+        if not result.ok:
+            failures += 1
+            last_error = result.error or next((t for t in result.texts if t.startswith('❌')), None)
+
+    # 单独跑一次测峰值内存，避免 tracemalloc 的开销计入延迟
+    parameters = SCENARIOS[name](stub)
+    tracemalloc.start()
+    invoke(name, credentials, parameters)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ok': failures == 0,
+        'failures': failures,
+        'last_error': last_error,
+        'latency_ms': {
+            'min': round(min(latencies), 3),
+            'median': round(statistics.median(latencies), 3),
+            'p95': round(_percentile(latencies, 0.95), 3),
+            'max': round(max(latencies), 3),
+        },
+        'requests': int(statistics.median(requests_made)),
+        'bytes_in': int(statistics.median(bytes_in)),
+        'bytes_out': int(statistics.median(bytes_out)),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(tools: list[str], iterations: int) -> dict[str, Any]:
+    load_all_tools(tools)
+    stub = seeded_stub()
+    try:
+        results = {name: bench_tool(stub, name, iterations) for name in tools}
+    finally:
+        stub.stop()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': iterations,
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'tools': results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    与基线对比
+
+    请求数与失败状态是确定性的，只要变差即视为回归；字节数允许 10% 浮动；
+    延迟中位数允许 ``tolerance`` 倍加 5ms 的浮动，以吸收机器差异。
+    没有基线记录的工具同样视为回归，避免新工具一直不受检查。
+    """
+    regressions = []
+    for name, now in current['tools'].items():
+        before = baseline.get('tools', {}).get(name)
+        if not before:
+            regressions.append(f"{name}: 没有基线记录，请运行 --update-baseline 补录")
+            continue
+        if before['ok'] and not now['ok']:
+            regressions.append(f"{name}: 调用开始失败 ({now['last_error']})")
+        if now['requests'] > before['requests']:
+            regressions.append(f"{name}: 请求数 {before['requests']} -> {now['requests']}")
+        if now['bytes_out'] > before['bytes_out'] * 1.1 + 1024:
+            regressions.append(f"{name}: 响应字节 {before['bytes_out']} -> {now['bytes_out']}")
+        limit = before['latency_ms']['median'] * tolerance + 5
+        if now['latency_ms']['median'] > limit:
+            regressions.append(
+                f"{name}: 延迟中位数 {before['latency_ms']['median']}ms -> {now['latency_ms']['median']}ms"
+            )
+    return regressions
+
+
+def print_table(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    header = f"{'tool':<26}{'ok':>4}{'median ms':>12}{'p95 ms':>10}{'reqs':>6}{'bytes out':>12}{'peak KB':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, row in report['tools'].items():
+        line = (f"{name:<26}{'✓' if row['ok'] else '✗':>4}{row['latency_ms']['median']:>12.1f}"
+                f"{row['latency_ms']['p95']:>10.1f}{row['requests']:>6}{row['bytes_out']:>12}"
+                f"{row['peak_memory_kb']:>10.1f}")
+        before = (baseline or {}).get('tools', {}).get(name)
+        if before:
+            line += f"   (基线 {before['latency_ms']['median']:.1f}ms / {before['requests']} reqs)"
+        print(line)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--iterations', type=int, default=5)
+    parser.add_argument('--tools', default='', help='逗号分隔的工具名，默认全部')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--output', default='', help='将本次结果另存为 JSON')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='延迟中位数允许的倍数')
+    args = parser.parse_args(argv)
+
+    tools = [t.strip() for t in args.tools.split(',') if t.strip()] or list(SCENARIOS)
+    unknown = [t for t in tools if t not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知工具: {', '.join(unknown)}")
+
+    report = run(tools, args.iterations)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_table(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        merged = {'meta': report['meta'], 'tools': {**(baseline or {}).get('tools', {}), **report['tools']}}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n基线已写入 {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n发现回归：")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n未发现回归")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
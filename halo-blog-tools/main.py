@@ -38,6 +38,16 @@ def create_plugin() -> Plugin:
         
         plugin = Plugin(DifyPluginEnv())
         logger.info("Halo Blog Tools plugin initialized successfully")
+
+        # 配置了 Halo 连接信息时在后台预热连接和缓存，不阻塞启动
+        halo_base_url = os.getenv('HALO_BASE_URL')
+        halo_access_token = os.getenv('HALO_ACCESS_TOKEN')
+        if halo_base_url and halo_access_token:
+            from utils.warmup import start_warmup, warmup_enabled
+            if warmup_enabled():
+                start_warmup(halo_base_url, halo_access_token)
+                logger.info(f"Halo warm-up started for {halo_base_url}")
+
         return plugin
         
     except Exception as e:
@@ -1,10 +1,13 @@
 from typing import Any
 import logging
-import requests
 
 from dify_plugin import ToolProvider
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.credentials import validate_credentials
+from utils.rate_limit import limiter_for, parse_rate
+from utils.warmup import start_warmup, warmup_enabled
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,61 +42,27 @@ class HaloBlogToolsProvider(ToolProvider):
             if not (base_url.startswith('http://') or base_url.startswith('https://')):
                 raise ToolProviderCredentialValidationError("Halo CMS URL 必须以 http:// 或 https:// 开头")
             
-            # 创建会话并设置认证头
-            session = requests.Session()
-            session.headers.update({
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
-            
-            # 尝试访问文章API来验证认证
-            test_endpoints = [
-                '/apis/content.halo.run/v1alpha1/posts?page=0&size=1',
-                '/apis/content.halo.run/v1alpha1/categories?page=0&size=1'
-            ]
-            
-            verification_passed = False
-            last_error = None
+            # 验证速率上限（可选）
+            try:
+                parse_rate(credentials.get('rate_limit'))
+            except (TypeError, ValueError):
+                raise ToolProviderCredentialValidationError("请求速率上限必须是不小于 0 的数字")
             
-            for endpoint in test_endpoints:
-                try:
-                    response = session.get(f"{base_url}{endpoint}", timeout=15)
-                    
-                    if response.status_code == 401:
-                        raise ToolProviderCredentialValidationError(
-                            "访问令牌无效或已过期，请检查令牌是否正确"
-                        )
-                    elif response.status_code == 403:
-                        raise ToolProviderCredentialValidationError(
-                            "访问令牌权限不足，请确保令牌具有 'post:manage' 和 'moment:manage' 权限"
-                        )
-                    elif response.status_code == 404:
-                        # 404可能表示Halo版本不兼容或API路径错误
-                        last_error = f"API端点不存在 ({response.status_code})"
-                        continue
-                    elif response.status_code in [200]:
-                        # 成功访问API
-                        verification_passed = True
-                        break
-                    else:
-                        last_error = f"API返回错误状态码: {response.status_code}"
-                        continue
-                        
-                except requests.exceptions.Timeout:
-                    last_error = "连接超时"
-                    continue
-                except requests.exceptions.ConnectionError:
-                    last_error = "无法连接到Halo CMS服务器"
-                    continue
-                except requests.exceptions.RequestException as e:
-                    last_error = f"网络请求失败: {str(e)}"
-                    continue
+            # 并发探测认证接口，成功结果按站点缓存
+            result = validate_credentials(base_url, access_token)
             
-            if not verification_passed:
-                if last_error:
+            if result.status == 'unauthorized':
+                raise ToolProviderCredentialValidationError(
+                    "访问令牌无效或已过期，请检查令牌是否正确"
+                )
+            elif result.status == 'forbidden':
+                raise ToolProviderCredentialValidationError(
+                    "访问令牌权限不足，请确保令牌具有 'post:manage' 和 'moment:manage' 权限"
+                )
+            elif not result.ok:
+                if result.message:
                     raise ToolProviderCredentialValidationError(
-                        f"验证失败: {last_error}。请检查URL是否正确以及服务器是否可访问"
+                        f"验证失败: {result.message}。请检查URL是否正确以及服务器是否可访问"
                     )
                 else:
                     raise ToolProviderCredentialValidationError(
@@ -101,6 +70,13 @@ class HaloBlogToolsProvider(ToolProvider):
                     )
             
             logger.info(f"Successfully validated Halo CMS credentials for {base_url}")
+
+            # 应用凭据中的速率上限，后台预热的请求同样受其约束
+            limiter_for(base_url, credentials.get('rate_limit', ''))
+
+            # 首次验证通过后在后台预取用户和标签/分类索引
+            if warmup_enabled():
+                start_warmup(base_url, access_token)
             
         except ToolProviderCredentialValidationError:
             # 重新抛出已知的验证错误
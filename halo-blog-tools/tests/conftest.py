@@ -0,0 +1,21 @@
+"""
+单元测试公共配置
+
+在 halo-blog-tools 目录下运行::
+
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PLUGIN_ROOT not in sys.path:
+    sys.path.insert(0, PLUGIN_ROOT)
+
+# 与 main.py 一致，先导入 dify_plugin（导入时会执行 gevent 的 monkey patch），再导入 utils；
+# 否则在此之前创建的 threading.local 不会按协程隔离
+try:
+    import dify_plugin  # noqa: F401
+except ImportError:
+    pass
@@ -0,0 +1,39 @@
+"""凭据验证缓存的单元测试"""
+
+import pytest
+
+from benchmarks.halo_stub import HaloStub
+from utils.credentials import validate_credentials
+from utils.halo_client import get_session
+
+POSTS_PATH = '/apis/content.halo.run/v1alpha1/posts'
+
+
+@pytest.fixture
+def stub():
+    stub = HaloStub().start()
+    stub.seed(posts=2, tags=1, categories=1, moments=0)
+    yield stub
+    stub.stop()
+
+
+def test_valid_verdict_is_cached(stub):
+    credentials = stub.credentials()
+    first = validate_credentials(credentials['base_url'], credentials['access_token'])
+    assert first.ok
+    stub.stats.reset()
+    assert validate_credentials(credentials['base_url'], credentials['access_token']) is first
+    assert stub.stats.snapshot()['requests'] == 0
+
+
+def test_unauthorized_response_drops_cached_verdict(stub):
+    credentials = stub.credentials()
+    base_url, token = credentials['base_url'], credentials['access_token']
+    assert validate_credentials(base_url, token).ok
+
+    # 令牌在站点上被吊销
+    stub.credentials = lambda: {'base_url': base_url, 'access_token': 'pat_rotated_token_0000'}
+    response = get_session(base_url, token).get(f"{base_url}{POSTS_PATH}", params={'page': 1}, timeout=5)
+    assert response.status_code == 401
+
+    assert validate_credentials(base_url, token).status == 'unauthorized'
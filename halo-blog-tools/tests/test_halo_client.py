@@ -0,0 +1,188 @@
+"""HaloSession 读请求合并（单飞）的单元测试"""
+
+from typing import Any, Callable
+import threading
+import time
+
+import pytest
+import requests
+
+from utils.halo_client import HaloResponse, HaloSession
+from utils.metrics import registry
+from utils.priority import LaneScheduler
+
+URL = 'https://halo.example.com/apis/content.halo.run/v1alpha1/posts/post-1'
+
+
+def _response(payload: bytes = b'{"metadata": {"name": "post-1"}, "tags": ["a"]}') -> HaloResponse:
+    response = HaloResponse()
+    response.status_code = 200
+    response._content = payload
+    response._content_consumed = True
+    response.headers['Content-Type'] = 'application/json'
+    response.url = URL
+    return response
+
+
+class _BlockingLeader:
+    """替换会话的 ``_request``：第一个请求阻塞到 ``release`` 后返回或抛出 ``outcome``"""
+
+    def __init__(self, outcome: Any):
+        self.outcome = outcome
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(self.outcome, BaseException):
+            raise self.outcome
+        return self.outcome
+
+
+def _session(leader: _BlockingLeader) -> HaloSession:
+    session = HaloSession()
+    session._request = leader
+    return session
+
+
+def _call_in_thread(func: Callable[[], Any]) -> tuple[threading.Thread, dict[str, Any]]:
+    outcome: dict[str, Any] = {}
+
+    def run() -> None:
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def _wait_for_followers(count: int) -> None:
+    """等到 ``count`` 个调用方都已合并到在途请求上"""
+    deadline = time.monotonic() + 5
+    while sum(registry.to_dict()['coalesced'].values()) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_followers_share_one_request():
+    leader = _BlockingLeader(_response())
+    session = _session(leader)
+    threads = [_call_in_thread(lambda: session.get(URL, timeout=5)) for _ in range(4)]
+    _wait_for_followers(3)
+    leader.release.set()
+    for thread, _ in threads:
+        thread.join(5)
+
+    assert leader.calls == 1
+    assert all(outcome['result'].json()['metadata']['name'] == 'post-1' for _, outcome in threads)
+    assert not session._flights
+
+
+def test_leader_error_propagates_to_followers():
+    error = requests.exceptions.ConnectionError('connection reset')
+    leader = _BlockingLeader(error)
+    session = _session(leader)
+    threads = [_call_in_thread(lambda: session.get(URL, timeout=5)) for _ in range(3)]
+    _wait_for_followers(2)
+    leader.release.set()
+    for thread, _ in threads:
+        thread.join(5)
+
+    assert leader.calls == 1
+    assert all(outcome.get('error') is error for _, outcome in threads)
+    # 失败的请求不留在在途表中，下一次调用重新发送
+    assert not session._flights
+    leader.outcome = _response()
+    assert session.get(URL, timeout=5).status_code == 200
+    assert leader.calls == 2
+
+
+def test_followers_get_isolated_responses():
+    leader = _BlockingLeader(_response())
+    session = _session(leader)
+    threads = [_call_in_thread(lambda: session.get(URL, timeout=5)) for _ in range(3)]
+    _wait_for_followers(2)
+    leader.release.set()
+    for thread, _ in threads:
+        thread.join(5)
+
+    responses = [outcome['result'] for _, outcome in threads]
+    assert len({id(response) for response in responses}) == 3
+
+    # 一个调用方修改解析结果和响应头，不影响其它调用方
+    first, second, third = responses
+    data = first.json()
+    data['metadata']['name'] = 'changed'
+    data['tags'].append('b')
+    first.headers['X-Changed'] = '1'
+    assert second.json() == {'metadata': {'name': 'post-1'}, 'tags': ['a']}
+    assert 'X-Changed' not in second.headers
+    assert 'X-Changed' not in third.headers
+    assert second.content is third.content
+
+
+def test_follower_honours_its_own_timeout():
+    leader = _BlockingLeader(_response())
+    session = _session(leader)
+    leader_thread, leader_outcome = _call_in_thread(lambda: session.get(URL, timeout=30))
+    leader.started.wait(5)
+
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        session.get(URL, timeout=(0.1, 0.1))
+    assert time.monotonic() - start < 2
+
+    leader.release.set()
+    leader_thread.join(5)
+    assert leader_outcome['result'].status_code == 200
+
+
+def test_requests_with_body_are_not_coalesced():
+    leader = _BlockingLeader(_response())
+    leader.release.set()
+    session = _session(leader)
+    session.get(URL, timeout=5, stream=True)
+    session.post(URL, json={'a': 1}, timeout=5)
+    assert leader.calls == 2
+
+
+def test_lane_slot_not_held_while_rate_limited():
+    """限流等待和 429 暂停期间不占用优先级通道的槽位"""
+    session = HaloSession()
+    session.lanes = LaneScheduler(2, 1)
+    statuses = [429, 200]
+    in_use_while_waiting = []
+
+    class _Limiter:
+        def acquire(self) -> float:
+            in_use_while_waiting.append(sum(session.lanes.to_dict()['in_use'].values()))
+            return 0.0
+
+        def throttle(self, retry_after: float) -> None:
+            in_use_while_waiting.append(sum(session.lanes.to_dict()['in_use'].values()))
+
+        def completed(self) -> None:
+            pass
+
+    def send(method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        response = _response()
+        response.status_code = statuses.pop(0)
+        return response
+
+    session.limiter = _Limiter()
+    session._send = send
+    assert session.get(URL, timeout=5).status_code == 200
+    assert in_use_while_waiting == [0, 0, 0]
+    assert session.lanes.to_dict()['in_use'] == {'interactive': 0, 'batch': 0}
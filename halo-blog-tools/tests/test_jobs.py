@@ -0,0 +1,112 @@
+"""后台任务的单元测试"""
+
+import threading
+import time
+
+import pytest
+
+from utils import jobs
+from utils.jobs import ACTIVE, CANCELLED, FAILED, INTERRUPTED, RUNNING, SUCCEEDED, JobManager, JobStore
+
+SITE = 'https://halo.example.com#token-a'
+OTHER_SITE = 'https://halo.example.com#token-b'
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = JobStore(':memory:')
+    monkeypatch.setattr(jobs, '_store', store)
+    monkeypatch.setattr(jobs, '_store_failed', False)
+    yield store
+    store.close()
+
+
+def _wait_for(manager: JobManager, job_id: str, site: str = SITE) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        record = manager.get(job_id, site)
+        if record['status'] not in ACTIVE:
+            return record
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _record(job_id: str, status: str, created_at: float, site: str = SITE, updated_at: float = None) -> dict:
+    return {'job_id': job_id, 'site': site, 'status': status, 'created_at': created_at,
+            'updated_at': updated_at if updated_at is not None else created_at}
+
+
+def test_job_runs_and_is_isolated_per_site(store):
+    manager = JobManager()
+
+    def work(job):
+        job.update(done=1, total=2, message='第一条')
+        job.update(done=2)
+        return {'succeeded': 2}
+
+    job = manager.submit('halo-moment-batch-create', SITE, work, total=2)
+    record = _wait_for(manager, job.id)
+
+    assert record['status'] == SUCCEEDED
+    assert record['result'] == {'succeeded': 2}
+    assert record['progress'] == 1.0
+    assert manager.get(job.id, OTHER_SITE) is None
+    assert manager.cancel(job.id, OTHER_SITE) is None
+    assert [r['job_id'] for r in manager.list(SITE)] == [job.id]
+    assert manager.list(OTHER_SITE) == []
+    # 结束状态已写入存储，重启后的进程仍可查询
+    assert store.load(job.id)['status'] == SUCCEEDED
+
+
+def test_failed_job_records_error(store):
+    manager = JobManager()
+
+    def work(job):
+        raise RuntimeError('站点不可用')
+
+    record = _wait_for(manager, manager.submit('halo-post-migrate-content', SITE, work).id)
+    assert record['status'] == FAILED
+    assert record['error'] == '站点不可用'
+
+
+def test_cancel_is_cooperative(store):
+    manager = JobManager()
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while not job.cancelled:
+            time.sleep(0.01)
+        return {'succeeded': 0}
+
+    job = manager.submit('halo-moment-batch-create', SITE, work)
+    started.wait(5)
+    assert manager.get(job.id, SITE)['status'] == RUNNING
+    assert manager.cancel(job.id, SITE) is job
+    assert _wait_for(manager, job.id)['status'] == CANCELLED
+
+
+def test_persisted_running_job_becomes_interrupted(store):
+    now = time.time()
+    store.save(_record('job-old', RUNNING, now - 600, updated_at=now - jobs.STALE_SECONDS - 1))
+    store.save(_record('job-live', RUNNING, now - 10, updated_at=now - 1))
+
+    manager = JobManager()
+    assert manager.get('job-old', SITE)['status'] == INTERRUPTED
+    assert manager.get('job-live', SITE)['status'] == RUNNING
+    assert manager.get('job-old', OTHER_SITE) is None
+    assert [r['job_id'] for r in manager.list(SITE)] == ['job-live', 'job-old']
+
+
+def test_prune_keeps_active_and_recent_jobs(store):
+    now = time.time()
+    for i in range(5):
+        store.save(_record(f'job-done-{i}', SUCCEEDED, now - 100 + i))
+    store.save(_record('job-running', RUNNING, now - 200))
+    store.save(_record('job-expired', SUCCEEDED, now - jobs.JOB_TTL - 10))
+    store.save(_record('job-other', SUCCEEDED, now - 300, site=OTHER_SITE))
+
+    store.prune(SITE, 3)
+
+    assert store.recent(SITE, 10) == ['job-done-4', 'job-done-3', 'job-done-2', 'job-running']
+    assert store.recent(OTHER_SITE, 10) == ['job-other']
@@ -0,0 +1,80 @@
+"""列表响应流式解码的单元测试"""
+
+import io
+import json
+
+import pytest
+import requests
+
+from utils import json_stream
+from utils.json_stream import HEAVY_ANNOTATIONS, decode_list
+
+HEAVY = HEAVY_ANNOTATIONS[0]
+
+PAGE = {
+    'page': 1,
+    'size': 3,
+    'total': 12345,
+    'items': [
+        {'metadata': {'name': f'post-{i}', 'annotations': {HEAVY: '正文' * 50, 'other': 'x'}},
+         'spec': {'title': f'标题 {i}', 'priority': 1.5 * i, 'tags': ['a', 'b'], 'pinned': False}}
+        for i in range(3)
+    ],
+    'hasNext': True,
+    'totalPages': 4115,
+}
+
+
+def _response(payload: bytes, stream: bool) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    if stream:
+        response.raw = io.BytesIO(payload)
+    else:
+        response._content = payload
+        response._content_consumed = True
+    return response
+
+
+@pytest.fixture(params=[False, True], ids=['buffered', 'stream'])
+def stream(request, monkeypatch):
+    # 很小的块让数字、字符串和多字节字符都落在块边界上
+    monkeypatch.setattr(json_stream, 'CHUNK_SIZE', 7)
+    return request.param
+
+
+def _expected(measure: bool = False) -> dict:
+    expected = json.loads(json.dumps(PAGE))
+    for item in expected['items']:
+        annotations = item['metadata']['annotations']
+        if measure:
+            annotations[HEAVY] = len(annotations[HEAVY])
+        else:
+            del annotations[HEAVY]
+    return expected
+
+
+def test_decode_matches_json_without_heavy_annotations(stream):
+    payload = json.dumps(PAGE, ensure_ascii=False, indent=1).encode('utf-8')
+    assert decode_list(_response(payload, stream)) == _expected()
+
+
+def test_measure_heavy_keeps_sizes(stream):
+    payload = json.dumps(PAGE, ensure_ascii=False).encode('utf-8')
+    assert decode_list(_response(payload, stream), measure_heavy=True) == _expected(measure=True)
+
+
+def test_project_and_empty_list(stream):
+    payload = json.dumps(PAGE).encode('utf-8')
+    data = decode_list(_response(payload, stream), lambda item: item['metadata']['name'])
+    assert data['items'] == ['post-0', 'post-1', 'post-2']
+    assert data['total'] == 12345
+
+    empty = decode_list(_response(b'{"items": [], "total": 0}', stream))
+    assert empty == {'items': [], 'total': 0}
+    assert decode_list(_response(b'{}', stream)) == {}
+
+
+def test_malformed_body_raises(stream):
+    with pytest.raises(ValueError):
+        decode_list(_response(b'{"items": [{"a": 1}', stream))
@@ -0,0 +1,47 @@
+"""数据模型解码的单元测试"""
+
+from utils.models import Moment
+
+MOMENT = {
+    'metadata': {'name': 'moment-1', 'creationTimestamp': '2024-05-01T08:00:00Z'},
+    'spec': {
+        'content': {
+            'raw': '今天天气不错',
+            'html': '<p>今天天气不错</p>',
+            'medium': [{'type': 'PHOTO', 'url': 'https://example.com/a.png', 'originType': 'image/png'}],
+        },
+        'tags': ['生活'],
+        'owner': 'admin',
+        'visible': 'PUBLIC',
+        'releaseTime': '2024-05-01T08:00:00Z',
+    },
+    'status': {'permalink': '/moments/moment-1', 'commentCount': 2},
+}
+
+
+def test_moment_from_extension_item():
+    moment = Moment.from_json(MOMENT)
+    assert moment.name == 'moment-1'
+    assert moment.content == '今天天气不错'
+    assert moment.media == [{'type': 'PHOTO', 'url': 'https://example.com/a.png', 'origin_type': 'image/png'}]
+    assert moment.owner == 'admin'
+    assert moment.owner_display_name == ''
+    assert moment.comment_count == 2
+
+
+def test_moment_from_listed_moment():
+    moment = Moment.from_json({'moment': MOMENT, 'owner': {'name': 'admin', 'displayName': '管理员'}})
+    assert moment.name == 'moment-1'
+    assert moment.tags == ['生活']
+    assert moment.owner_display_name == '管理员'
+
+
+def test_listed_moment_without_owner():
+    """作者已被删除时 Console 接口返回的 owner 为空，正文等字段仍来自内层的 moment"""
+    for item in ({'moment': MOMENT, 'owner': None}, {'moment': MOMENT}):
+        moment = Moment.from_json(item)
+        assert moment.name == 'moment-1'
+        assert moment.content == '今天天气不错'
+        assert moment.release_time == '2024-05-01T08:00:00Z'
+        assert moment.owner == 'admin'
+        assert moment.owner_display_name == ''
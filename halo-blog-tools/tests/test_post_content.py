@@ -0,0 +1,107 @@
+"""精简文章写入（正文只存快照）的单元测试"""
+
+import json
+
+import pytest
+
+from benchmarks import harness
+from benchmarks.halo_stub import HaloStub
+from utils.halo_client import get_session
+from utils.post_content import (CONTENT_JSON_ANNOTATION, apply_content_annotation, fetch_post_content,
+                                keep_content_annotation)
+
+CONTENT = {'rawType': 'markdown', 'raw': '# 正文', 'content': '# 正文'}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.delenv('HALO_LEAN_POSTS', raising=False)
+    stub = HaloStub().start()
+    stub.seed(posts=2, tags=2, categories=2, moments=0)
+    yield stub
+    stub.stop()
+
+
+def _session(stub: HaloStub):
+    credentials = stub.credentials()
+    return get_session(credentials['base_url'], credentials['access_token']), credentials['base_url']
+
+
+def _fail_snapshots(stub: HaloStub, monkeypatch, also_posts: bool = False) -> None:
+    """快照创建返回 409；``also_posts`` 时文章的后续 PUT 也失败"""
+    add = stub.add
+
+    def failing_add(kind, obj):
+        if kind == 'Snapshot':
+            raise KeyError(kind)
+        return add(kind, obj)
+
+    monkeypatch.setattr(stub, 'add', failing_add)
+    if also_posts:
+        get = stub.get
+        created = set(stub._store['Post'])
+        # 新建的文章创建后不可再读取，注解无法写回
+        monkeypatch.setattr(stub, 'get', lambda kind, name: None if kind == 'Post' and name not in created
+                            else get(kind, name))
+
+
+def test_apply_content_annotation(monkeypatch):
+    annotations = {CONTENT_JSON_ANNOTATION: '{}', 'other': 'x'}
+    apply_content_annotation(annotations, CONTENT)
+    assert annotations == {'other': 'x'}
+
+    monkeypatch.setenv('HALO_LEAN_POSTS', 'false')
+    apply_content_annotation(annotations, CONTENT)
+    assert json.loads(annotations[CONTENT_JSON_ANNOTATION]) == CONTENT
+
+
+def test_keep_content_annotation_writes_back(stub):
+    session, base_url = _session(stub)
+    name = stub.items('Post')[0]['metadata']['name']
+
+    assert keep_content_annotation(session, base_url, name, CONTENT)
+    annotations = stub.get('Post', name)['metadata']['annotations']
+    assert json.loads(annotations[CONTENT_JSON_ANNOTATION]) == CONTENT
+    assert annotations['content.halo.run/preferred-editor']
+
+
+def test_keep_content_annotation_is_noop_without_lean_mode(stub, monkeypatch):
+    monkeypatch.setenv('HALO_LEAN_POSTS', 'false')
+    session, base_url = _session(stub)
+    stub.stats.reset()
+    assert keep_content_annotation(session, base_url, 'missing', CONTENT)
+    assert stub.stats.snapshot()['requests'] == 0
+
+
+def test_fetch_post_content_falls_back_to_annotation(stub):
+    session, base_url = _session(stub)
+    post = {'metadata': {'name': 'missing', 'annotations': {CONTENT_JSON_ANNOTATION: json.dumps(CONTENT)}}}
+    assert fetch_post_content(session, base_url, post) == CONTENT
+
+
+def test_create_keeps_annotation_when_snapshot_fails(stub, monkeypatch):
+    _fail_snapshots(stub, monkeypatch)
+    result = harness.invoke('halo-post-create', stub.credentials(), {'title': '快照失败', 'content': '# 正文'})
+
+    assert result.ok and result.jsons[-1]['success']
+    post = stub.get('Post', result.jsons[-1]['post_id'])
+    assert json.loads(post['metadata']['annotations'][CONTENT_JSON_ANNOTATION])['raw'] == '# 正文'
+
+
+def test_create_fails_when_content_is_stored_nowhere(stub, monkeypatch):
+    _fail_snapshots(stub, monkeypatch, also_posts=True)
+    result = harness.invoke('halo-post-create', stub.credentials(), {'title': '无处保存', 'content': '# 正文'})
+
+    assert not result.jsons
+    assert result.texts[-1].startswith('❌')
+
+
+def test_update_keeps_annotation_when_snapshot_fails(stub, monkeypatch):
+    name = stub.items('Post')[0]['metadata']['name']
+    _fail_snapshots(stub, monkeypatch)
+    result = harness.invoke('halo-post-update', stub.credentials(), {'post_id': name, 'content': '# 新正文'})
+
+    assert result.ok and result.jsons[-1]['success']
+    assert result.jsons[-1]['content_update_success'] is False
+    annotations = stub.get('Post', name)['metadata']['annotations']
+    assert json.loads(annotations[CONTENT_JSON_ANNOTATION])['raw'] == '# 新正文'
@@ -0,0 +1,81 @@
+"""请求优先级通道的单元测试"""
+
+import threading
+import time
+
+import pytest
+
+from utils.priority import BATCH, INTERACTIVE, LaneScheduler, current_priority, priority
+
+
+def _wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def test_priority_context_is_per_thread_and_nested():
+    seen = []
+    with priority(BATCH):
+        with priority(INTERACTIVE):
+            assert current_priority() == INTERACTIVE
+        assert current_priority() == BATCH
+        thread = threading.Thread(target=lambda: seen.append(current_priority()))
+        thread.start()
+        thread.join(5)
+    assert current_priority() == INTERACTIVE
+    assert seen == [INTERACTIVE]
+
+    with pytest.raises(ValueError):
+        with priority('urgent'):
+            pass
+
+
+def test_batch_cannot_take_reserved_slots():
+    lanes = LaneScheduler(3, reserved=2)
+    assert lanes.acquire(BATCH) == 0.0
+
+    # 其余两个槽位只留给交互通道
+    thread = threading.Thread(target=lanes.acquire, args=(BATCH,))
+    thread.start()
+    _wait_until(lambda: lanes.to_dict()['waiting'][BATCH] == 1)
+    assert lanes.acquire(INTERACTIVE) == 0.0
+    assert lanes.acquire(INTERACTIVE) == 0.0
+
+    lanes.release(BATCH)
+    thread.join(5)
+    assert lanes.to_dict()['in_use'] == {INTERACTIVE: 2, BATCH: 1}
+
+
+def test_weighted_dispatch_lets_batch_through():
+    lanes = LaneScheduler(2, reserved=1)
+    lanes.acquire(INTERACTIVE)
+    lanes.acquire(INTERACTIVE)
+
+    granted = []
+    lock = threading.Lock()
+
+    def worker(lane: str) -> None:
+        lanes.acquire(lane)
+        with lock:
+            granted.append(lane)
+
+    threads = [threading.Thread(target=worker, args=(INTERACTIVE,)) for _ in range(6)]
+    threads += [threading.Thread(target=worker, args=(BATCH,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: lanes.to_dict()['waiting'] == {INTERACTIVE: 6, BATCH: 2})
+
+    # 每次空出一个槽位（释放最近放行的那个通道），记录放行顺序
+    last = INTERACTIVE
+    for count in range(1, 9):
+        lanes.release(last)
+        _wait_until(lambda: len(granted) == count)
+        last = granted[-1]
+    for thread in threads:
+        thread.join(5)
+
+    # 开头已连续放行两个交互请求，再放行两个之后轮到批量请求
+    assert granted == [INTERACTIVE, INTERACTIVE, BATCH, INTERACTIVE, INTERACTIVE, INTERACTIVE, INTERACTIVE, BATCH]
+    assert lanes.to_dict()['waiting'] == {INTERACTIVE: 0, BATCH: 0}
@@ -0,0 +1,59 @@
+"""站点令牌桶的单元测试"""
+
+import threading
+import time
+
+from utils import rate_limit
+from utils.metrics import registry, site_label
+from utils.rate_limit import RateLimiter, parse_retry_after
+
+
+def _acquire_all(limiter: RateLimiter, count: int) -> None:
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+
+def test_waiters_keep_their_reservation_across_a_pause(monkeypatch):
+    """暂停期间排队的请求醒来时即使略早于暂停结束，也不会再预占一个令牌"""
+    real_sleep = time.sleep
+    # 定时器提前醒来（gevent 等环境中常见）
+    monkeypatch.setattr(rate_limit.time, 'sleep', lambda seconds: real_sleep(seconds * 0.8))
+    limiter = RateLimiter('https://halo.example.com', limit=50, burst=1)
+    limiter.throttle(0.2)
+
+    _acquire_all(limiter, 5)
+
+    # 暂停清空了令牌，5 个请求各占一个
+    assert limiter._tokens == -5
+
+
+def test_pause_during_wait_requeues_once():
+    """等待期间又收到 429，原来的预占被清空，醒来后重新排队"""
+    limiter = RateLimiter('https://halo.example.com', limit=10, burst=1)
+    limiter.acquire()
+    thread = threading.Thread(target=limiter.acquire)
+    thread.start()
+    time.sleep(0.02)
+    limiter.throttle(0.1)
+    thread.join(5)
+
+    assert limiter._tokens == -1
+    assert limiter.rate == 10 * rate_limit.DECREASE_FACTOR
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) == rate_limit.DEFAULT_RETRY_AFTER
+    assert parse_retry_after('soon') == rate_limit.DEFAULT_RETRY_AFTER
+    assert parse_retry_after('9999') == rate_limit.MAX_RETRY_AFTER
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:05 GMT', now=1445412480.0) == 5.0
+
+
+def test_rate_gauge_does_not_expose_site():
+    limiter = RateLimiter('https://private.example.com', limit=5)
+    assert limiter.rate == 5
+    assert 'private.example.com' not in registry.to_prometheus()
+    assert f"halo_rate_limit_rps{{site={site_label('https://private.example.com')}}}" in registry.to_dict()['gauges']
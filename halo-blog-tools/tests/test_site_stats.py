@@ -0,0 +1,62 @@
+"""站点统计快照的单元测试"""
+
+import copy
+
+import pytest
+
+from benchmarks import harness
+from benchmarks.halo_stub import HaloStub
+from utils.halo_client import get_session
+from utils.site_stats import cached_site_stats, get_site_stats, invalidate_site_stats
+
+POSTS_ROUTE = 'GET content.halo.run/posts'
+
+
+@pytest.fixture
+def stub():
+    stub = HaloStub().start()
+    stub.seed(posts=250, tags=3, categories=3, moments=0, content_size=20)
+    session = get_session(stub.credentials()['base_url'], stub.credentials()['access_token'])
+    invalidate_site_stats(session)
+    yield stub
+    invalidate_site_stats(session)
+    stub.stop()
+
+
+def _session(stub: HaloStub):
+    credentials = stub.credentials()
+    return get_session(credentials['base_url'], credentials['access_token']), credentials['base_url']
+
+
+def test_cached_site_stats_is_read_only(stub):
+    session, base_url = _session(stub)
+    assert cached_site_stats(session) is None
+
+    stats = get_site_stats(session, base_url)
+    stub.stats.reset()
+    cached = cached_site_stats(session)
+    assert cached == stats and cached['posts_total'] == 250
+    assert stub.stats.snapshot()['requests'] == 0
+
+    cached['posts_total'] = 0
+    assert cached_site_stats(session)['posts_total'] == 250
+
+    invalidate_site_stats(session)
+    assert cached_site_stats(session) is None
+
+
+def test_migrate_scan_sizes_pages_from_snapshot(stub):
+    session, base_url = _session(stub)
+    get_site_stats(session, base_url)
+    # 快照之后站点外新增的文章：按快照预估 3 页，其余按 hasNext 续读
+    template = stub.get('Post', 'post-00000')
+    for i in range(60):
+        post = copy.deepcopy(template)
+        post['metadata'] = {'name': f"post-extra-{i}", 'annotations': template['metadata']['annotations']}
+        stub.add('Post', post)
+
+    stub.stats.reset()
+    result = harness.invoke('halo-post-migrate-content', stub.credentials(), {'dry_run': True})
+
+    assert result.ok and result.jsons[-1]['total'] == 310
+    assert stub.stats.snapshot()['by_route'][POSTS_ROUTE] == 4
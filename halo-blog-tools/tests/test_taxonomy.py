@@ -0,0 +1,54 @@
+"""标签 / 分类索引持久化的单元测试"""
+
+import time
+
+import pytest
+
+from utils import disk_cache, taxonomy
+from utils.halo_client import HaloSession
+from utils.models import Tag
+from utils.taxonomy import TAXONOMY_TTL, TaxonomyIndex, cached_index, persist_index
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, '_disk_cache', disk_cache.DiskCache(str(tmp_path / 'cache.sqlite3')))
+    monkeypatch.setattr(disk_cache, '_disk_cache_failed', False)
+    session = HaloSession()
+    session.site_key = 'https://halo.example.com#test'
+    yield session
+    taxonomy._index_cache.invalidate()
+    disk_cache._disk_cache.close()
+
+
+def _persist(session: HaloSession, loaded_at: float) -> None:
+    persist_index(session, TaxonomyIndex('tags', [Tag('tag-1', 'Python')], loaded_at=loaded_at))
+
+
+def test_fresh_disk_copy_is_restored(session):
+    _persist(session, time.time() - 10)
+
+    index = cached_index(session, 'tags')
+    assert index is not None
+    assert index.find('Python').name == 'tag-1'
+    # 内存中只保留剩余的有效期
+    expires_at, _ = taxonomy._index_cache._data[(session.site_key, 'tags')]
+    assert expires_at - time.monotonic() <= TAXONOMY_TTL - 10
+
+
+def test_expired_disk_copy_is_not_restored(session):
+    # 写回新标签会刷新磁盘记录的过期时间，但 loaded_at 仍是首次拉取的时间
+    _persist(session, time.time() - TAXONOMY_TTL - 1)
+
+    assert cached_index(session, 'tags') is None
+
+
+def test_disk_copy_not_restored_after_memory_ttl(session, monkeypatch):
+    loaded_at = time.time()
+    _persist(session, loaded_at)
+    assert cached_index(session, 'tags') is not None
+
+    # 内存索引过期后，同一份磁盘副本不能再被恢复
+    taxonomy._index_cache.invalidate()
+    monkeypatch.setattr(taxonomy.time, 'time', lambda: loaded_at + TAXONOMY_TTL + 1)
+    assert cached_index(session, 'tags') is None
@@ -0,0 +1,34 @@
+"""启动预热状态的单元测试"""
+
+import pytest
+
+from utils import warmup
+from utils.halo_client import site_key
+from utils.metrics import registry, site_label
+from utils.warmup import WarmupState, warmup_state
+
+SITES = [('https://a.example.com', 'pat_a'), ('https://b.example.com', 'pat_b')]
+
+
+@pytest.fixture(autouse=True)
+def _states(monkeypatch):
+    monkeypatch.setattr(warmup, '_states', {})
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_state_and_gauge_do_not_expose_other_sites():
+    for base_url, token in SITES:
+        key = site_key(base_url, token)
+        state = warmup._states[key] = WarmupState(base_url, key)
+        state.finish()
+
+    own = warmup_state(site_key(*SITES[0]))
+    assert own['base_url'] == SITES[0][0] and own['ok']
+    assert warmup_state(site_key(SITES[0][0], 'pat_other')) is None
+
+    gauges = registry.to_dict()['gauges']
+    ready = {key: value for key, value in gauges.items() if key.startswith('halo_warmup_ready')}
+    assert ready == {f"halo_warmup_ready{{site={site_label(site_key(*site))}}}": 1 for site in SITES}
+    assert 'example.com' not in registry.to_prometheus()
@@ -1,46 +1,71 @@
 """
 Halo plugin tools.
+
+工具类按需加载：导入本包时不执行任何工具模块，首次访问某个工具类
+（例如 ``tools.HaloPostGetTool``）时才加载对应的文件。
 """
 
 import importlib.util
 import os
+import sys
+
+# 工具类名 -> 文件名（文件名带连字符，无法直接 import）
+_TOOL_MODULES = {
+    'HaloSetupTool': 'halo-setup',
+    'HaloPostCreateTool': 'halo-post-create',
+    'HaloPostGetTool': 'halo-post-get',
+    'HaloPostUpdateTool': 'halo-post-update',
+    'HaloPostDeleteTool': 'halo-post-delete',
+    'HaloPostListTool': 'halo-post-list',
+    'HaloPostMigrateContentTool': 'halo-post-migrate-content',
+    'HaloMomentCreateTool': 'halo-moment-create',
+    'HaloMomentBatchCreateTool': 'halo-moment-batch-create',
+    'HaloMomentListTool': 'halo-moment-list',
+    'HaloCategoriesListTool': 'halo-categories-list',
+    'HaloTagsListTool': 'halo-tags-list',
+    'HaloMetricsTool': 'halo-metrics',
+    'HaloJobStatusTool': 'halo-job-status',
+    'HaloJobCancelTool': 'halo-job-cancel',
+}
+
 
 # Dynamic import for modules with hyphens in filename
 def _import_tool(module_name, class_name):
     """Dynamically import a tool class from a module with hyphen in name."""
     try:
-        current_dir = os.path.dirname(__file__)
-        module_path = os.path.join(current_dir, f"{module_name}.py")
-        spec = importlib.util.spec_from_file_location(module_name.replace('-', '_'), module_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        # 与 Dify 加载工具时使用的模块名保持一致（tools.halo-post-get）
+        qualified_name = f"{__name__}.{module_name}"
+        module = sys.modules.get(qualified_name)
+        if module is None:
+            current_dir = os.path.dirname(__file__)
+            module_path = os.path.join(current_dir, f"{module_name}.py")
+            spec = importlib.util.spec_from_file_location(qualified_name, module_path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[qualified_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except Exception:
+                sys.modules.pop(qualified_name, None)
+                raise
         return getattr(module, class_name)
     except Exception as e:
         print(f"Error importing {class_name} from {module_name}: {e}")
         return None
 
-# Import all tool classes
-HaloSetupTool = _import_tool('halo-setup', 'HaloSetupTool')
-HaloPostCreateTool = _import_tool('halo-post-create', 'HaloPostCreateTool')
-HaloPostGetTool = _import_tool('halo-post-get', 'HaloPostGetTool')
-HaloPostUpdateTool = _import_tool('halo-post-update', 'HaloPostUpdateTool')
-HaloPostDeleteTool = _import_tool('halo-post-delete', 'HaloPostDeleteTool')
-HaloPostListTool = _import_tool('halo-post-list', 'HaloPostListTool')
-HaloMomentCreateTool = _import_tool('halo-moment-create', 'HaloMomentCreateTool')
-HaloMomentListTool = _import_tool('halo-moment-list', 'HaloMomentListTool')
-HaloCategoriesListTool = _import_tool('halo-categories-list', 'HaloCategoriesListTool')
-HaloTagsListTool = _import_tool('halo-tags-list', 'HaloTagsListTool')
+
+def __getattr__(name):
+    module_name = _TOOL_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    tool_class = _import_tool(module_name, name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = tool_class
+    return tool_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_TOOL_MODULES))
+
 
 # Export tool classes
-__all__ = [
-    'HaloSetupTool',
-    'HaloPostCreateTool',
-    'HaloPostGetTool',
-    'HaloPostUpdateTool',
-    'HaloPostDeleteTool',
-    'HaloPostListTool',
-    'HaloMomentCreateTool',
-    'HaloMomentListTool',
-    'HaloCategoriesListTool',
-    'HaloTagsListTool'
-] 
\ No newline at end of file
+__all__ = list(_TOOL_MODULES)
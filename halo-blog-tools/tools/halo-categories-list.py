@@ -4,6 +4,10 @@ from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.category_tree import get_category_tree
+from utils.halo_client import get_session
+from utils.models import Category
+
 
 class HaloCategoriesListTool(Tool):
     def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
@@ -31,16 +35,46 @@ class HaloCategoriesListTool(Tool):
             # 获取参数
             page = tool_parameters.get('page', 0)
             size = tool_parameters.get('size', 50)  # 分类通常数量不多，默认获取更多
-            keyword = tool_parameters.get('keyword', '').strip()
+            keyword = (tool_parameters.get('keyword') or '').strip()
+            output = tool_parameters.get('output') or 'list'
             
             # 构建API URL
             api_url = f"{base_url}/apis/content.halo.run/v1alpha1/categories"
             
-            # 准备请求头
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=self.runtime.credentials.get('rate_limit', ''))
+            
+            if output == 'tree':
+                # 树形输出：基于缓存的全站分类一次建树，不分页
+                try:
+                    tree = get_category_tree(session, base_url, refresh=bool(tool_parameters.get('refresh')))
+                except requests.exceptions.HTTPError as e:
+                    status_code = e.response.status_code if e.response is not None else None
+                    if status_code == 401:
+                        yield self.create_text_message('认证失败，请检查访问令牌是否正确')
+                    elif status_code == 403:
+                        yield self.create_text_message('权限不足，请检查访问令牌权限')
+                    else:
+                        yield self.create_text_message(f'API请求失败: {status_code}')
+                    return
+                
+                roots = tree.roots()
+                total_posts = sum(tree.aggregated_post_count(root) for root in roots)
+                depth = max((len(tree.ancestors(name)) + 1 for name in tree), default=0)
+                summary = f"成功获取分类树，共{len(tree)}个分类，{len(roots)}个顶级分类，最大深度{depth}层。"
+                
+                yield self.create_json_message({
+                    'success': True,
+                    'summary': summary,
+                    'tree': tree.to_tree(),
+                    'statistics': {
+                        'total_categories': len(tree),
+                        'root_categories': len(roots),
+                        'max_depth': depth,
+                        'total_posts_in_categories': total_posts
+                    }
+                })
+                return
             
             # 构建查询参数
             params = {
@@ -52,7 +86,7 @@ class HaloCategoriesListTool(Tool):
                 params['keyword'] = keyword
             
             # 发送请求
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
+            response = session.get(api_url, params=params, timeout=30)
             
             if response.status_code == 401:
                 yield self.create_text_message('认证失败，请检查访问令牌是否正确')
@@ -67,33 +101,7 @@ class HaloCategoriesListTool(Tool):
             data = response.json()
             
             # 格式化分类列表
-            categories = []
-            for item in data.get('items', []):
-                spec = item.get('spec', {})
-                status = item.get('status', {})
-                metadata = item.get('metadata', {})
-                
-                category = {
-                    'id': metadata.get('name', ''),
-                    'name': spec.get('displayName', ''),
-                    'slug': spec.get('slug', ''),
-                    'description': spec.get('description', ''),
-                    'cover': spec.get('cover', ''),
-                    'color': spec.get('color', ''),
-                    'priority': spec.get('priority', 0),
-                    'visible_in_list': spec.get('visibleInList', True),
-                    'hide_from_list': spec.get('hideFromList', False),
-                    'prevent_parent_post_cascade_query': spec.get('preventParentPostCascadeQuery', False),
-                    'parent': spec.get('parent', ''),
-                    'children': spec.get('children', []),
-                    'template': spec.get('template', ''),
-                    'permalink': status.get('permalink', ''),
-                    'post_count': status.get('postCount', 0),
-                    'visible_post_count': status.get('visiblePostCount', 0),
-                    'creation_time': metadata.get('creationTimestamp'),
-                    'full_path': status.get('fullPath', '')
-                }
-                categories.append(category)
+            categories = [Category.from_json(item).to_dict() for item in data.get('items', [])]
             
             # 分页信息
             pagination = {
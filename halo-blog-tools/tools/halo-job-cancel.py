@@ -0,0 +1,74 @@
+from collections.abc import Generator
+from typing import Any
+import logging
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.halo_client import site_key
+from utils.jobs import ACTIVE, STATUS_LABELS, Job, manager, public_view
+
+logger = logging.getLogger(__name__)
+
+
+class HaloJobCancelTool(Tool):
+    """Halo 后台任务取消工具"""
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        取消后台任务
+
+        已经发出的请求会完成，之后不再处理剩余条目；已处理的条目不会回滚。
+
+        Args:
+            tool_parameters: 工具参数
+                - job_id (str): 任务 ID
+
+        Returns:
+            取消结果
+        """
+        try:
+            # 获取凭据
+            credentials = self.runtime.credentials
+            base_url = credentials.get("base_url", "").strip().rstrip('/')
+            access_token = credentials.get("access_token", "").strip()
+
+            if not base_url or not access_token:
+                yield self.create_text_message("❌ 缺少必要的连接配置。请先使用设置工具配置 Halo CMS 连接。")
+                return
+
+            job_id = (tool_parameters.get("job_id") or "").strip()
+            if not job_id:
+                yield self.create_text_message("❌ 任务 ID 不能为空。")
+                return
+
+            outcome = manager.cancel(job_id, site_key(base_url, access_token))
+            if outcome is None:
+                yield self.create_text_message(f"❓ 未找到任务 `{job_id}`。任务 ID 不正确、已过期，或由其它站点凭据提交。")
+                return
+
+            record = outcome.to_dict() if isinstance(outcome, Job) else outcome
+            status = record['status']
+            if not isinstance(outcome, Job) and status in ACTIVE:
+                # 只有持久化记录：任务由其它插件进程执行，无法从这里中止
+                yield self.create_text_message(
+                    f"⚠️ 任务 `{job_id}` 不在当前插件进程中运行，无法取消。"
+                )
+                yield self.create_json_message({"success": False, "job": public_view(record)})
+                return
+            if status not in ACTIVE:
+                yield self.create_text_message(
+                    f"ℹ️ 任务 `{job_id}` 已结束（{STATUS_LABELS.get(status, status)}），无需取消。"
+                )
+                yield self.create_json_message({"success": False, "job": public_view(record)})
+                return
+
+            yield self.create_text_message(
+                f"🛑 已请求取消任务 `{job_id}`。进行中的请求完成后任务停止，已处理的 "
+                f"{record['done']} 条不会回滚。使用 halo-job-status 确认最终状态。"
+            )
+            yield self.create_json_message({"success": True, "job": public_view(record)})
+
+        except Exception as e:
+            logger.error(f"Job cancel tool error: {e}")
+            yield self.create_text_message(f"❌ 取消后台任务时发生错误: {str(e)}")
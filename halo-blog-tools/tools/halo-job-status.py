@@ -0,0 +1,102 @@
+from collections.abc import Generator
+from datetime import datetime
+from typing import Any
+import logging
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.halo_client import site_key
+from utils.jobs import STATUS_LABELS, manager, public_view
+
+logger = logging.getLogger(__name__)
+
+
+def _format_time(timestamp: Any) -> str:
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp else '-'
+
+
+def _progress(record: dict[str, Any]) -> str:
+    if record.get('total'):
+        return f"{record.get('done', 0)}/{record['total']}（{record['progress'] * 100:.0f}%）"
+    return f"{record.get('done', 0)}"
+
+
+class HaloJobStatusTool(Tool):
+    """Halo 后台任务状态查询工具"""
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        查询后台任务的状态和进度
+
+        Args:
+            tool_parameters: 工具参数
+                - job_id (str, optional): 任务 ID，为空时列出最近的任务
+
+        Returns:
+            任务状态、进度和结果
+        """
+        try:
+            # 获取凭据
+            credentials = self.runtime.credentials
+            base_url = credentials.get("base_url", "").strip().rstrip('/')
+            access_token = credentials.get("access_token", "").strip()
+
+            if not base_url or not access_token:
+                yield self.create_text_message("❌ 缺少必要的连接配置。请先使用设置工具配置 Halo CMS 连接。")
+                return
+
+            site = site_key(base_url, access_token)
+            job_id = (tool_parameters.get("job_id") or "").strip()
+
+            if not job_id:
+                records = manager.list(site)
+                if not records:
+                    yield self.create_text_message("📭 当前站点没有后台任务。")
+                    yield self.create_json_message({"success": True, "jobs": []})
+                    return
+                response_lines = [f"📋 **最近的后台任务**（{len(records)} 个）", ""]
+                for record in records:
+                    response_lines.append(
+                        f"- `{record['job_id']}` {STATUS_LABELS.get(record['status'], record['status'])} "
+                        f"{record.get('description') or record['kind']}，进度 {_progress(record)}，"
+                        f"提交于 {_format_time(record.get('created_at'))}"
+                    )
+                yield self.create_text_message('\n'.join(response_lines))
+                # 列表不带各任务的完整结果，单个任务的结果按 ID 查询
+                yield self.create_json_message({
+                    "success": True,
+                    "jobs": [{key: value for key, value in public_view(record).items() if key != 'result'}
+                             for record in records]
+                })
+                return
+
+            record = manager.get(job_id, site)
+            if record is None:
+                yield self.create_text_message(f"❓ 未找到任务 `{job_id}`。任务 ID 不正确、已过期，或由其它站点凭据提交。")
+                return
+
+            response_lines = [
+                f"🧾 **任务 {record['job_id']}**",
+                "",
+                f"- 类型: {record['kind']}",
+                f"- 说明: {record.get('description') or '-'}",
+                f"- 状态: {STATUS_LABELS.get(record['status'], record['status'])}",
+                f"- 进度: {_progress(record)}",
+                f"- 提交时间: {_format_time(record.get('created_at'))}",
+                f"- 开始时间: {_format_time(record.get('started_at'))}",
+                f"- 结束时间: {_format_time(record.get('finished_at'))}",
+            ]
+            if record.get('message'):
+                response_lines.append(f"- 最新消息: {record['message'].splitlines()[0][:100]}")
+            if record.get('error'):
+                response_lines.append(f"- 错误: {record['error']}")
+            if record.get('cancel_requested') and record['status'] == 'running':
+                response_lines.append("⏳ 已请求取消，正在等待进行中的请求完成")
+
+            yield self.create_text_message('\n'.join(response_lines))
+            yield self.create_json_message({"success": True, "job": public_view(record)})
+
+        except Exception as e:
+            logger.error(f"Job status tool error: {e}")
+            yield self.create_text_message(f"❌ 查询后台任务时发生错误: {str(e)}")
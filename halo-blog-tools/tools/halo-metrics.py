@@ -0,0 +1,67 @@
+from collections.abc import Generator
+from typing import Any
+import logging
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.disk_cache import get_disk_cache
+from utils.halo_client import site_key
+from utils.metrics import registry
+from utils.warmup import warmup_state
+
+logger = logging.getLogger(__name__)
+
+
+class HaloMetricsTool(Tool):
+    """Halo 插件运行指标工具"""
+    
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        导出插件进程内汇总的请求指标
+        
+        Args:
+            tool_parameters: 工具参数
+                - format (str, optional): 输出格式 json/prometheus
+        
+        Returns:
+            各 Halo 接口的延迟分位数、错误率、重试次数和缓存命中率；预热状态只包含调用方自己的站点
+        """
+        try:
+            output_format = (tool_parameters.get("format") or "json").lower()
+            
+            if output_format == "prometheus":
+                yield self.create_text_message(registry.to_prometheus())
+            else:
+                snapshot = registry.to_dict()
+                disk = get_disk_cache()
+                snapshot['disk_cache'] = disk.stats() if disk is not None else None
+                base_url = (self.runtime.credentials.get('base_url') or '').strip().rstrip('/')
+                access_token = self.runtime.credentials.get('access_token') or ''
+                snapshot['warmup'] = warmup_state(site_key(base_url, access_token)) if base_url and access_token else None
+                endpoints = snapshot['endpoints']
+                total_requests = sum(entry['requests'] for entry in endpoints.values())
+                total_errors = sum(entry['errors'] for entry in endpoints.values())
+                
+                response_lines = [
+                    "📊 **插件运行指标**",
+                    "",
+                    f"- 运行时长: {snapshot['uptime_seconds']}s",
+                    f"- 请求总数: {total_requests}",
+                    f"- 错误总数: {total_errors}",
+                    f"- 进行中请求: {snapshot['in_flight']}",
+                    f"- 接口数量: {len(endpoints)}",
+                ]
+                if disk is not None:
+                    response_lines.append(f"- 持久化缓存: {snapshot['disk_cache']['bytes']} 字节")
+                warmup = snapshot['warmup']
+                if warmup:
+                    status_text = "就绪" if warmup['ok'] else ("进行中" if not warmup['ready'] else "失败")
+                    response_lines.append(f"- 启动预热: {status_text}")
+                
+                yield self.create_text_message('\n'.join(response_lines))
+                yield self.create_json_message(snapshot)
+                
+        except Exception as e:
+            logger.error(f"Metrics tool error: {e}")
+            yield self.create_text_message(f"❌ 导出指标失败: {str(e)}")
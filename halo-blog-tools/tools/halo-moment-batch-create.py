@@ -0,0 +1,276 @@
+from collections.abc import Generator
+from typing import Any, Optional, Union
+import logging
+import requests
+import json
+import threading
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils import json_codec
+from utils.capabilities import cached_capabilities
+from utils.concurrency import AdaptiveConcurrency, map_adaptive
+from utils.halo_client import HaloSession, get_session
+from utils.jobs import Job, drain, manager
+from utils.media import resolve_media
+from utils.moments import MOMENTS_PATH, build_moment, new_moment_name
+from utils.owner import get_current_user
+from utils.site_stats import invalidate_site_stats
+from utils.taxonomy import ensure_terms
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 5000
+MAX_CONCURRENCY = 16
+DEFAULT_CONCURRENCY = 8
+# 名称冲突（409）时换名重试的次数
+CONFLICT_RETRIES = 2
+
+
+def _split(value: Any) -> list[str]:
+    """把逗号分隔的字符串或列表统一成去空白的列表"""
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return []
+
+
+class HaloMomentBatchCreateTool(Tool):
+    """Halo 动态批量创建工具"""
+
+    def _parse_moments(self, raw: str) -> list[dict[str, Any]]:
+        """
+        解析批量输入
+
+        支持 JSON 数组（元素为字符串或 {content, tags, visible, media_urls} 对象），
+        不是 JSON 时每个非空行作为一条动态。
+        """
+        raw = raw.strip()
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = [line for line in raw.splitlines() if line.strip()]
+
+        if not isinstance(data, list):
+            raise ValueError("moments 必须是 JSON 数组或按行分隔的文本")
+
+        moments = []
+        for i, item in enumerate(data, 1):
+            if isinstance(item, str):
+                item = {"content": item}
+            if not isinstance(item, dict) or not str(item.get("content", "")).strip():
+                raise ValueError(f"第 {i} 条动态内容为空或格式不正确")
+            moments.append({
+                "content": str(item["content"]).strip(),
+                "tags": _split(item.get("tags")),
+                "visible": str(item.get("visible") or "").upper(),
+                "media_urls": _split(item.get("media_urls")),
+            })
+        return moments
+
+    def _post_moment(self, session: HaloSession, base_url: str, moment_data: dict[str, Any],
+                     stop: threading.Event) -> dict[str, Any]:
+        """创建单条动态，名称冲突时换名重试"""
+        if stop.is_set():
+            return {"ok": False, "status": None, "error": "已取消"}
+
+        for _ in range(CONFLICT_RETRIES + 1):
+            try:
+                response = session.post(f"{base_url}{MOMENTS_PATH}", data=json_codec.dumps(moment_data), timeout=30)
+            except requests.exceptions.RequestException as e:
+                return {"ok": False, "status": None, "error": str(e)}
+
+            if response.status_code in [200, 201]:
+                name = response.json().get("metadata", {}).get("name", moment_data["metadata"]["name"])
+                return {"ok": True, "status": response.status_code, "moment_id": name}
+            if response.status_code == 409:
+                moment_data["metadata"]["name"] = new_moment_name()
+                continue
+            if response.status_code in [401, 403]:
+                # 认证或权限问题，剩余动态不再提交
+                stop.set()
+
+            try:
+                error_data = response.json()
+                error_detail = error_data.get('detail', error_data.get('message', response.text))
+            except ValueError:
+                error_detail = response.text
+            return {"ok": False, "status": response.status_code, "error": str(error_detail)[:200]}
+
+        return {"ok": False, "status": 409, "error": "名称冲突，重试后仍失败"}
+
+    def _run(self, session: HaloSession, base_url: str, moments: list[dict[str, Any]], common_tags: list[str],
+             default_visible: str, concurrency: int,
+             job: Optional[Job] = None) -> Generator[Union[str, dict[str, Any]], None, None]:
+        """
+        执行批量创建，依次产出进度文本，最后产出 JSON 汇总
+
+        作为后台任务运行时（job 不为空）同步更新任务进度，任务被取消后不再提交剩余动态。
+        """
+        # 整批只查询一次用户、处理一次标签、解析一次媒体
+        yield f"💭 正在准备 {len(moments)} 条动态..."
+        owner = get_current_user(session, base_url)
+
+        all_tags = list(dict.fromkeys(common_tags + [tag for m in moments for tag in m["tags"]]))
+        resolved_tags: set[str] = set()
+        if all_tags:
+            yield f"🏷️ 正在处理 {len(all_tags)} 个标签..."
+            resolved_tags = {tag.display_name for tag in ensure_terms(session, base_url, 'tags', all_tags)}
+
+        all_media = list(dict.fromkeys(url for m in moments for url in m["media_urls"]))
+        media_info = dict(zip(all_media, resolve_media(all_media))) if all_media else {}
+
+        payloads = []
+        for moment in moments:
+            tag_names = [tag for tag in dict.fromkeys(common_tags + moment["tags"]) if tag in resolved_tags]
+            visible = moment["visible"] or default_visible
+            if visible not in ["PUBLIC", "PRIVATE"]:
+                visible = "PUBLIC"
+            medium_list = [{"type": media_info[url].type, "url": url, "originType": media_info[url].mime}
+                           for url in moment["media_urls"]]
+            payloads.append(build_moment(moment["content"], owner, tag_names, visible, medium_list))
+
+        yield f"🚀 开始创建（自适应并发，最多 {concurrency}）..."
+
+        # 自适应并发提交，按完成顺序逐条返回结果
+        total = len(payloads)
+        results: list[dict[str, Any]] = [{} for _ in payloads]
+        stop = threading.Event()
+        done = 0
+        controller = AdaptiveConcurrency('moment-batch-create', concurrency)
+        for i, outcome in map_adaptive(lambda payload: self._post_moment(session, base_url, payload, stop),
+                                       payloads, controller, thread_name_prefix='halo-moment-batch'):
+            result = {"index": i, **outcome}
+            results[i] = result
+            done += 1
+            if job is not None:
+                job.update(done=done, total=total)
+                if job.cancelled:
+                    stop.set()
+            preview = moments[i]["content"][:30]
+            if result["ok"]:
+                yield f"✅ [{done}/{total}] {result['moment_id']} {preview}"
+            else:
+                status = f"HTTP {result['status']} - " if result["status"] else ""
+                yield f"❌ [{done}/{total}] 第 {i + 1} 条失败: {status}{result['error']}"
+
+        succeeded = sum(1 for r in results if r["ok"])
+        failed = total - succeeded
+        if succeeded:
+            # 动态数已变化，统计快照作废
+            invalidate_site_stats(session)
+
+        response_lines = [
+            f"{'✅' if not failed else '⚠️'} **批量创建完成**",
+            "",
+            f"📊 **总数**: {total}",
+            f"✅ **成功**: {succeeded}",
+            f"❌ **失败**: {failed}",
+            f"👤 **作者**: {owner}",
+        ]
+        if resolved_tags:
+            response_lines.append(f"🏷️ **标签**: {', '.join(sorted(resolved_tags))}")
+        if job is not None and job.cancelled:
+            response_lines.append("⛔ 任务已取消，剩余动态未提交")
+        elif stop.is_set():
+            response_lines.append("⛔ 认证或权限失败，剩余动态已取消提交")
+
+        yield '\n'.join(response_lines)
+
+        yield {
+            "success": failed == 0,
+            "total": total,
+            "succeeded": succeeded,
+            "failed": failed,
+            "owner": owner,
+            "concurrency": controller.to_dict(),
+            "results": results
+        }
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        在 Halo CMS 中批量创建动态
+
+        Args:
+            tool_parameters: 工具参数
+                - moments (str): JSON 数组或按行分隔的动态内容
+                - tags (str, optional): 所有动态共用的标签（逗号分隔）
+                - visible (str, optional): 默认可见性 (PUBLIC/PRIVATE)
+                - concurrency (int, optional): 并发请求数上限，实际并发按站点响应自适应调整
+                - background (bool, optional): 作为后台任务运行，立即返回任务 ID
+
+        Returns:
+            逐条返回创建结果，最后返回汇总；后台运行时返回任务 ID
+        """
+        try:
+            # 获取凭据
+            credentials = self.runtime.credentials
+            base_url = credentials.get("base_url", "").strip().rstrip('/')
+            access_token = credentials.get("access_token", "").strip()
+
+            if not base_url or not access_token:
+                yield self.create_text_message("❌ 缺少必要的连接配置。请先使用设置工具配置 Halo CMS 连接。")
+                return
+
+            # 获取参数
+            moments_str = tool_parameters.get("moments", "") or ""
+            common_tags = _split(tool_parameters.get("tags", ""))
+            default_visible = (tool_parameters.get("visible") or "PUBLIC").upper()
+            try:
+                concurrency = int(tool_parameters.get("concurrency") or DEFAULT_CONCURRENCY)
+            except (TypeError, ValueError):
+                concurrency = DEFAULT_CONCURRENCY
+            concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+            background = bool(tool_parameters.get("background"))
+
+            try:
+                moments = self._parse_moments(moments_str)
+            except ValueError as e:
+                yield self.create_text_message(f"❌ {e}")
+                return
+
+            if not moments:
+                yield self.create_text_message("❌ 没有需要创建的动态。")
+                return
+            if len(moments) > MAX_BATCH_SIZE:
+                yield self.create_text_message(f"❌ 单次最多创建 {MAX_BATCH_SIZE} 条动态，当前 {len(moments)} 条。")
+                return
+
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
+
+            capabilities = cached_capabilities(session)
+            if capabilities is not None and capabilities.moment_plugin is False:
+                yield self.create_text_message("❌ 未检测到 Halo 动态插件。请先在 Halo 后台安装并启用「瞬间」插件。")
+                return
+
+            if background:
+                job = manager.submit(
+                    'halo-moment-batch-create', session.site_key,
+                    lambda job: drain(job, self._run(session, base_url, moments, common_tags, default_visible,
+                                                     concurrency, job)),
+                    total=len(moments), description=f"批量创建 {len(moments)} 条动态"
+                )
+                yield self.create_text_message(
+                    f"🕒 已提交后台任务 {job.id}，共 {len(moments)} 条动态。"
+                    f"使用 halo-job-status 查询进度，halo-job-cancel 取消。"
+                )
+                yield self.create_json_message({"success": True, "job_id": job.id, "status": job.status,
+                                                "total": len(moments)})
+                return
+
+            for event in self._run(session, base_url, moments, common_tags, default_visible, concurrency):
+                if isinstance(event, dict):
+                    yield self.create_json_message(event)
+                else:
+                    yield self.create_text_message(event)
+
+        except requests.exceptions.Timeout:
+            yield self.create_text_message("❌ 请求超时。请检查网络连接或稍后重试。")
+        except requests.exceptions.ConnectionError:
+            yield self.create_text_message("❌ 无法连接到 Halo CMS。请检查网络连接和站点地址。")
+        except Exception as e:
+            logger.error(f"Moment batch create tool error: {e}")
+            yield self.create_text_message(f"❌ 批量创建动态时发生错误: {str(e)}")
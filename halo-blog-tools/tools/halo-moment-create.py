@@ -2,194 +2,29 @@ from collections.abc import Generator
 from typing import Any
 import logging
 import requests
-import json
-import time
-from datetime import datetime
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils import json_codec
+from utils.capabilities import cached_capabilities
+from utils.halo_client import get_session
+from utils.media import resolve_media
+from utils.moments import MOMENTS_PATH, build_moment
+from utils.owner import get_current_user
+from utils.site_stats import invalidate_site_stats
+from utils.taxonomy import ensure_terms
+
 logger = logging.getLogger(__name__)
 
 
 class HaloMomentCreateTool(Tool):
     """Halo 动态创建工具"""
     
-    def _detect_media_type(self, url: str) -> str:
-        """根据URL检测媒体类型"""
-        url_lower = url.lower()
-        if any(ext in url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp']):
-            return "PHOTO"
-        elif any(ext in url_lower for ext in ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv']):
-            return "VIDEO"
-        elif any(ext in url_lower for ext in ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a']):
-            return "AUDIO"
-        else:
-            return "PHOTO"  # 默认为图片类型
-    
-    def _get_mime_type(self, url: str) -> str:
-        """根据URL获取MIME类型"""
-        url_lower = url.lower()
-        mime_map = {
-            '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
-            '.gif': 'image/gif', '.webp': 'image/webp', '.bmp': 'image/bmp',
-            '.mp4': 'video/mp4', '.avi': 'video/x-msvideo', '.mov': 'video/quicktime',
-            '.mkv': 'video/x-matroska', '.webm': 'video/webm', '.flv': 'video/x-flv',
-            '.mp3': 'audio/mpeg', '.wav': 'audio/wav', '.flac': 'audio/flac',
-            '.aac': 'audio/aac', '.ogg': 'audio/ogg', '.m4a': 'audio/mp4'
-        }
-        
-        for ext, mime in mime_map.items():
-            if ext in url_lower:
-                return mime
-        return 'application/octet-stream'  # 默认类型
-
     def _ensure_tags_exist(self, session: requests.Session, base_url: str, tags: list) -> list:
         """确保标签存在，如果不存在则创建，返回标签显示名称列表（用于API spec.tags字段）"""
-        existing_tags = []
-        
-        for tag_name in tags:
-            try:
-                # 检查标签是否存在
-                tag_response = session.get(
-                    f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                    timeout=10
-                )
-                
-                if tag_response.status_code == 200:
-                    tag_data = tag_response.json()
-                    existing_tag = None
-                    
-                    # 查找现有标签
-                    for tag in tag_data.get('items', []):
-                        if tag.get('spec', {}).get('displayName') == tag_name:
-                            existing_tag = tag
-                            break
-                    
-                    if existing_tag:
-                        # 使用标签的显示名称而不是ID，因为官方API spec.tags需要字符串数组
-                        existing_tags.append(existing_tag['spec']['displayName'])
-                        logger.info(f"标签 '{tag_name}' 已存在: {existing_tag['spec']['displayName']}")
-                    else:
-                        # 创建新标签
-                        slug = tag_name.lower().replace(' ', '-').replace('中文', 'chinese')
-                        tag_create_data = {
-                            "apiVersion": "content.halo.run/v1alpha1",
-                            "kind": "Tag",
-                            "metadata": {
-                                "generateName": "tag-"
-                            },
-                            "spec": {
-                                "displayName": tag_name,
-                                "slug": f"{slug}-{int(time.time())}",
-                                "color": "#6366f1",
-                                "cover": ""
-                            }
-                        }
-                        
-                        create_response = session.post(
-                            f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                            data=json.dumps(tag_create_data),
-                            timeout=10
-                        )
-                        
-                        if create_response.status_code in [200, 201]:
-                            created_tag = create_response.json()
-                            # 使用创建后标签的显示名称
-                            tag_display_name = created_tag['spec']['displayName']
-                            existing_tags.append(tag_display_name)
-                            logger.info(f"标签 '{tag_name}' 创建成功: {tag_display_name}")
-                        else:
-                            logger.error(f"标签 '{tag_name}' 创建失败: {create_response.text}")
-                            
-            except Exception as e:
-                logger.error(f"处理标签 '{tag_name}' 时出错: {e}")
-        
-        return existing_tags
-    
-    def _get_current_user(self, session: requests.Session, base_url: str) -> str:
-        """获取当前用户名"""
-        try:
-            # 尝试多个不同的API端点获取用户信息
-            endpoints = [
-                "/apis/api.console.halo.run/v1alpha1/users/-",
-                "/apis/api.console.halo.run/v1alpha1/users/-/profile", 
-                "/apis/api.halo.run/v1alpha1/users/-",
-                "/apis/uc.api.console.halo.run/v1alpha1/users/-"
-            ]
-            
-            for endpoint in endpoints:
-                try:
-                    user_response = session.get(f"{base_url}{endpoint}", timeout=10)
-                    logger.info(f"Trying endpoint {endpoint}: status {user_response.status_code}")
-                    
-                    if user_response.status_code == 200:
-                        user_data = user_response.json()
-                        logger.info(f"User data from {endpoint}: {user_data}")
-                        
-                        # 尝试多种可能的用户名字段
-                        username = None
-                        
-                        # 方法1：从嵌套的user.metadata.name获取（实际API返回格式）
-                        if "user" in user_data and "metadata" in user_data["user"]:
-                            username = user_data["user"]["metadata"].get("name")
-                        
-                        # 方法2：从顶级metadata.name获取
-                        elif "metadata" in user_data and "name" in user_data["metadata"]:
-                            username = user_data["metadata"]["name"]
-                        
-                        # 方法3：从spec.displayName获取
-                        elif "spec" in user_data and "displayName" in user_data["spec"]:
-                            username = user_data["spec"]["displayName"]
-                        
-                        # 方法4：从嵌套的user.spec.displayName获取
-                        elif "user" in user_data and "spec" in user_data["user"]:
-                            username = user_data["user"]["spec"].get("displayName")
-                        
-                        # 方法5：直接从顶级字段获取
-                        elif "name" in user_data:
-                            username = user_data["name"]
-                        elif "username" in user_data:
-                            username = user_data["username"]
-                        elif "displayName" in user_data:
-                            username = user_data["displayName"]
-                        
-                        if username and username.strip():
-                            logger.info(f"Successfully got username: {username}")
-                            return username.strip()
-                        else:
-                            logger.warning(f"No valid username found in response from {endpoint}")
-                    
-                    elif user_response.status_code == 404:
-                        logger.info(f"Endpoint {endpoint} not found, trying next...")
-                        continue
-                    else:
-                        logger.warning(f"Endpoint {endpoint} returned status {user_response.status_code}")
-                        
-                except requests.exceptions.RequestException as e:
-                    logger.warning(f"Request to {endpoint} failed: {e}")
-                    continue
-            
-            # 如果所有端点都失败，尝试从token中推断用户名
-            # Personal Access Token 通常包含用户信息
-            logger.warning("All user info endpoints failed, trying token-based approach")
-            
-            # 尝试获取token信息
-            try:
-                token_response = session.get(f"{base_url}/apis/api.console.halo.run/v1alpha1/tokens", timeout=10)
-                if token_response.status_code == 200:
-                    token_data = token_response.json()
-                    logger.info(f"Token data: {token_data}")
-                    # 这里可能包含用户信息
-            except Exception as e:
-                logger.warning(f"Failed to get token info: {e}")
-            
-            logger.warning("Failed to get user info from all available endpoints")
-            return "jason"  # 根据用户反馈，使用正确的用户名
-            
-        except Exception as e:
-            logger.error(f"Exception in _get_current_user: {e}")
-            return "jason"  # 根据用户反馈，使用正确的用户名
+        # 使用标签的显示名称而不是ID，因为官方API spec.tags需要字符串数组
+        return [tag.display_name for tag in ensure_terms(session, base_url, 'tags', tags)]
     
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
@@ -235,13 +70,12 @@ class HaloMomentCreateTool(Tool):
             medium_list = []
             if media_urls_str:
                 media_urls = [url.strip() for url in media_urls_str.split(",") if url.strip()]
-                for url in media_urls:
-                    # 根据URL后缀判断媒体类型
-                    media_type = self._detect_media_type(url)
+                # 根据URL路径扩展名判断媒体类型，无法判断的并发HEAD探测
+                for url, media in zip(media_urls, resolve_media(media_urls)):
                     medium_list.append({
-                        "type": media_type,
+                        "type": media.type,
                         "url": url,
-                        "originType": self._get_mime_type(url)
+                        "originType": media.mime
                     })
             
             # 验证可见性
@@ -249,20 +83,18 @@ class HaloMomentCreateTool(Tool):
                 visible = "PUBLIC"
             
             # 创建HTTP会话
-            session = requests.Session()
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
-            # 生成唯一的动态名称
-            moment_name = f"moment-{int(time.time())}"
+            # 已探测到站点未安装动态插件时直接返回，不再发起注定失败的请求
+            capabilities = cached_capabilities(session)
+            if capabilities is not None and capabilities.moment_plugin is False:
+                yield self.create_text_message("❌ 未检测到 Halo 动态插件。请先在 Halo 后台安装并启用「瞬间」插件。")
+                return
             
             yield self.create_text_message("💭 正在获取用户信息...")
             
             # 获取当前用户信息
-            owner = self._get_current_user(session, base_url)
+            owner = get_current_user(session, base_url)
             
             # 确保标签存在并获取标签名称（用于API spec.tags字段）
             tag_names = []
@@ -270,65 +102,16 @@ class HaloMomentCreateTool(Tool):
                 yield self.create_text_message("🏷️ 正在处理标签...")
                 tag_names = self._ensure_tags_exist(session, base_url, tags)
             
-            # 生成包含标签链接的HTML内容
-            def generate_content_with_tags(raw_content, tag_list):
-                """生成包含标签链接的内容"""
-                import urllib.parse
-                
-                if not tag_list:
-                    return raw_content, raw_content.replace('\n', '<br>')
-                
-                # 为每个标签生成HTML链接
-                tag_links = []
-                for tag in tag_list:
-                    encoded_tag = urllib.parse.quote(tag)
-                    tag_link = f'<a class="tag" href="/moments?tag={encoded_tag}" data-pjax="">{tag}</a>'
-                    tag_links.append(tag_link)
-                
-                # ✅ 修复标签分行问题：使用更好的HTML结构避免分行问题
-                tag_html = '<span class="tags">' + ' '.join(tag_links) + '</span>'
-                
-                # 在标签和内容之间添加换行
-                raw_with_tags = ''.join([f'#{tag} ' for tag in tag_list]) + raw_content
-                html_with_tags = tag_html + '<br>' + raw_content.replace('\n', '<br>')
-                
-                return raw_with_tags, html_with_tags
-            
-            # 生成包含标签的内容
-            content_with_tags, html_with_tags = generate_content_with_tags(content, tag_names)
-            
-            # ✅ 修复时间戳显示问题：添加发布时间字段
-            current_time = datetime.now().isoformat() + "Z"
-            
-            # 准备动态数据 - 根据Halo官方API格式
-            moment_data = {
-                "apiVersion": "moment.halo.run/v1alpha1",
-                "kind": "Moment",
-                "metadata": {
-                    "name": moment_name,
-                    "generateName": "moment-"
-                },
-                "spec": {
-                    "content": {
-                        "raw": content_with_tags,  # 包含标签的raw内容
-                        "html": html_with_tags,    # 包含标签HTML链接的内容
-                        "medium": medium_list  # 媒体文件数组 - 官方API使用medium不是media
-                    },
-                    "owner": owner,
-                    "tags": tag_names,  # 使用标签显示名称，符合官方API spec.tags格式
-                    "visible": visible,
-                    "approved": True,
-                    "allowComment": True,
-                    "releaseTime": current_time  # ✅ 新增：发布时间字段，修复时间戳显示问题
-                }
-            }
+            # 准备动态数据 - 根据Halo官方API格式（名称不再按秒生成，避免同一秒内409冲突）
+            moment_data = build_moment(content, owner, tag_names, visible, medium_list)
+            moment_name = moment_data["metadata"]["name"]
             
             yield self.create_text_message("💭 正在创建动态...")
             
             # 发送创建请求
             response = session.post(
-                f"{base_url}/apis/moment.halo.run/v1alpha1/moments",
-                data=json.dumps(moment_data),
+                f"{base_url}{MOMENTS_PATH}",
+                data=json_codec.dumps(moment_data),
                 timeout=30
             )
             
@@ -356,6 +139,9 @@ class HaloMomentCreateTool(Tool):
                     error_detail = response.text
                 yield self.create_text_message(f"❌ 创建动态失败: HTTP {response.status_code} - {error_detail}")
                 return
+
+            # 动态数已变化，统计快照作废
+            invalidate_site_stats(session)
             
             # 解析响应
             result = response.json()
@@ -1,11 +1,86 @@
 from typing import Any, Dict, List, Optional, Generator
+from itertools import islice
 import requests
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.capabilities import cached_capabilities
+from utils.halo_client import HaloSession, get_session
+from utils.moments import (MEDIA_TYPES, TIMELINE_PAGE_SIZE, MomentFilter, fetch_moments_page, format_moment,
+                           iter_timeline, parse_time)
+
+# 时间线模式单次最多返回的动态数
+MAX_TIMELINE_LIMIT = 1000
+
 
 class HaloMomentListTool(Tool):
+    def _timeline(self, session: HaloSession, base_url: str, tool_parameters: Dict[str, Any],
+                  keyword: str, approved: Optional[bool],
+                  visibility: Optional[str]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        时间线模式：跨页按从新到旧拉取，边解析边筛选，凑够 limit 条即停止
+        """
+        try:
+            limit = int(tool_parameters.get('limit') or 20)
+        except (TypeError, ValueError):
+            limit = 20
+        limit = max(1, min(limit, MAX_TIMELINE_LIMIT))
+        
+        start_text = (tool_parameters.get('start_time') or '').strip()
+        end_text = (tool_parameters.get('end_time') or '').strip()
+        start, end = parse_time(start_text), parse_time(end_text)
+        if (start_text and start is None) or (end_text and end is None):
+            yield self.create_text_message('时间格式不正确，请使用 ISO 8601 格式，例如 2024-01-01 或 2024-01-01T08:00:00Z')
+            return
+        # 只给日期的结束时间包含当天
+        if end is not None and len(end_text) == 10:
+            end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+        
+        media_type = (tool_parameters.get('media_type') or '').strip().upper() or None
+        if media_type and media_type not in MEDIA_TYPES + ('NONE',):
+            yield self.create_text_message(f"不支持的媒体类型：{media_type}，可选 {', '.join(MEDIA_TYPES)}、NONE")
+            return
+        
+        filters = MomentFilter(keyword=keyword, tag=(tool_parameters.get('tag') or '').strip(),
+                               start=start, end=end, visible=visibility, approved=approved,
+                               media_type=media_type)
+        
+        # 媒体类型只能在客户端筛选，按整页扫描；其余条件可下推时按需取页，避免多拉
+        page_size = TIMELINE_PAGE_SIZE if media_type else min(max(limit, 20), TIMELINE_PAGE_SIZE)
+        stats: Dict[str, Any] = {}
+        try:
+            timeline = iter_timeline(session, base_url, filters, page_size=page_size, stats=stats)
+            moments: List[Dict[str, Any]] = list(islice(timeline, limit))
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code == 401:
+                yield self.create_text_message('认证失败，请检查访问令牌是否正确')
+            elif status_code == 403:
+                yield self.create_text_message('权限不足，请检查访问令牌权限')
+            else:
+                yield self.create_text_message(f'API请求失败: {status_code} - {e.response.text if e.response is not None else e}')
+            return
+        
+        filter_text = "，".join(f"{key}={value}" for key, value in filters.to_dict().items() if value not in (None, ''))
+        summary = (f"时间线共返回{len(moments)}条瞬间（上限{limit}条），扫描{stats['scanned']}条、{stats['pages']}页"
+                   + (f"（筛选条件：{filter_text}）" if filter_text else '') + "。")
+        
+        yield self.create_json_message({
+            'success': True,
+            'summary': summary,
+            'moments': moments,
+            'timeline': {
+                'limit': limit,
+                'returned': len(moments),
+                'scanned': stats['scanned'],
+                'pages': stats['pages'],
+                'source': stats['source'],
+                'exhausted': stats['exhausted'],
+            },
+            'filters': filters.to_dict()
+        })
+    
     def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         获取瞬间列表
@@ -31,35 +106,41 @@ class HaloMomentListTool(Tool):
             size = tool_parameters.get('size', 10)
             approved = tool_parameters.get('approved')
             visible = tool_parameters.get('visible')
-            keyword = tool_parameters.get('keyword', '').strip()
+            keyword = (tool_parameters.get('keyword') or '').strip()
+            mode = tool_parameters.get('mode') or 'page'
             
-            # 构建API URL
-            api_url = f"{base_url}/apis/moment.halo.run/v1alpha1/moments"
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
-            # 准备请求头
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+            # 已探测到站点未安装动态插件时直接返回
+            capabilities = cached_capabilities(session)
+            if capabilities is not None and capabilities.moment_plugin is False:
+                yield self.create_text_message('未检测到 Halo 动态插件，请先在 Halo 后台安装并启用「瞬间」插件')
+                return
             
-            # 构建查询参数
-            params = {
-                'page': page,
-                'size': size
-            }
+            # 布尔型可见性对应 Console 接口的 PUBLIC/PRIVATE
+            visibility = None if visible is None else ('PUBLIC' if visible else 'PRIVATE')
+            
+            if mode == 'timeline':
+                yield from self._timeline(session, base_url, tool_parameters, keyword, approved, visibility)
+                return
+            
+            # 构建查询参数（回退到 Extension 接口时沿用原参数）
+            legacy_params = {}
             
             # 添加筛选参数
             if approved is not None:
-                params['approved'] = str(approved).lower()
+                legacy_params['approved'] = str(approved).lower()
                 
             if visible is not None:
-                params['visible'] = str(visible).lower()
+                legacy_params['visible'] = str(visible).lower()
             
             if keyword:
-                params['keyword'] = keyword
+                legacy_params['keyword'] = keyword
             
             # 发送请求
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
+            filters = MomentFilter(keyword=keyword, visible=visibility, approved=approved)
+            response, _ = fetch_moments_page(session, base_url, page, size, filters, legacy_params)
             
             if response.status_code == 401:
                 yield self.create_text_message('认证失败，请检查访问令牌是否正确')
@@ -74,60 +155,8 @@ class HaloMomentListTool(Tool):
             data = response.json()
             
             # 格式化瞬间列表
-            moments = []
             items = data.get('items', [])
-            if isinstance(items, list):
-                for item in items:
-                    if isinstance(item, dict):
-                        spec = item.get('spec', {})
-                        status = item.get('status', {})
-                        metadata = item.get('metadata', {})
-                        
-                        # 处理媒体文件 - 官方API使用medium字段
-                        media_items = []
-                        content_data = spec.get('content', {})
-                        if isinstance(content_data, dict):
-                            medium_list = content_data.get('medium', [])
-                            if isinstance(medium_list, list):
-                                for medium in medium_list:
-                                    if isinstance(medium, dict):
-                                        media_items.append({
-                                            'type': medium.get('type', ''),
-                                            'url': medium.get('url', ''),
-                                            'origin_type': medium.get('originType', '')
-                                        })
-                        
-                        # 处理标签
-                        tags = spec.get('tags', [])
-                        if not isinstance(tags, list):
-                            tags = []
-                        
-                        # 处理内容
-                        if isinstance(content_data, dict):
-                            raw_content = content_data.get('raw', '')
-                            html_content = content_data.get('html', '')
-                        else:
-                            raw_content = str(content_data) if content_data else ''
-                            html_content = raw_content
-                        
-                        moment = {
-                            'id': metadata.get('name', ''),
-                            'content': raw_content,
-                            'html_content': html_content,
-                            'media': media_items,
-                            'tags': tags,
-                            'approved': spec.get('approved', False),
-                            'visible': spec.get('visible', True),
-                            'allow_comment': spec.get('allowComment', True),
-                            'creation_time': metadata.get('creationTimestamp'),
-                            'release_time': spec.get('releaseTime'),
-                            'owner': spec.get('owner', {}).get('name', '') if isinstance(spec.get('owner'), dict) else '',
-                            'owner_display_name': spec.get('owner', {}).get('displayName', '') if isinstance(spec.get('owner'), dict) else '',
-                            'permalink': status.get('permalink', ''),
-                            'media_count': len(media_items),
-                            'comment_count': status.get('commentCount', 0)
-                        }
-                        moments.append(moment)
+            moments = [format_moment(item) for item in items if isinstance(item, dict)] if isinstance(items, list) else []
             
             # 分页信息
             pagination = {
@@ -11,6 +11,14 @@ from datetime import datetime
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils import json_codec
+from utils.capabilities import publish_post
+from utils.halo_client import get_session
+from utils.owner import get_current_user
+from utils.post_content import apply_content_annotation, keep_content_annotation
+from utils.site_stats import invalidate_site_stats
+from utils.taxonomy import ensure_terms
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -143,213 +151,12 @@ class HaloPostCreateTool(Tool):
     
     def _ensure_tags_exist(self, session: requests.Session, base_url: str, tags: list) -> list:
         """确保标签存在，如果不存在则创建，返回标签ID列表"""
-        existing_tags = []
-        
-        for tag_name in tags:
-            try:
-                # 检查标签是否存在
-                tag_response = session.get(
-                    f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                    timeout=10
-                )
-                
-                if tag_response.status_code == 200:
-                    tag_data = tag_response.json()
-                    existing_tag = None
-                    
-                    # 查找现有标签
-                    for tag in tag_data.get('items', []):
-                        if tag.get('spec', {}).get('displayName') == tag_name:
-                            existing_tag = tag
-                            break
-                    
-                    if existing_tag:
-                        existing_tags.append(existing_tag['metadata']['name'])
-                        logger.info(f"标签 '{tag_name}' 已存在: {existing_tag['metadata']['name']}")
-                    else:
-                        # 创建新标签
-                        slug = tag_name.lower().replace(' ', '-').replace('中文', 'chinese')
-                        tag_create_data = {
-                            "apiVersion": "content.halo.run/v1alpha1",
-                            "kind": "Tag",
-                            "metadata": {
-                                "generateName": "tag-"
-                            },
-                            "spec": {
-                                "displayName": tag_name,
-                                "slug": f"{slug}-{int(time.time())}",
-                                "color": "#6366f1",
-                                "cover": ""
-                            }
-                        }
-                        
-                        create_response = session.post(
-                            f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                            data=json.dumps(tag_create_data),
-                            timeout=10
-                        )
-                        
-                        if create_response.status_code in [200, 201]:
-                            created_tag = create_response.json()
-                            tag_id = created_tag['metadata']['name']
-                            existing_tags.append(tag_id)
-                            logger.info(f"标签 '{tag_name}' 创建成功: {tag_id}")
-                        else:
-                            logger.error(f"标签 '{tag_name}' 创建失败: {create_response.text}")
-                            
-            except Exception as e:
-                logger.error(f"处理标签 '{tag_name}' 时出错: {e}")
-        
-        return existing_tags
+        return [tag.name for tag in ensure_terms(session, base_url, 'tags', tags)]
     
     def _ensure_categories_exist(self, session: requests.Session, base_url: str, categories: list) -> list:
         """确保分类存在，如果不存在则创建，返回分类ID列表"""
-        existing_categories = []
-        
-        for category_name in categories:
-            try:
-                # 检查分类是否存在
-                category_response = session.get(
-                    f"{base_url}/apis/content.halo.run/v1alpha1/categories",
-                    timeout=10
-                )
-                
-                if category_response.status_code == 200:
-                    category_data = category_response.json()
-                    existing_category = None
-                    
-                    # 查找现有分类
-                    for category in category_data.get('items', []):
-                        if category.get('spec', {}).get('displayName') == category_name:
-                            existing_category = category
-                            break
-                    
-                    if existing_category:
-                        existing_categories.append(existing_category['metadata']['name'])
-                        logger.info(f"分类 '{category_name}' 已存在: {existing_category['metadata']['name']}")
-                    else:
-                        # 创建新分类
-                        slug = category_name.lower().replace(' ', '-').replace('中文', 'chinese')
-                        category_create_data = {
-                            "apiVersion": "content.halo.run/v1alpha1",
-                            "kind": "Category",
-                            "metadata": {
-                                "generateName": "category-"
-                            },
-                            "spec": {
-                                "displayName": category_name,
-                                "slug": f"{slug}-{int(time.time())}",
-                                "description": "",
-                                "cover": "",
-                                "template": "",
-                                "priority": 0,
-                                "children": []
-                            }
-                        }
-                        
-                        create_response = session.post(
-                            f"{base_url}/apis/content.halo.run/v1alpha1/categories",
-                            data=json.dumps(category_create_data),
-                            timeout=10
-                        )
-                        
-                        if create_response.status_code in [200, 201]:
-                            created_category = create_response.json()
-                            category_id = created_category['metadata']['name']
-                            existing_categories.append(category_id)
-                            logger.info(f"分类 '{category_name}' 创建成功: {category_id}")
-                        else:
-                            logger.error(f"分类 '{category_name}' 创建失败: {create_response.text}")
-                            
-            except Exception as e:
-                logger.error(f"处理分类 '{category_name}' 时出错: {e}")
-        
-        return existing_categories
+        return [category.name for category in ensure_terms(session, base_url, 'categories', categories)]
     
-    def _get_current_user(self, session: requests.Session, base_url: str) -> str:
-        """获取当前用户名"""
-        try:
-            # 尝试多个不同的API端点获取用户信息
-            endpoints = [
-                "/apis/api.console.halo.run/v1alpha1/users/-",
-                "/apis/api.console.halo.run/v1alpha1/users/-/profile", 
-                "/apis/api.halo.run/v1alpha1/users/-",
-                "/apis/uc.api.console.halo.run/v1alpha1/users/-"
-            ]
-            
-            for endpoint in endpoints:
-                try:
-                    user_response = session.get(f"{base_url}{endpoint}", timeout=10)
-                    logger.info(f"Trying endpoint {endpoint}: status {user_response.status_code}")
-                    
-                    if user_response.status_code == 200:
-                        user_data = user_response.json()
-                        logger.info(f"User data from {endpoint}: {user_data}")
-                        
-                        # 尝试多种可能的用户名字段
-                        username = None
-                        
-                        # 方法1：从嵌套的user.metadata.name获取（实际API返回格式）
-                        if "user" in user_data and "metadata" in user_data["user"]:
-                            username = user_data["user"]["metadata"].get("name")
-                        
-                        # 方法2：从顶级metadata.name获取
-                        elif "metadata" in user_data and "name" in user_data["metadata"]:
-                            username = user_data["metadata"]["name"]
-                        
-                        # 方法3：从spec.displayName获取
-                        elif "spec" in user_data and "displayName" in user_data["spec"]:
-                            username = user_data["spec"]["displayName"]
-                        
-                        # 方法4：从嵌套的user.spec.displayName获取
-                        elif "user" in user_data and "spec" in user_data["user"]:
-                            username = user_data["user"]["spec"].get("displayName")
-                        
-                        # 方法5：直接从顶级字段获取
-                        elif "name" in user_data:
-                            username = user_data["name"]
-                        elif "username" in user_data:
-                            username = user_data["username"]
-                        elif "displayName" in user_data:
-                            username = user_data["displayName"]
-                        
-                        if username and username.strip():
-                            logger.info(f"Successfully got username: {username}")
-                            return username.strip()
-                        else:
-                            logger.warning(f"No valid username found in response from {endpoint}")
-                    
-                    elif user_response.status_code == 404:
-                        logger.info(f"Endpoint {endpoint} not found, trying next...")
-                        continue
-                    else:
-                        logger.warning(f"Endpoint {endpoint} returned status {user_response.status_code}")
-                        
-                except requests.exceptions.RequestException as e:
-                    logger.warning(f"Request to {endpoint} failed: {e}")
-                    continue
-            
-            # 如果所有端点都失败，尝试从token中推断用户名
-            # Personal Access Token 通常包含用户信息
-            logger.warning("All user info endpoints failed, trying token-based approach")
-            
-            # 尝试获取token信息
-            try:
-                token_response = session.get(f"{base_url}/apis/api.console.halo.run/v1alpha1/tokens", timeout=10)
-                if token_response.status_code == 200:
-                    token_data = token_response.json()
-                    logger.info(f"Token data: {token_data}")
-                    # 这里可能包含用户信息
-            except Exception as e:
-                logger.warning(f"Failed to get token info: {e}")
-            
-            logger.warning("Failed to get user info from all available endpoints")
-            return "jason"  # 根据用户反馈，使用正确的用户名
-            
-        except Exception as e:
-            logger.error(f"Exception in _get_current_user: {e}")
-            return "jason"  # 根据用户反馈，使用正确的用户名
-
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         使用正确的Halo API方式创建文章（基于VSCode扩展实现）
@@ -403,17 +210,12 @@ class HaloPostCreateTool(Tool):
                 slug = self._safe_slug_generate(slug)
             
             # 创建HTTP会话
-            session = requests.Session()
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
             yield self.create_text_message("👤 正在获取用户信息...")
             
             # 获取当前用户信息
-            owner = self._get_current_user(session, base_url)
+            owner = get_current_user(session, base_url)
             
             # 确保标签和分类存在
             if tags:
@@ -434,20 +236,22 @@ class HaloPostCreateTool(Tool):
                 "content": content  # 这里可以是markdown渲染后的HTML，但直接用原始内容也可以
             }
             
+            annotations = {
+                # 添加编辑器插件支持注解
+                "content.halo.run/preferred-editor": editor_type,
+                # 指定内容类型以便编辑器识别
+                "content.halo.run/content-type": "markdown"
+            }
+            # 正文保存在下面创建的快照中；精简模式下不再复制到注解，避免列表接口返回整篇正文
+            apply_content_annotation(annotations, content_data)
+
             # 准备文章数据 - 按照VSCode扩展的正确格式
             post_data = {
                 "apiVersion": "content.halo.run/v1alpha1",
                 "kind": "Post",
                 "metadata": {
                     "name": post_name,
-                    "annotations": {
-                        # 关键：使用content.halo.run/content-json注解传递内容
-                        "content.halo.run/content-json": json.dumps(content_data),
-                        # 添加编辑器插件支持注解
-                        "content.halo.run/preferred-editor": editor_type,
-                        # 指定内容类型以便编辑器识别
-                        "content.halo.run/content-type": "markdown"
-                    }
+                    "annotations": annotations
                 },
                 "spec": {
                     "title": title,
@@ -479,19 +283,22 @@ class HaloPostCreateTool(Tool):
             yield self.create_text_message("📝 正在创建文章...")
             
             # 记录请求数据用于调试
-            logger.info(f"Creating post with data: {json.dumps(post_data, indent=2)}")
+            logger.info(f"Creating post {post_name}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Create payload: {json.dumps(post_data, indent=2)}")
             
             # 使用标准API端点创建文章（基于测试验证的成功方案）
             response = session.post(
                 f"{base_url}/apis/content.halo.run/v1alpha1/posts",
-                data=json.dumps(post_data),
+                data=json_codec.dumps(post_data),
                 timeout=30
             )
             
             # 记录响应用于调试
             logger.info(f"Create post response status: {response.status_code}")
-            logger.info(f"Create post response headers: {dict(response.headers)}")
-            logger.info(f"Create post response body: {response.text}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Create post response headers: {dict(response.headers)}")
+                logger.debug(f"Create post response body: {response.text}")
             
             if response.status_code == 401:
                 yield self.create_text_message("❌ 认证失败，请检查访问令牌")
@@ -520,6 +327,9 @@ class HaloPostCreateTool(Tool):
                     error_detail = response.text
                 yield self.create_text_message(f"❌ 创建文章失败: HTTP {response.status_code} - {error_detail}")
                 return
+
+            # 文章数已变化，统计快照作废
+            invalidate_site_stats(session)
             
             # 解析响应
             try:
@@ -615,22 +425,6 @@ class HaloPostCreateTool(Tool):
                         if update_response.status_code in [200, 201]:
                             yield self.create_text_message("✅ 快照关联成功！")
                             content_set_success = True
-
-                            # 🔧 关键修复：使用正确的发布API
-                            if publish_immediately:
-                                yield self.create_text_message("📤 正在发布文章...")
-
-                                # 使用Halo的发布API
-                                publish_response = session.put(
-                                    f"{base_url}/apis/uc.api.content.halo.run/v1alpha1/posts/{post_name}/publish",
-                                    timeout=30
-                                )
-
-                                if publish_response.status_code in [200, 201]:
-                                    yield self.create_text_message("✅ 文章发布完成！")
-                                else:
-                                    yield self.create_text_message(f"⚠️ 文章发布失败: {publish_response.status_code}")
-                                    logger.warning(f"文章发布失败: {publish_response.text}")
                         else:
                             yield self.create_text_message(f"⚠️ 快照关联失败: {update_response.status_code}")
                             logger.warning(f"快照关联失败: {update_response.text}")
@@ -644,18 +438,20 @@ class HaloPostCreateTool(Tool):
                 logger.warning(f"快照创建过程中出错: {e}")
                 yield self.create_text_message(f"⚠️ 快照创建过程中出错")
 
-
-
-
+            # 精简模式下正文没有随文章写入，快照未关联时退回到 content-json 注解，否则正文无处保存
+            if not content_set_success:
+                if keep_content_annotation(session, base_url, post_name, content_data):
+                    yield self.create_text_message("⚠️ 快照未能关联，正文已保存到 content-json 注解")
+                else:
+                    yield self.create_text_message(
+                        f"❌ 文章 {post_name} 已创建，但正文未能保存到快照或注解，请用 halo-post-update 重新提交内容")
+                    return
             
-            # 如果需要发布，调用发布API
+            # 如果需要发布，调用站点可用的发布API（只发布一次）
             if publish_immediately:
                 try:
                     yield self.create_text_message("🚀 正在发布文章...")
-                    publish_response = session.put(
-                        f"{base_url}/apis/api.console.halo.run/v1alpha1/posts/{post_name}/publish",
-                        timeout=30
-                    )
+                    publish_response = publish_post(session, base_url, post_name)
                     
                     if publish_response.status_code in [200, 201]:
                         yield self.create_text_message("✅ 文章发布成功！")
@@ -7,6 +7,10 @@ import json
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.halo_client import get_session
+from utils.models import Post
+from utils.site_stats import invalidate_site_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,12 +58,7 @@ class HaloPostDeleteTool(Tool):
                 return
             
             # 创建HTTP会话
-            session = requests.Session()
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
             # 先获取文章信息，用于确认和记录
             yield self.create_text_message(f"🔍 正在获取文章 {post_id} 的信息...")
@@ -76,11 +75,11 @@ class HaloPostDeleteTool(Tool):
                 yield self.create_text_message(f"❌ 获取文章信息失败: HTTP {get_response.status_code}")
                 return
             
-            post_data = get_response.json()
-            post_title = post_data.get("spec", {}).get("title", "未知标题")
-            post_published = post_data.get("spec", {}).get("publish", False)
-            post_tags = post_data.get("spec", {}).get("tags", [])
-            post_categories = post_data.get("spec", {}).get("categories", [])
+            post = Post.from_json(get_response.json())
+            post_title = post.title or "未知标题"
+            post_published = post.published
+            post_tags = post.tags
+            post_categories = post.categories
             
             # 显示要删除的文章信息
             yield self.create_text_message(
@@ -117,6 +116,9 @@ class HaloPostDeleteTool(Tool):
                     error_detail = delete_response.text
                 yield self.create_text_message(f"❌ 删除文章失败: HTTP {delete_response.status_code} - {error_detail}")
                 return
+
+            # 文章数已变化，统计快照作废
+            invalidate_site_stats(session)
             
             response_lines = [
                 "✅ **文章删除成功！**",
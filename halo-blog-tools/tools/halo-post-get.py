@@ -6,6 +6,10 @@ import requests
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.category_tree import get_category_tree
+from utils.halo_client import get_session
+from utils.models import Post, Tag
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,12 +48,7 @@ class HaloPostGetTool(Tool):
                 return
             
             # 创建HTTP会话
-            session = requests.Session()
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
             yield self.create_text_message(f"🔍 正在获取文章 {post_id}...")
             
@@ -72,7 +71,7 @@ class HaloPostGetTool(Tool):
                 yield self.create_text_message(f"❌ 获取文章失败: HTTP {response.status_code}")
                 return
             
-            post_data = response.json()
+            post = Post.from_json(response.json())
             
             # 获取文章内容（如果需要）
             content = ""
@@ -88,40 +87,32 @@ class HaloPostGetTool(Tool):
                 except Exception as e:
                     logger.warning(f"Failed to fetch post content: {e}")
             
-            # 解析文章数据
-            spec = post_data.get("spec", {})
-            status = post_data.get("status", {})
-            metadata = post_data.get("metadata", {})
-            
-            # 获取分类名称（而不是ID）
+            # 获取分类名称（而不是ID），从缓存的分类树查找，不再逐个请求
             category_names = []
-            for cat_id in spec.get("categories", []):
-                try:
-                    cat_response = session.get(
-                        f"{base_url}/apis/content.halo.run/v1alpha1/categories/{cat_id}",
-                        timeout=10
-                    )
-                    if cat_response.status_code == 200:
-                        cat_data = cat_response.json()
-                        cat_name = cat_data.get("spec", {}).get("displayName", cat_id)
-                        category_names.append(cat_name)
-                    else:
-                        category_names.append(cat_id)
-                except:
+            category_paths = []
+            try:
+                tree = get_category_tree(session, base_url)
+            except Exception as e:
+                logger.warning(f"Failed to load category tree: {e}")
+                tree = None
+            for cat_id in post.categories:
+                if tree is not None and cat_id in tree:
+                    category_names.append(tree.display_name(cat_id))
+                    category_paths.append(tree.full_path(cat_id))
+                else:
                     category_names.append(cat_id)
+                    category_paths.append(cat_id)
             
             # 获取标签名称（而不是ID）
             tag_names = []
-            for tag_id in spec.get("tags", []):
+            for tag_id in post.tags:
                 try:
                     tag_response = session.get(
                         f"{base_url}/apis/content.halo.run/v1alpha1/tags/{tag_id}",
                         timeout=10
                     )
                     if tag_response.status_code == 200:
-                        tag_data = tag_response.json()
-                        tag_name = tag_data.get("spec", {}).get("displayName", tag_id)
-                        tag_names.append(tag_name)
+                        tag_names.append(Tag.from_json(tag_response.json()).display_name or tag_id)
                     else:
                         tag_names.append(tag_id)
                 except:
@@ -131,27 +122,27 @@ class HaloPostGetTool(Tool):
             response_lines = [
                 "✅ **文章获取成功！**",
                 "",
-                f"📝 **标题**: {spec.get('title', '')}",
-                f"🆔 **ID**: {metadata.get('name', '')}",
-                f"🔗 **别名**: {spec.get('slug', '')}",
-                f"📊 **状态**: {'已发布' if spec.get('publish', False) else '草稿'}",
-                f"📌 **置顶**: {'是' if spec.get('pinned', False) else '否'}",
-                f"💬 **允许评论**: {'是' if spec.get('allowComment', True) else '否'}",
+                f"📝 **标题**: {post.title}",
+                f"🆔 **ID**: {post.name}",
+                f"🔗 **别名**: {post.slug}",
+                f"📊 **状态**: {'已发布' if post.published else '草稿'}",
+                f"📌 **置顶**: {'是' if post.pinned else '否'}",
+                f"💬 **允许评论**: {'是' if post.allow_comment else '否'}",
             ]
             
             if category_names:
-                response_lines.append(f"📁 **分类**: {', '.join(category_names)}")
+                response_lines.append(f"📁 **分类**: {', '.join(category_paths)}")
             
             if tag_names:
                 response_lines.append(f"🏷️ **标签**: {', '.join(tag_names)}")
             
-            excerpt = spec.get("excerpt", {}).get("raw", "")
+            excerpt = post.excerpt_raw
             if excerpt:
                 response_lines.append(f"📄 **摘要**: {excerpt}")
             
             response_lines.extend([
-                f"🕒 **创建时间**: {metadata.get('creationTimestamp', '')}",
-                f"🔄 **修改时间**: {metadata.get('lastModificationTimestamp', '')}",
+                f"🕒 **创建时间**: {post.creation_time or ''}",
+                f"🔄 **修改时间**: {post.modification_time or ''}",
             ])
             
             if include_content and content:
@@ -168,20 +159,21 @@ class HaloPostGetTool(Tool):
             result_info = {
                 "success": True,
                 "post": {
-                    "id": metadata.get('name', ''),
-                    "title": spec.get('title', ''),
-                    "slug": spec.get('slug', ''),
-                    "published": spec.get('publish', False),
-                    "pinned": spec.get('pinned', False),
-                    "allow_comment": spec.get('allowComment', True),
+                    "id": post.name,
+                    "title": post.title,
+                    "slug": post.slug,
+                    "published": post.published,
+                    "pinned": post.pinned,
+                    "allow_comment": post.allow_comment,
                     "tags": tag_names,
-                    "tag_ids": spec.get('tags', []),
+                    "tag_ids": post.tags,
                     "categories": category_names,
-                    "category_ids": spec.get('categories', []),
+                    "category_paths": category_paths,
+                    "category_ids": post.categories,
                     "excerpt": excerpt,
-                    "cover": spec.get('cover', ''),
-                    "created_time": metadata.get('creationTimestamp', ''),
-                    "updated_time": metadata.get('lastModificationTimestamp', ''),
+                    "cover": post.cover,
+                    "created_time": post.creation_time or '',
+                    "updated_time": post.modification_time or '',
                     "content": content if include_content else None
                 }
             }
@@ -5,8 +5,76 @@ from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.halo_client import HaloSession, get_session
+from utils.post_query import (CursorError, PostQueryPlan, cursor_query, execute_post_query, plan_post_query,
+                              read_post_page)
+
 
 class HaloPostListTool(Tool):
+    def _filter_text(self, plan: PostQueryPlan) -> str:
+        """筛选条件摘要"""
+        summary_parts = []
+        
+        if plan.keyword:
+            summary_parts.append(f"关键词'{plan.keyword}'")
+        if plan.category_input:
+            summary_parts.append(f"分类'{plan.category_input}'")
+        if plan.tag_input:
+            summary_parts.append(f"标签'{plan.tag_input}'")
+        if plan.published is not None:
+            status_text = "已发布" if plan.published else "草稿"
+            summary_parts.append(f"状态：{status_text}")
+        
+        filter_text = "，".join(summary_parts)
+        return f"（筛选条件：{filter_text}）" if filter_text else ""
+    
+    def _cursor_page(self, session: HaloSession, base_url: str, plan: PostQueryPlan, size: int,
+                     cursor: str) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        游标模式：按（创建时间, 名称）倒序续读，返回不透明的 next_cursor
+        """
+        try:
+            items, next_cursor, response, api = cursor_query(session, base_url, plan, size, cursor or None)
+        except CursorError as e:
+            yield self.create_text_message(f'❌ {e}')
+            return
+        
+        if response.status_code == 401:
+            yield self.create_text_message('❌ 认证失败，请检查访问令牌是否正确')
+            return
+        elif response.status_code == 403:
+            yield self.create_text_message('❌ 权限不足，请检查访问令牌权限')
+            return
+        elif response.status_code != 200:
+            yield self.create_text_message(f'❌ API请求失败: {response.status_code} - {response.text}')
+            return
+        
+        posts = [post.to_dict() for post in items]
+        summary = (f"成功获取{len(posts)}篇文章{self._filter_text(plan)}。"
+                   + ("还有更多文章，请使用 next_cursor 继续获取。" if next_cursor else "已获取到最后一篇文章。"))
+        unsupported = plan.unsupported(api)
+        if unsupported:
+            summary += f"（当前站点接口不支持按{'、'.join(unsupported)}筛选，已忽略）"
+        
+        yield self.create_text_message(summary)
+        yield self.create_json_message({
+            'success': True,
+            'summary': summary,
+            'posts': posts,
+            'pagination': {
+                'mode': 'cursor',
+                'size': size,
+                'cursor': cursor or None,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            },
+            'filters': {
+                **plan.to_dict(),
+                'api': api,
+                'unsupported': unsupported
+            }
+        })
+    
     def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         获取博客文章列表
@@ -33,18 +101,34 @@ class HaloPostListTool(Tool):
             page = tool_parameters.get('page', 0)
             size = tool_parameters.get('size', 10)
             published = tool_parameters.get('published')
-            keyword = tool_parameters.get('keyword', '').strip()
-            category = tool_parameters.get('category', '').strip()
-            tag = tool_parameters.get('tag', '').strip()
-            
-            # 构建API URL
-            api_url = f"{base_url}/apis/content.halo.run/v1alpha1/posts"
+            keyword = (tool_parameters.get('keyword') or '').strip()
+            category = (tool_parameters.get('category') or '').strip()
+            tag = (tool_parameters.get('tag') or '').strip()
+            cursor = (tool_parameters.get('cursor') or '').strip()
+            cursor_mode = bool(cursor) or tool_parameters.get('pagination') == 'cursor'
+            
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=self.runtime.credentials.get('rate_limit', ''))
+            
+            # 解析分类 / 标签名称并规划查询
+            plan = plan_post_query(session, base_url, keyword=keyword, category=category, tag=tag, published=published)
+            
+            if plan.empty:
+                summary = f"未找到{'、'.join(plan.unresolved)}，没有符合条件的文章。"
+                yield self.create_text_message(summary)
+                yield self.create_json_message({
+                    'success': True,
+                    'summary': summary,
+                    'posts': [],
+                    'pagination': {'page': page, 'size': size, 'total': 0, 'total_pages': 0,
+                                   'has_previous': False, 'has_next': False, 'next_cursor': None},
+                    'filters': plan.to_dict()
+                })
+                return
             
-            # 准备请求头
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+            if cursor_mode:
+                yield from self._cursor_page(session, base_url, plan, size, cursor)
+                return
             
             # 构建查询参数
             params = {
@@ -52,21 +136,8 @@ class HaloPostListTool(Tool):
                 'size': size
             }
             
-            # 添加筛选参数
-            if published is not None:
-                params['published'] = str(published).lower()
-            
-            if keyword:
-                params['keyword'] = keyword
-                
-            if category:
-                params['category'] = category
-                
-            if tag:
-                params['tag'] = tag
-            
-            # 发送请求
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
+            # 发送请求（筛选条件下推到支持它们的接口）
+            response, api = execute_post_query(session, base_url, plan, params)
             
             if response.status_code == 401:
                 yield self.create_text_message('❌ 认证失败，请检查访问令牌是否正确')
@@ -78,35 +149,10 @@ class HaloPostListTool(Tool):
                 yield self.create_text_message(f'❌ API请求失败: {response.status_code} - {response.text}')
                 return
             
-            data = response.json()
+            data = read_post_page(response)
             
             # 格式化文章列表
-            posts = []
-            for item in data.get('items', []):
-                spec = item.get('spec', {})
-                status = item.get('status', {})
-                
-                post = {
-                    'id': item.get('metadata', {}).get('name', ''),
-                    'title': spec.get('title', '未知标题'),
-                    'slug': spec.get('slug', ''),
-                    'excerpt': spec.get('excerpt', ''),
-                    'cover': spec.get('cover', ''),
-                    'published': spec.get('publish', False),
-                    'pinned': spec.get('pinned', False),
-                    'allowComment': spec.get('allowComment', True),
-                    'visible': spec.get('visible', 'PUBLIC'),
-                    'priority': spec.get('priority', 0),
-                    'tags': spec.get('tags', []),
-                    'categories': spec.get('categories', []),
-                    'publishTime': spec.get('publishTime'),
-                    'permalink': status.get('permalink', ''),
-                    'excerpt_from_content': status.get('excerpt', ''),
-                    'word_count': status.get('size', 0),
-                    'creation_time': item.get('metadata', {}).get('creationTimestamp'),
-                    'last_modified': status.get('lastModifyTime')
-                }
-                posts.append(post)
+            posts = [post.to_dict() for post in data.get('items', [])]
             
             # 分页信息
             pagination = {
@@ -119,23 +165,12 @@ class HaloPostListTool(Tool):
             }
             
             # 构建友好的结果摘要
-            summary_parts = []
-            
-            if keyword:
-                summary_parts.append(f"关键词'{keyword}'")
-            if category:
-                summary_parts.append(f"分类'{category}'")
-            if tag:
-                summary_parts.append(f"标签'{tag}'")
-            if published is not None:
-                status_text = "已发布" if published else "草稿"
-                summary_parts.append(f"状态：{status_text}")
-            
-            filter_text = "，".join(summary_parts)
-            if filter_text:
-                filter_text = f"（筛选条件：{filter_text}）"
+            filter_text = self._filter_text(plan)
             
             summary = f"成功获取第{page + 1}页文章列表，共{len(posts)}篇文章{filter_text}。总计{pagination['total']}篇文章，共{pagination['total_pages']}页。"
+            unsupported = plan.unsupported(api)
+            if unsupported:
+                summary += f"（当前站点接口不支持按{'、'.join(unsupported)}筛选，已忽略）"
             
             # 返回文本摘要
             yield self.create_text_message(summary)
@@ -147,10 +182,9 @@ class HaloPostListTool(Tool):
                 'posts': posts,
                 'pagination': pagination,
                 'filters': {
-                    'keyword': keyword,
-                    'category': category,
-                    'tag': tag,
-                    'published': published
+                    **plan.to_dict(),
+                    'api': api,
+                    'unsupported': unsupported
                 }
             }
             yield self.create_json_message(result_data)
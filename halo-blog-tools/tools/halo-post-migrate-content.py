@@ -0,0 +1,288 @@
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Union
+import logging
+import requests
+import threading
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils import json_codec
+from utils.concurrency import AdaptiveConcurrency, map_adaptive
+from utils.halo_client import HaloSession, get_session
+from utils.jobs import Job, drain, manager
+from utils.json_stream import decode_list
+from utils.post_content import CONTENT_JSON_ANNOTATION, POSTS_PATH, fetch_snapshot_content
+from utils.priority import BATCH, current_priority, priority
+from utils.site_stats import cached_site_stats
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = 16
+DEFAULT_CONCURRENCY = 8
+# 扫描文章时每页的数量
+SCAN_PAGE_SIZE = 100
+# 已知文章总数时并发拉取扫描页面的线程数
+SCAN_WORKERS = 4
+# 版本冲突（409）时重新读取文章再写入的次数
+CONFLICT_RETRIES = 3
+
+
+def _annotated(item: dict[str, Any]) -> dict[str, Any]:
+    """扫描结果只保留迁移需要的字段；注解已被替换为正文的字符数"""
+    metadata = item.get('metadata', {})
+    return {
+        "name": metadata.get('name', ''),
+        "title": item.get('spec', {}).get('title', ''),
+        "annotation_chars": (metadata.get('annotations') or {}).get(CONTENT_JSON_ANNOTATION),
+    }
+
+
+def _annotation_raw(value: Optional[str]) -> Optional[str]:
+    """注解中保存的原始正文，无法解析时为 None"""
+    try:
+        data = json_codec.loads(value or '')
+    except ValueError:
+        return None
+    return data.get('raw') if isinstance(data, dict) else None
+
+
+class HaloPostMigrateContentTool(Tool):
+    """移除旧文章中 content-json 注解的迁移工具"""
+
+    def _scan_page(self, session: HaloSession, base_url: str, page: int) -> dict[str, Any]:
+        response = session.get(
+            f"{base_url}{POSTS_PATH}",
+            params={'page': page, 'size': SCAN_PAGE_SIZE, 'sort': 'metadata.creationTimestamp,desc'},
+            timeout=30,
+            stream=True
+        )
+        if response.status_code != 200:
+            response.close()
+            raise RuntimeError(f"获取文章列表失败: HTTP {response.status_code}")
+        return decode_list(response, _annotated, measure_heavy=True)
+
+    def _scan(self, session: HaloSession, base_url: str) -> list[dict[str, Any]]:
+        """
+        扫描全部文章，返回带有 content-json 注解的文章
+
+        缓存中有站点统计快照时按文章总数预估页数并发拉取；快照可能略旧，之后仍按 hasNext 逐页续读。
+        """
+        stats = cached_site_stats(session)
+        pages = range(1, max(-(-stats['posts_total'] // SCAN_PAGE_SIZE), 1) + 1) if stats else range(1, 2)
+        lane = current_priority()
+
+        def fetch(page: int) -> dict[str, Any]:
+            with priority(lane):
+                return self._scan_page(session, base_url, page)
+
+        if len(pages) > 1:
+            with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(pages)),
+                                    thread_name_prefix='halo-migrate-scan') as executor:
+                results = list(executor.map(fetch, pages))
+        else:
+            results = [fetch(pages[0])]
+
+        page = pages[-1]
+        while results[-1].get('hasNext'):
+            page += 1
+            results.append(fetch(page))
+        return [item for data in results for item in data.get('items', []) if item['annotation_chars'] is not None]
+
+    def _strip(self, session: HaloSession, base_url: str, name: str, stop: threading.Event) -> dict[str, Any]:
+        """移除单篇文章的注解，版本冲突时重新读取后重试"""
+        if stop.is_set():
+            return {"ok": False, "status": None, "error": "已取消"}
+
+        url = f"{base_url}{POSTS_PATH}/{name}"
+        for _ in range(CONFLICT_RETRIES + 1):
+            try:
+                response = session.get(url, timeout=30)
+                if response.status_code != 200:
+                    return {"ok": False, "status": response.status_code, "error": "读取文章失败"}
+                post = response.json()
+                annotations = post.get('metadata', {}).get('annotations') or {}
+                if CONTENT_JSON_ANNOTATION not in annotations:
+                    return {"ok": True, "status": response.status_code, "saved_chars": 0}
+                if not post.get('spec', {}).get('headSnapshot'):
+                    # 正文只存在于注解中，移除会丢失内容
+                    return {"ok": False, "skipped": True, "status": None, "error": "文章没有快照，已跳过"}
+                # 旧版更新工具先写注解再创建快照，快照创建失败时注解里才是最新正文
+                snapshot = fetch_snapshot_content(session, base_url, name)
+                if snapshot is None:
+                    return {"ok": False, "status": None, "error": "读取快照正文失败"}
+                if _annotation_raw(annotations[CONTENT_JSON_ANNOTATION]) != snapshot['raw']:
+                    return {"ok": False, "skipped": True, "status": None,
+                            "error": "快照正文与注解不一致，已跳过（请先用 halo-post-update 重新保存正文）"}
+
+                saved = len(annotations.pop(CONTENT_JSON_ANNOTATION) or '')
+                response = session.put(url, data=json_codec.dumps(post), timeout=30)
+            except requests.exceptions.RequestException as e:
+                return {"ok": False, "status": None, "error": str(e)}
+
+            if response.status_code in [200, 201]:
+                return {"ok": True, "status": response.status_code, "saved_chars": saved}
+            if response.status_code == 409:
+                continue
+            if response.status_code in [401, 403]:
+                # 认证或权限问题，剩余文章不再提交
+                stop.set()
+            return {"ok": False, "status": response.status_code, "error": response.text[:200]}
+
+        return {"ok": False, "status": 409, "error": "版本冲突，重试后仍失败"}
+
+    def _run(self, session: HaloSession, base_url: str, dry_run: bool, concurrency: int,
+             job: Optional[Job] = None) -> Generator[Union[str, dict[str, Any]], None, None]:
+        """
+        扫描并迁移文章，依次产出进度文本，最后产出 JSON 汇总
+
+        作为后台任务运行时（job 不为空）同步更新任务进度，任务被取消后不再迁移剩余文章。
+        """
+        yield "🔍 正在扫描文章..."
+        with priority(BATCH):
+            posts = self._scan(session, base_url)
+        total_chars = sum(post['annotation_chars'] for post in posts)
+
+        if not posts:
+            yield "✅ 没有需要迁移的文章，所有文章的正文都只保存在快照中。"
+            yield {
+                "success": True, "dry_run": dry_run, "total": 0, "succeeded": 0, "failed": 0,
+                "saved_chars": 0, "results": []
+            }
+            return
+
+        if dry_run:
+            response_lines = [
+                "🧪 **预览模式，未修改任何文章**",
+                "",
+                f"📊 **待迁移文章**: {len(posts)} 篇",
+                f"📦 **注解中的正文**: {total_chars} 个字符",
+                "",
+                "将 dry_run 设为 false 后重新运行以移除这些注解。",
+            ]
+            yield '\n'.join(response_lines)
+            yield {
+                "success": True, "dry_run": True, "total": len(posts), "succeeded": 0, "failed": 0,
+                "saved_chars": 0, "results": posts
+            }
+            return
+
+        yield f"🚀 开始迁移 {len(posts)} 篇文章（自适应并发，最多 {concurrency}）..."
+
+        # 自适应并发迁移，按完成顺序逐篇返回结果
+        total = len(posts)
+        results: list[dict[str, Any]] = [{} for _ in posts]
+        stop = threading.Event()
+        done = 0
+        controller = AdaptiveConcurrency('post-migrate-content', concurrency)
+        for i, outcome in map_adaptive(lambda post: self._strip(session, base_url, post['name'], stop),
+                                       posts, controller, thread_name_prefix='halo-post-migrate'):
+            result = {"post_id": posts[i]['name'], "title": posts[i]['title'], **outcome}
+            results[i] = result
+            done += 1
+            if job is not None:
+                job.update(done=done, total=total)
+                if job.cancelled:
+                    stop.set()
+            if result["ok"]:
+                yield f"✅ [{done}/{total}] {result['post_id']} {result['title'][:30]}"
+            else:
+                status = f"HTTP {result['status']} - " if result["status"] else ""
+                yield f"❌ [{done}/{total}] {result['post_id']}: {status}{result['error']}"
+
+        succeeded = sum(1 for r in results if r["ok"])
+        skipped = sum(1 for r in results if r.get("skipped"))
+        failed = total - succeeded - skipped
+        saved_chars = sum(r.get("saved_chars", 0) for r in results)
+
+        response_lines = [
+            f"{'✅' if not failed and not skipped else '⚠️'} **迁移完成**",
+            "",
+            f"📊 **总数**: {total}",
+            f"✅ **成功**: {succeeded}",
+            f"⏭️ **跳过**: {skipped}（注解保留，正文与快照不一致或没有快照）",
+            f"❌ **失败**: {failed}",
+            f"📦 **移除的正文**: {saved_chars} 个字符",
+        ]
+        if job is not None and job.cancelled:
+            response_lines.append("⛔ 任务已取消，剩余文章未迁移")
+        elif stop.is_set():
+            response_lines.append("⛔ 认证或权限失败，剩余文章已取消迁移")
+
+        yield '\n'.join(response_lines)
+
+        yield {
+            "success": failed == 0,
+            "dry_run": False,
+            "total": total,
+            "succeeded": succeeded,
+            "skipped": skipped,
+            "failed": failed,
+            "saved_chars": saved_chars,
+            "concurrency": controller.to_dict(),
+            "results": results
+        }
+
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        批量移除旧文章中的 content-json 注解
+
+        Args:
+            tool_parameters: 工具参数
+                - dry_run (bool, optional): 只统计不修改，默认 True
+                - concurrency (int, optional): 并发请求数上限，实际并发按站点响应自适应调整
+                - background (bool, optional): 作为后台任务运行，立即返回任务 ID
+
+        Returns:
+            逐篇返回迁移结果，最后返回汇总；后台运行时返回任务 ID
+        """
+        try:
+            # 获取凭据
+            credentials = self.runtime.credentials
+            base_url = credentials.get("base_url", "").strip().rstrip('/')
+            access_token = credentials.get("access_token", "").strip()
+
+            if not base_url or not access_token:
+                yield self.create_text_message("❌ 缺少必要的连接配置。请先使用设置工具配置 Halo CMS 连接。")
+                return
+
+            # 获取参数
+            dry_run = tool_parameters.get("dry_run")
+            dry_run = True if dry_run is None else bool(dry_run)
+            try:
+                concurrency = int(tool_parameters.get("concurrency") or DEFAULT_CONCURRENCY)
+            except (TypeError, ValueError):
+                concurrency = DEFAULT_CONCURRENCY
+            concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+            background = bool(tool_parameters.get("background"))
+
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
+
+            if background:
+                job = manager.submit(
+                    'halo-post-migrate-content', session.site_key,
+                    lambda job: drain(job, self._run(session, base_url, dry_run, concurrency, job)),
+                    description='扫描待迁移文章' if dry_run else '迁移文章内容'
+                )
+                yield self.create_text_message(
+                    f"🕒 已提交后台任务 {job.id}。使用 halo-job-status 查询进度，halo-job-cancel 取消。"
+                )
+                yield self.create_json_message({"success": True, "job_id": job.id, "status": job.status,
+                                                "dry_run": dry_run})
+                return
+
+            for event in self._run(session, base_url, dry_run, concurrency):
+                if isinstance(event, dict):
+                    yield self.create_json_message(event)
+                else:
+                    yield self.create_text_message(event)
+
+        except requests.exceptions.Timeout:
+            yield self.create_text_message("❌ 请求超时。请检查网络连接或稍后重试。")
+        except requests.exceptions.ConnectionError:
+            yield self.create_text_message("❌ 无法连接到 Halo CMS。请检查网络连接和站点地址。")
+        except Exception as e:
+            logger.error(f"Post migrate content tool error: {e}")
+            yield self.create_text_message(f"❌ 迁移文章内容时发生错误: {str(e)}")
@@ -10,6 +10,14 @@ from datetime import datetime
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils import json_codec
+from utils.capabilities import get_capabilities, publish_post
+from utils.halo_client import get_session
+from utils.models import Post
+from utils.post_content import apply_content_annotation, fetch_post_content, keep_content_annotation
+from utils.site_stats import invalidate_site_stats
+from utils.taxonomy import ensure_terms
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,129 +26,11 @@ class HaloPostUpdateTool(Tool):
     
     def _ensure_tags_exist(self, session: requests.Session, base_url: str, tags: list) -> list:
         """确保标签存在，如果不存在则创建，返回标签ID列表"""
-        existing_tags = []
-        
-        for tag_name in tags:
-            try:
-                # 检查标签是否存在
-                tag_response = session.get(
-                    f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                    timeout=10
-                )
-                
-                if tag_response.status_code == 200:
-                    tag_data = tag_response.json()
-                    items = tag_data.get("items", [])
-                    
-                    # 查找匹配的标签
-                    found_tag = None
-                    for item in items:
-                        if item.get("spec", {}).get("displayName") == tag_name:
-                            found_tag = item.get("metadata", {}).get("name")
-                            break
-                    
-                    if found_tag:
-                        existing_tags.append(found_tag)
-                        logger.info(f"Found existing tag: {tag_name} -> {found_tag}")
-                    else:
-                        # 创建新标签
-                        slug = tag_name.lower().replace(' ', '-').replace('中文', 'chinese')
-                        tag_create_data = {
-                            "apiVersion": "content.halo.run/v1alpha1",
-                            "kind": "Tag",
-                            "metadata": {
-                                "generateName": "tag-"
-                            },
-                            "spec": {
-                                "displayName": tag_name,
-                                "slug": f"{slug}-{int(time.time())}",
-                                "color": "#6366f1",
-                                "cover": ""
-                            }
-                        }
-                        
-                        create_response = session.post(
-                            f"{base_url}/apis/content.halo.run/v1alpha1/tags",
-                            data=json.dumps(tag_create_data),
-                            timeout=10
-                        )
-                        
-                        if create_response.status_code in [200, 201]:
-                            created_tag = create_response.json()
-                            tag_id = created_tag['metadata']['name']
-                            existing_tags.append(tag_id)
-                            logger.info(f"标签 '{tag_name}' 创建成功: {tag_id}")
-                        else:
-                            logger.error(f"标签 '{tag_name}' 创建失败: {create_response.text}")
-                            
-            except Exception as e:
-                logger.error(f"处理标签 '{tag_name}' 时出错: {e}")
-        
-        return existing_tags
+        return [tag.name for tag in ensure_terms(session, base_url, 'tags', tags)]
     
     def _ensure_categories_exist(self, session: requests.Session, base_url: str, categories: list) -> list:
         """确保分类存在，如果不存在则创建，返回分类ID列表"""
-        existing_categories = []
-        
-        for category_name in categories:
-            try:
-                # 检查分类是否存在
-                category_response = session.get(
-                    f"{base_url}/apis/content.halo.run/v1alpha1/categories",
-                    timeout=10
-                )
-                
-                if category_response.status_code == 200:
-                    category_data = category_response.json()
-                    existing_category = None
-                    
-                    # 查找现有分类
-                    for category in category_data.get('items', []):
-                        if category.get('spec', {}).get('displayName') == category_name:
-                            existing_category = category
-                            break
-                    
-                    if existing_category:
-                        existing_categories.append(existing_category['metadata']['name'])
-                        logger.info(f"分类 '{category_name}' 已存在: {existing_category['metadata']['name']}")
-                    else:
-                        # 创建新分类
-                        slug = category_name.lower().replace(' ', '-').replace('中文', 'chinese')
-                        category_create_data = {
-                            "apiVersion": "content.halo.run/v1alpha1",
-                            "kind": "Category",
-                            "metadata": {
-                                "generateName": "category-"
-                            },
-                            "spec": {
-                                "displayName": category_name,
-                                "slug": f"{slug}-{int(time.time())}",
-                                "description": "",
-                                "cover": "",
-                                "template": "",
-                                "priority": 0,
-                                "children": []
-                            }
-                        }
-                        
-                        create_response = session.post(
-                            f"{base_url}/apis/content.halo.run/v1alpha1/categories",
-                            data=json.dumps(category_create_data),
-                            timeout=10
-                        )
-                        
-                        if create_response.status_code in [200, 201]:
-                            created_category = create_response.json()
-                            category_id = created_category['metadata']['name']
-                            existing_categories.append(category_id)
-                            logger.info(f"分类 '{category_name}' 创建成功: {category_id}")
-                        else:
-                            logger.error(f"分类 '{category_name}' 创建失败: {create_response.text}")
-                            
-            except Exception as e:
-                logger.error(f"处理分类 '{category_name}' 时出错: {e}")
-        
-        return existing_categories
+        return [category.name for category in ensure_terms(session, base_url, 'categories', categories)]
     
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
@@ -173,12 +63,7 @@ class HaloPostUpdateTool(Tool):
                 return
             
             # 创建HTTP会话
-            session = requests.Session()
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            session = get_session(base_url, access_token, rate_limit=credentials.get("rate_limit", ""))
             
             yield self.create_text_message(f"🔍 正在获取文章 {post_id} 的当前信息...")
             
@@ -265,7 +150,9 @@ class HaloPostUpdateTool(Tool):
             yield self.create_text_message("📝 正在更新文章基本信息...")
             
             # 记录更新数据用于调试
-            logger.info(f"Updating post {post_id} with data: {json.dumps(update_data, indent=2)}")
+            logger.info(f"Updating post {post_id}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Update payload: {json.dumps(update_data, indent=2)}")
             
             # 准备内容数据（如果需要更新内容）
             content_data = None
@@ -279,23 +166,16 @@ class HaloPostUpdateTool(Tool):
                     }
                 else:
                     yield self.create_text_message("⚙️ 正在准备更新编辑器设置...")
-                    # 尝试从现有annotations中获取内容，如果没有则使用空内容
-                    existing_content_json = current_data.get("metadata", {}).get("annotations", {}).get("content.halo.run/content-json")
-                    if existing_content_json:
-                        try:
-                            existing_content_data = json.loads(existing_content_json)
-                            content_data = existing_content_data
-                        except:
-                            content_data = {"rawType": "markdown", "raw": "", "content": ""}
-                    else:
-                        content_data = {"rawType": "markdown", "raw": "", "content": ""}
+                    # 沿用现有正文（来自快照，旧文章退回到注解），都取不到时使用空内容
+                    content_data = fetch_post_content(session, base_url, current_data) \
+                        or {"rawType": "markdown", "raw": "", "content": ""}
 
                 # 更新annotations以包含编辑器支持
                 if "annotations" not in update_data["metadata"]:
                     update_data["metadata"]["annotations"] = {}
 
-                # 设置编辑器兼容注解
-                update_data["metadata"]["annotations"]["content.halo.run/content-json"] = json.dumps(content_data)
+                # 设置编辑器兼容注解；精简模式下同时移除旧文章中的 content-json
+                apply_content_annotation(update_data["metadata"]["annotations"], content_data)
                 update_data["metadata"]["annotations"]["content.halo.run/preferred-editor"] = editor_type
                 update_data["metadata"]["annotations"]["content.halo.run/content-type"] = "markdown"
 
@@ -303,13 +183,14 @@ class HaloPostUpdateTool(Tool):
             # 发送更新请求
             response = session.put(
                 f"{base_url}/apis/content.halo.run/v1alpha1/posts/{post_id}",
-                data=json.dumps(update_data),
+                data=json_codec.dumps(update_data),
                 timeout=30
             )
             
             # 记录响应用于调试
             logger.info(f"Update post response status: {response.status_code}")
-            logger.info(f"Update post response: {response.text}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Update post response: {response.text}")
             
             if response.status_code == 401:
                 yield self.create_text_message("❌ 认证失败，请检查访问令牌")
@@ -337,12 +218,12 @@ class HaloPostUpdateTool(Tool):
                 return
             
             # 解析响应
-            result = response.json()
-            post_title = result.get("spec", {}).get("title", "")
-            post_categories = result.get("spec", {}).get("categories", [])
-            post_tags = result.get("spec", {}).get("tags", [])
-            post_cover = result.get("spec", {}).get("cover", "")
-            post_published = result.get("spec", {}).get("publish", False)
+            result = Post.from_json(response.json())
+            post_title = result.title
+            post_categories = result.categories
+            post_tags = result.tags
+            post_cover = result.cover
+            post_published = result.published
 
             # 🔧 关键修复：文章更新成功后，正确设置内容
             # 1. 先创建新快照（内容存储）
@@ -431,11 +312,8 @@ class HaloPostUpdateTool(Tool):
                                     if published:
                                         yield self.create_text_message("📤 正在发布文章...")
 
-                                        # 使用Halo的发布API
-                                        publish_response = session.put(
-                                            f"{base_url}/apis/uc.api.content.halo.run/v1alpha1/posts/{post_id}/publish",
-                                            timeout=30
-                                        )
+                                        # 使用站点可用的发布API
+                                        publish_response = publish_post(session, base_url, post_id)
 
                                         if publish_response.status_code in [200, 201]:
                                             yield self.create_text_message("✅ 文章发布完成！")
@@ -445,11 +323,8 @@ class HaloPostUpdateTool(Tool):
                                     else:
                                         yield self.create_text_message("📝 正在取消发布...")
 
-                                        # 使用Halo的取消发布API
-                                        unpublish_response = session.put(
-                                            f"{base_url}/apis/uc.api.content.halo.run/v1alpha1/posts/{post_id}/unpublish",
-                                            timeout=30
-                                        )
+                                        # 使用站点可用的取消发布API
+                                        unpublish_response = publish_post(session, base_url, post_id, publish=False)
 
                                         if unpublish_response.status_code in [200, 201]:
                                             yield self.create_text_message("✅ 文章已设为草稿！")
@@ -469,7 +344,11 @@ class HaloPostUpdateTool(Tool):
                         content_update_success = False
 
                     # 步骤3: 设置Console Content API（编辑器支持）
-                    if content_update_success:
+                    capabilities = get_capabilities(session, base_url)
+                    if content_update_success and capabilities.console_content_put is False:
+                        # 该站点的内容 PUT 始终返回 500，内容已通过快照同步，无需再请求
+                        yield self.create_text_message("✅ 编辑器内容已通过快照同步")
+                    elif content_update_success:
                         yield self.create_text_message("📝 正在设置编辑器内容...")
 
                         content_api_data = {
@@ -486,8 +365,10 @@ class HaloPostUpdateTool(Tool):
 
                         # Console Content API的结果不影响主要功能
                         if content_api_response.status_code in [200, 201]:
+                            capabilities.record('console_content_put', True)
                             yield self.create_text_message("✅ 编辑器内容同步成功！")
                         elif content_api_response.status_code == 500:
+                            capabilities.record('console_content_put', False)
                             yield self.create_text_message("✅ 编辑器内容同步完成（Halo内部处理中）")
                             logger.info(f"Console Content API返回500（正常现象）: {content_api_response.text}")
                         else:
@@ -498,7 +379,20 @@ class HaloPostUpdateTool(Tool):
                     yield self.create_text_message("⚠️ 内容更新过程中出错")
                     logger.warning(f"内容更新出错: {e}")
                     content_update_success = False
+
+                # 精简模式下正文没有随文章写入，快照未关联时退回到 content-json 注解，否则新正文无处保存
+                if not content_update_success:
+                    if keep_content_annotation(session, base_url, post_id, content_data):
+                        yield self.create_text_message("⚠️ 快照未能关联，正文已保存到 content-json 注解")
+                    else:
+                        invalidate_site_stats(session)
+                        yield self.create_text_message(
+                            f"❌ 文章 {post_id} 的基本信息已更新，但正文未能保存到快照或注解，请重新提交内容")
+                        return
             
+            # 发布状态可能已变化，统计快照作废
+            invalidate_site_stats(session)
+
             # 格式化响应 - 根据实际更新结果显示状态
             status_emoji = "🚀" if post_published else "📝"
             status_text = "已发布" if post_published else "草稿"
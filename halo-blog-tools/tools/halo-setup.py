@@ -2,12 +2,14 @@ from collections.abc import Generator
 from typing import Any
 import logging
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.credentials import validate_credentials
+from utils.halo_client import get_session
+from utils.site_stats import get_site_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,102 +42,31 @@ class HaloSetupTool(Tool):
                 yield self.create_text_message("❌ 访问令牌格式无效。令牌长度过短。")
                 return
             
-            # 创建HTTP会话
-            session = requests.Session()
-            
-            # 配置重试策略
-            retry_strategy = Retry(
-                total=2,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-                allowed_methods=["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"]
-            )
-            
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
-            
-            # 设置请求头
-            session.headers.update({
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {access_token}',
-                'User-Agent': 'Dify-Halo-Plugin/1.0'
-            })
+            # 创建HTTP会话（带重试策略）
+            session = get_session(base_url, access_token, retries=2, rate_limit=credentials.get("rate_limit", ""))
             
             yield self.create_text_message("🔍 正在验证连接和令牌...")
             
-            # 严格的token验证 - 尝试访问需要认证的API
-            test_endpoints = [
-                "/apis/content.halo.run/v1alpha1/posts?page=0&size=1",
-                "/apis/api.console.halo.run/v1alpha1/users/-/profile"
-            ]
-            
-            valid_token = False
-            for endpoint in test_endpoints:
-                try:
-                    response = session.get(
-                        f"{base_url.rstrip('/')}{endpoint}",
-                        timeout=15
-                    )
-                    
-                    if response.status_code == 200:
-                        valid_token = True
-                        break
-                    elif response.status_code == 401:
-                        yield self.create_text_message("❌ 访问令牌无效或已过期。请检查令牌是否正确。")
-                        return
-                    elif response.status_code == 403:
-                        yield self.create_text_message("❌ 令牌权限不足。请确保令牌具有以下权限：\n- post:manage（文章管理）\n- moment:manage（动态管理）")
-                        return
-                        
-                except requests.exceptions.ConnectionError:
-                    yield self.create_text_message(f"❌ 无法连接到 {base_url}。请检查URL是否正确，或网络连接。")
-                    return
-                except requests.exceptions.Timeout:
-                    continue
+            # 严格的token验证 - 并发访问需要认证的API，近期验证通过的结果直接复用
+            validation = validate_credentials(base_url, access_token)
             
-            if not valid_token:
+            if validation.status == 'unauthorized':
+                yield self.create_text_message("❌ 访问令牌无效或已过期。请检查令牌是否正确。")
+                return
+            elif validation.status == 'forbidden':
+                yield self.create_text_message("❌ 令牌权限不足。请确保令牌具有以下权限：\n- post:manage（文章管理）\n- moment:manage（动态管理）")
+                return
+            elif validation.status == 'unreachable':
+                yield self.create_text_message(f"❌ 无法连接到 {base_url}。请检查URL是否正确，或网络连接。")
+                return
+            elif not validation.ok:
                 yield self.create_text_message("❌ 令牌验证失败。请检查访问令牌是否有效。")
                 return
             
-            # 获取系统信息
-            posts_total = 0
-            try:
-                posts_response = session.get(
-                    f"{base_url.rstrip('/')}/apis/content.halo.run/v1alpha1/posts?page=0&size=1",
-                    timeout=10
-                )
-                if posts_response.status_code == 200:
-                    posts_data = posts_response.json()
-                    posts_total = posts_data.get("total", 0)
-            except Exception:
-                pass
-            
-            # 获取分类信息
-            categories_total = 0
-            try:
-                cat_response = session.get(
-                    f"{base_url.rstrip('/')}/apis/content.halo.run/v1alpha1/categories?page=0&size=1",
-                    timeout=10
-                )
-                if cat_response.status_code == 200:
-                    cat_data = cat_response.json()
-                    categories_total = cat_data.get("total", 0)
-            except Exception:
-                pass
-            
-            # 获取动态信息
-            moments_total = 0
-            try:
-                moment_response = session.get(
-                    f"{base_url.rstrip('/')}/apis/moment.halo.run/v1alpha1/moments?page=0&size=1",
-                    timeout=10
-                )
-                if moment_response.status_code == 200:
-                    moment_data = moment_response.json()
-                    moments_total = moment_data.get("total", 0)
-            except Exception:
-                pass
+            # 获取系统统计（并发请求，按站点缓存）
+            stats = get_site_stats(session, base_url)
+            moments_line = (f"- 动态总数: {stats['moments_total']}" if stats['moments_available']
+                            else "- 动态总数: 未检测到动态插件")
             
             # 格式化响应
             response_lines = [
@@ -146,9 +77,10 @@ class HaloSetupTool(Tool):
                 f"- 认证状态: 已验证 ✓",
                 "",
                 "📊 **系统统计**",
-                f"- 分类数量: {categories_total}",
-                f"- 文章总数: {posts_total}",
-                f"- 动态总数: {moments_total}",
+                f"- 分类数量: {stats['categories_total']}",
+                f"- 标签数量: {stats['tags_total']}",
+                f"- 文章总数: {stats['posts_total']}（已发布 {stats['posts_published']}，草稿 {stats['posts_draft']}）",
+                moments_line,
                 "",
                 "🔧 **可用功能**",
                 "- ✅ 文章管理 (创建、读取、更新、删除、列表)",
@@ -166,10 +98,16 @@ class HaloSetupTool(Tool):
                 "base_url": base_url,
                 "authenticated": True,
                 "token_validated": True,
+                "validated_at": validation.checked_at,
                 "system_stats": {
-                    "categories_count": categories_total,
-                    "posts_total": posts_total,
-                    "moments_total": moments_total
+                    "categories_count": stats['categories_total'],
+                    "tags_count": stats['tags_total'],
+                    "posts_total": stats['posts_total'],
+                    "posts_published": stats['posts_published'],
+                    "posts_draft": stats['posts_draft'],
+                    "moments_total": stats['moments_total'],
+                    "moments_available": stats['moments_available'],
+                    "fetched_at": stats['fetched_at']
                 }
             }
             
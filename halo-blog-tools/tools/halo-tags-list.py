@@ -4,6 +4,13 @@ from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.halo_client import get_session
+from utils.models import Tag
+from utils.tag_stats import get_tag_statistics
+
+# 统计模式最多返回的热门标签数
+MAX_TOP_K = 100
+
 
 class HaloTagsListTool(Tool):
     def _invoke(self, tool_parameters: Dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
@@ -31,16 +38,46 @@ class HaloTagsListTool(Tool):
             # 获取参数
             page = tool_parameters.get('page', 0)
             size = tool_parameters.get('size', 50)  # 标签通常数量较多，默认获取50个
-            keyword = tool_parameters.get('keyword', '').strip()
+            keyword = (tool_parameters.get('keyword') or '').strip()
+            mode = tool_parameters.get('mode') or 'page'
             
             # 构建API URL
             api_url = f"{base_url}/apis/content.halo.run/v1alpha1/tags"
             
-            # 准备请求头
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+            # 创建HTTP会话
+            session = get_session(base_url, access_token, rate_limit=self.runtime.credentials.get('rate_limit', ''))
+            
+            if mode == 'statistics':
+                # 全站统计：基于缓存的全部标签增量计算
+                try:
+                    top_k = int(tool_parameters.get('top_k') or 10)
+                except (TypeError, ValueError):
+                    top_k = 10
+                top_k = max(1, min(top_k, MAX_TOP_K))
+                try:
+                    stats = get_tag_statistics(session, base_url, refresh=bool(tool_parameters.get('refresh')))
+                except requests.exceptions.HTTPError as e:
+                    status_code = e.response.status_code if e.response is not None else None
+                    if status_code == 401:
+                        yield self.create_text_message('认证失败，请检查访问令牌是否正确')
+                    elif status_code == 403:
+                        yield self.create_text_message('权限不足，请检查访问令牌权限')
+                    else:
+                        yield self.create_text_message(f'API请求失败: {status_code}')
+                    return
+                
+                statistics = stats.to_dict(top_k)
+                popular_text = "、".join(f"{tag['name']}({tag['post_count']})" for tag in statistics['popular_tags'][:5])
+                summary = (f"全站共{statistics['total_tags']}个标签，其中{statistics['tags_with_posts']}个有文章，"
+                           f"标签关联文章共{statistics['total_posts_in_tags']}篇次。"
+                           + (f"热门标签：{popular_text}。" if popular_text else ""))
+                
+                yield self.create_json_message({
+                    'success': True,
+                    'summary': summary,
+                    'statistics': statistics
+                })
+                return
             
             # 构建查询参数
             params = {
@@ -52,7 +89,7 @@ class HaloTagsListTool(Tool):
                 params['keyword'] = keyword
             
             # 发送请求
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
+            response = session.get(api_url, params=params, timeout=30)
             
             if response.status_code == 401:
                 yield self.create_text_message('认证失败，请检查访问令牌是否正确')
@@ -67,26 +104,7 @@ class HaloTagsListTool(Tool):
             data = response.json()
             
             # 格式化标签列表
-            tags = []
-            for item in data.get('items', []):
-                spec = item.get('spec', {})
-                status = item.get('status', {})
-                metadata = item.get('metadata', {})
-                
-                tag = {
-                    'id': metadata.get('name', ''),
-                    'name': spec.get('displayName', ''),
-                    'slug': spec.get('slug', ''),
-                    'description': spec.get('description', ''),
-                    'cover': spec.get('cover', ''),
-                    'color': spec.get('color', ''),
-                    'visible_in_list': spec.get('visibleInList', True),
-                    'permalink': status.get('permalink', ''),
-                    'post_count': status.get('postCount', 0),
-                    'visible_post_count': status.get('visiblePostCount', 0),
-                    'creation_time': metadata.get('creationTimestamp')
-                }
-                tags.append(tag)
+            tags = [Tag.from_json(item).to_dict() for item in data.get('items', [])]
             
             # 分页信息
             pagination = {
@@ -117,6 +135,8 @@ class HaloTagsListTool(Tool):
                 'tags': tags,
                 'pagination': pagination,
                 'statistics': {
+                    # 仅统计当前页，全站统计请使用 mode=statistics
+                    'scope': 'page',
                     'total_tags': len(tags),
                     'tags_with_posts': tags_with_posts,
                     'total_posts_in_tags': total_posts,
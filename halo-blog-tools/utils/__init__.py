@@ -0,0 +1,5 @@
+"""
+Halo plugin shared helpers.
+
+工具和 Provider 共用的 HTTP 客户端、指标等基础组件。
+"""
@@ -0,0 +1,205 @@
+"""
+站点 API 能力探测
+
+不同 Halo 版本和插件组合暴露的接口不同。工具原先靠“依次尝试、失败再换”的
+方式兼容，每次调用都要为失败的分支付出请求。这里对每个站点探测一次：
+
+- 可用的用户信息端点
+- Console API（api.console.halo.run）与 UC API（uc.api.content.halo.run）是否可用
+- 是否安装了动态插件（moment.halo.run）
+
+探测结果按站点缓存；运行中学到的信息（如 Console 内容 PUT 是否总是返回 500，
+动态插件是否提供 Console 列表接口）也写回能力表，之后的调用直接走可用的端点。
+能力表同时写入持久化缓存，插件重启后直接恢复，不再重新探测。
+"""
+
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+import requests
+
+from utils import disk_cache
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession
+from utils.owner import prime_current_user, user_endpoint
+
+logger = logging.getLogger(__name__)
+
+CAPABILITIES_TTL = 3600
+
+# 能力 -> 探测用的只读请求
+GROUP_PROBES = {
+    'console_api': '/apis/api.console.halo.run/v1alpha1/posts?page=0&size=1',
+    'uc_api': '/apis/uc.api.content.halo.run/v1alpha1/posts?page=0&size=1',
+    'moment_plugin': '/apis/moment.halo.run/v1alpha1/moments?page=0&size=1',
+}
+
+# 发布接口，按优先顺序排列：Console API 可发布任意文章，UC API 仅限本人文章
+PUBLISH_APIS = {
+    'console': ('console_api', '/apis/api.console.halo.run/v1alpha1/posts/{name}/{action}'),
+    'uc': ('uc_api', '/apis/uc.api.content.halo.run/v1alpha1/posts/{name}/{action}'),
+}
+
+# 持久化的能力字段，增删字段时旧记录按版本戳失效
+PERSISTED_FIELDS = ('user_endpoint', 'owner', 'console_api', 'uc_api', 'moment_plugin',
+                    'console_content_put', 'moment_console_api', 'probed_at')
+PERSIST_VERSION = str(len(PERSISTED_FIELDS))
+
+_capabilities_cache = TTLCache('capabilities', ttl=CAPABILITIES_TTL)
+
+
+class SiteCapabilities:
+    """
+    单个站点的能力表
+
+    布尔能力为 None 表示探测未得出结论（如超时或无权限），调用方应按可用处理。
+    """
+
+    def __init__(self):
+        self.user_endpoint: Optional[str] = None
+        self.owner: Optional[str] = None
+        self.console_api: Optional[bool] = None
+        self.uc_api: Optional[bool] = None
+        self.moment_plugin: Optional[bool] = None
+        # Console 内容 PUT 是否可用；None 表示尚未尝试
+        self.console_content_put: Optional[bool] = None
+        # 动态插件的 Console 列表接口（支持服务端筛选）是否可用；None 表示尚未尝试
+        self.moment_console_api: Optional[bool] = None
+        self.probed_at = time.time()
+        # 所属站点，运行中学到的能力据此写回持久化缓存
+        self.site_key = ''
+        self._lock = threading.Lock()
+
+    def publish_candidates(self) -> list[str]:
+        """按优先顺序返回值得尝试的发布接口"""
+        order = list(PUBLISH_APIS)
+        usable = [api for api in order if getattr(self, PUBLISH_APIS[api][0]) is not False]
+        return usable or order
+
+    def record(self, capability: str, available: bool) -> None:
+        """记录运行中学到的能力"""
+        with self._lock:
+            changed = getattr(self, capability) != available
+            if changed:
+                logger.info(f"Capability {capability} -> {available}")
+            setattr(self, capability, available)
+        if changed:
+            self.persist()
+
+    def persist(self) -> None:
+        """写入持久化缓存，剩余有效期与内存缓存一致"""
+        ttl = self.probed_at + CAPABILITIES_TTL - time.time()
+        if self.site_key and ttl > 0:
+            disk_cache.store('capabilities', self.site_key,
+                             {field: getattr(self, field) for field in PERSISTED_FIELDS}, ttl, PERSIST_VERSION)
+
+    @classmethod
+    def restore(cls, site_key: str) -> Optional['SiteCapabilities']:
+        """从持久化缓存恢复"""
+        persisted = disk_cache.load('capabilities', site_key, PERSIST_VERSION)
+        if persisted is None:
+            return None
+        capabilities = cls()
+        for field in PERSISTED_FIELDS:
+            setattr(capabilities, field, persisted.get(field))
+        capabilities.site_key = site_key
+        return capabilities
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'user_endpoint': self.user_endpoint,
+            'owner': self.owner,
+            'console_api': self.console_api,
+            'uc_api': self.uc_api,
+            'moment_plugin': self.moment_plugin,
+            'console_content_put': self.console_content_put,
+            'moment_console_api': self.moment_console_api,
+            'publish_api': self.publish_candidates()[0],
+            'probed_at': self.probed_at,
+        }
+
+
+def _probe_group(session: HaloSession, base_url: str, path: str, timeout: Any) -> Optional[bool]:
+    try:
+        response = session.get(f"{base_url}{path}", timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Capability probe {path} failed: {e}")
+        return None
+    if response.status_code == 200:
+        return True
+    if response.status_code in (404, 405):
+        return False
+    return None
+
+
+def discover_capabilities(session: HaloSession, base_url: str, timeout: Any = (3, 10)) -> SiteCapabilities:
+    """并发探测站点能力并写入缓存"""
+    base_url = base_url.rstrip('/')
+    capabilities = SiteCapabilities()
+
+    with ThreadPoolExecutor(max_workers=len(GROUP_PROBES) + 1, thread_name_prefix='halo-probe') as executor:
+        owner_future = executor.submit(prime_current_user, session, base_url, timeout)
+        futures = {name: executor.submit(_probe_group, session, base_url, path, timeout)
+                   for name, path in GROUP_PROBES.items()}
+        for name, future in futures.items():
+            setattr(capabilities, name, future.result())
+        capabilities.owner = owner_future.result() or None
+        capabilities.user_endpoint = user_endpoint(session)
+
+    logger.info(f"Discovered capabilities for {base_url}: {capabilities.to_dict()}")
+    if session.site_key:
+        capabilities.site_key = session.site_key
+        _capabilities_cache.set(session.site_key, capabilities)
+        capabilities.persist()
+    return capabilities
+
+
+def get_capabilities(session: HaloSession, base_url: str, refresh: bool = False) -> SiteCapabilities:
+    """获取站点能力表（缓存 CAPABILITIES_TTL 秒）"""
+    if not refresh:
+        capabilities = cached_capabilities(session)
+        if capabilities is not None:
+            return capabilities
+    return discover_capabilities(session, base_url)
+
+
+def cached_capabilities(session: HaloSession) -> Optional[SiteCapabilities]:
+    """仅查缓存（内存，其次持久化缓存），不发请求"""
+    if not session.site_key:
+        return None
+    capabilities = _capabilities_cache.get(session.site_key)
+    if capabilities is None:
+        capabilities = SiteCapabilities.restore(session.site_key)
+        if capabilities is not None:
+            ttl = capabilities.probed_at + CAPABILITIES_TTL - time.time()
+            _capabilities_cache.set(session.site_key, capabilities, ttl=ttl)
+    return capabilities
+
+
+def publish_post(session: HaloSession, base_url: str, name: str, publish: bool = True,
+                 timeout: float = 30) -> Optional[requests.Response]:
+    """
+    发布或取消发布文章，直接使用站点可用的发布接口
+
+    只有在接口组未被确认可用且返回 404/405 时才换下一个接口，
+    因此“文章不存在”的 404 不会触发重复请求。
+
+    Returns:
+        最后一次请求的响应
+    """
+    capabilities = get_capabilities(session, base_url)
+    action = 'publish' if publish else 'unpublish'
+    response = None
+    for api in capabilities.publish_candidates():
+        capability, path = PUBLISH_APIS[api]
+        response = session.put(f"{base_url}{path.format(name=name, action=action)}", timeout=timeout)
+        if response.status_code in (404, 405) and getattr(capabilities, capability) is not True:
+            capabilities.record(capability, False)
+            continue
+        if response.status_code in (200, 201):
+            capabilities.record(capability, True)
+        return response
+    return response
@@ -0,0 +1,212 @@
+"""
+分类树索引
+
+Halo 的分类层级只记录在父分类的 spec.children 里，列表接口返回的是扁平分页。
+这里基于缓存的全站分类索引一次性建树，并预先算好每个分类的祖先、后代、完整路径
+和含子分类的文章数，查询都是字典查找。分类索引刷新或写入新分类后自动重建。
+"""
+
+from typing import Any, Optional
+import threading
+
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession
+from utils.models import Category
+from utils.taxonomy import get_index
+
+PATH_SEPARATOR = ' / '
+
+# 树跟随分类索引重建，这里的 TTL 只用于回收不再访问的站点
+_tree_cache = TTLCache('category_tree', ttl=3600)
+
+
+class CategoryTree:
+    """单个站点的分类树"""
+
+    def __init__(self, items: list[Category]):
+        self._items: dict[str, Category] = {}
+        self._parent: dict[str, Optional[str]] = {}
+        self._children: dict[str, list[str]] = {}
+        self._ancestors: dict[str, tuple[str, ...]] = {}
+        self._descendants: dict[str, frozenset[str]] = {}
+        self._paths: dict[str, str] = {}
+        self._aggregated: dict[str, int] = {}
+        self._by_path: dict[str, str] = {}
+        self._by_display_name: dict[str, str] = {}
+        # 先序遍历位置，用于按树的顺序输出子孙分类
+        self._position: dict[str, int] = {}
+        self._build(items)
+
+    def _build(self, items: list[Category]) -> None:
+        for item in items:
+            name = item.name
+            if name:
+                self._items[name] = item
+                self._children[name] = []
+                if item.display_name:
+                    self._by_display_name.setdefault(item.display_name, name)
+
+        # 层级以父分类的 children 为准，兼容个别版本在子分类上写 parent
+        for name, item in self._items.items():
+            for child in item.children:
+                if child in self._items and child != name and child not in self._parent:
+                    self._parent[child] = name
+            parent = item.parent
+            if parent in self._items and parent != name:
+                self._parent.setdefault(name, parent)
+
+        # 祖先链上出现环时在该处断开，避免无限递归
+        for name in self._items:
+            seen = {name}
+            parent = self._parent.get(name)
+            while parent is not None:
+                if parent in seen:
+                    self._parent[name] = None
+                    break
+                seen.add(parent)
+                parent = self._parent.get(parent)
+
+        for name in self._items:
+            parent = self._parent.get(name)
+            if parent is not None:
+                self._children[parent].append(name)
+        for children in self._children.values():
+            children.sort(key=self._sort_key)
+
+        # 自根向下算祖先和路径，自底向上算后代和文章数
+        order: list[str] = []
+        stack = [(root, ()) for root in reversed(self.roots())]
+        while stack:
+            name, ancestors = stack.pop()
+            order.append(name)
+            self._ancestors[name] = ancestors
+            display_names = [self.display_name(a) for a in ancestors] + [self.display_name(name)]
+            self._paths[name] = PATH_SEPARATOR.join(display_names)
+            self._by_path.setdefault(self._paths[name], name)
+            stack.extend((child, ancestors + (name,)) for child in reversed(self._children[name]))
+
+        self._position = {name: i for i, name in enumerate(order)}
+        for name in reversed(order):
+            descendants: set[str] = set()
+            aggregated = self.post_count(name)
+            for child in self._children[name]:
+                descendants.add(child)
+                descendants.update(self._descendants[child])
+                aggregated += self._aggregated[child]
+            self._descendants[name] = frozenset(descendants)
+            self._aggregated[name] = aggregated
+
+    def _sort_key(self, name: str) -> tuple[int, str]:
+        return (self._items[name].priority, name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def get(self, name: str) -> Optional[Category]:
+        return self._items.get(name)
+
+    def display_name(self, name: str) -> str:
+        return self._items[name].display_name or name
+
+    def post_count(self, name: str) -> int:
+        """分类自身的文章数"""
+        return self._items[name].post_count
+
+    def roots(self) -> list[str]:
+        return sorted((name for name in self._items if self._parent.get(name) is None), key=self._sort_key)
+
+    def parent(self, name: str) -> Optional[str]:
+        return self._parent.get(name)
+
+    def children(self, name: str) -> list[str]:
+        return list(self._children.get(name, []))
+
+    def ancestors(self, name: str) -> tuple[str, ...]:
+        """从根到父分类的祖先链"""
+        return self._ancestors.get(name, ())
+
+    def descendants(self, name: str) -> frozenset[str]:
+        """全部子孙分类（不含自身）"""
+        return self._descendants.get(name, frozenset())
+
+    def full_path(self, name: str) -> str:
+        """如“技术 / 后端 / Python”"""
+        return self._paths.get(name, name)
+
+    def aggregated_post_count(self, name: str) -> int:
+        """自身及全部子孙分类的文章数之和（同一篇文章属于多个子分类时按篇次计）"""
+        return self._aggregated.get(name, 0)
+
+    def resolve(self, value: str) -> Optional[str]:
+        """按 metadata.name、完整路径或显示名称查找分类，返回 metadata.name"""
+        value = value.strip()
+        if value in self._items:
+            return value
+        if value in self._by_path:
+            return self._by_path[value]
+        normalized = PATH_SEPARATOR.join(part.strip() for part in value.split('/'))
+        if normalized in self._by_path:
+            return self._by_path[normalized]
+        return self._by_display_name.get(value)
+
+    def expand(self, names: list[str]) -> list[str]:
+        """把分类扩展为自身及全部子孙分类，保持输入顺序并去重"""
+        expanded: dict[str, None] = {}
+        for name in names:
+            if name in self._items:
+                expanded[name] = None
+                expanded.update(dict.fromkeys(sorted(self._descendants[name], key=self._position.__getitem__)))
+        return list(expanded)
+
+    def node(self, name: str) -> dict[str, Any]:
+        """单个分类的层级信息"""
+        return {
+            'id': name,
+            'name': self.display_name(name),
+            'parent': self._parent.get(name),
+            'ancestors': list(self.ancestors(name)),
+            'depth': len(self.ancestors(name)),
+            'full_path': self.full_path(name),
+            'post_count': self.post_count(name),
+            'aggregated_post_count': self.aggregated_post_count(name),
+            'descendant_count': len(self.descendants(name)),
+        }
+
+    def to_tree(self) -> list[dict[str, Any]]:
+        """嵌套结构的分类树，按 priority 排序"""
+        def build(name: str) -> dict[str, Any]:
+            node = self.node(name)
+            node['children'] = [build(child) for child in self._children[name]]
+            return node
+
+        return [build(root) for root in self.roots()]
+
+
+_build_lock = threading.Lock()
+
+
+def get_category_tree(session: HaloSession, base_url: str, refresh: bool = False) -> CategoryTree:
+    """
+    获取站点的分类树
+
+    分类索引在缓存期内不发请求；索引变化（刷新或新建分类）后重建。
+    """
+    index = get_index(session, base_url, 'categories', refresh=refresh)
+    marker = (id(index), index.revision)
+    if not session.site_key:
+        return CategoryTree(index.items())
+
+    with _build_lock:
+        cached = _tree_cache.get(session.site_key)
+        if cached is not None and cached[0] == marker:
+            return cached[1]
+        tree = CategoryTree(index.items())
+        _tree_cache.set(session.site_key, (marker, tree))
+    return tree
+
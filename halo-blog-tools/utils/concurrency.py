@@ -0,0 +1,143 @@
+"""
+批量操作的自适应并发（AIMD）
+
+批量创建动态、迁移文章、创建一批新标签等操作要发出大量相互独立的请求。固定并发数
+在性能好的站点上太慢，在小站点上又会把它压垮。``AdaptiveConcurrency`` 维护一个并发
+窗口，根据每个请求的结果调整：
+
+- 延迟保持平稳时增大窗口：起步阶段每成功一个请求加 SLOW_START_STEP，第一次降窗之后
+  每轮（一个窗口的请求）只加一
+- 延迟明显高于基线（平滑延迟超过最低延迟的 LATENCY_TOLERANCE 倍）、5xx、429 或网络
+  错误时，窗口乘以 DECREASE_FACTOR；降窗之前已经发出的请求不再触发降窗
+
+信号来自 ``utils.halo_client``：``map_adaptive`` 执行任务时把控制器登记到当前线程，
+会话每发出一个请求就把延迟和状态码交给它。当前窗口通过 ``halo_concurrency_window``
+指标（按操作名区分）暴露给 halo-metrics。
+"""
+
+from typing import Any, Callable, Iterator, Optional, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+from utils.metrics import registry
+from utils.priority import BATCH, priority
+
+INITIAL_WINDOW = 2
+# 起步阶段每成功一个请求增加的窗口（每轮约增大一半）；每个加一会在响应变慢前冲过头
+SLOW_START_STEP = 0.5
+# 平滑延迟超过基线的倍数视为过载
+LATENCY_TOLERANCE = 1.5
+# 延迟比基线高出不到该秒数时不视为过载，避免毫秒级延迟的抖动触发降窗
+LATENCY_FLOOR = 0.02
+DECREASE_FACTOR = 0.5
+# 平滑延迟的权重
+EWMA_WEIGHT = 0.2
+
+_local = threading.local()
+
+
+class AdaptiveConcurrency:
+    """一次批量操作的并发窗口"""
+
+    def __init__(self, operation: str, maximum: int, initial: int = INITIAL_WINDOW, minimum: int = 1):
+        self.operation = operation
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self._window = float(min(max(initial, self.minimum), self.maximum))
+        self._lock = threading.Lock()
+        self._baseline: Optional[float] = None
+        self._smoothed: Optional[float] = None
+        # 上一次降窗的时刻；在此之前发出的请求不再触发降窗
+        self._cut_at = 0.0
+        self._slow_start = True
+        self.peak = int(self._window)
+        self.cuts = 0
+        self._gauge = registry.gauge('halo_concurrency_window', operation=operation)
+        self._gauge.set(int(self._window))
+
+    @property
+    def window(self) -> int:
+        return int(self._window)
+
+    def observe(self, started: float, latency: float, status: Optional[int]) -> None:
+        """
+        记录一个请求的结果
+
+        Args:
+            started: 发出请求时的 ``time.perf_counter()``
+            latency: 请求耗时（秒）
+            status: HTTP 状态码，网络错误时为 None
+        """
+        overloaded = status is None or status == 429 or status >= 500
+        with self._lock:
+            if not overloaded:
+                self._baseline = latency if self._baseline is None else min(self._baseline, latency)
+                self._smoothed = latency if self._smoothed is None else \
+                    self._smoothed + EWMA_WEIGHT * (latency - self._smoothed)
+                # 起步阶段窗口增长很快，直接看单次延迟，避免平滑延迟滞后导致窗口冲过头
+                current = latency if self._slow_start else self._smoothed
+                overloaded = (current > self._baseline * LATENCY_TOLERANCE
+                              and current - self._baseline > LATENCY_FLOOR)
+
+            if overloaded:
+                if started < self._cut_at:
+                    return
+                self._window = max(float(self.minimum), self._window * DECREASE_FACTOR)
+                self._cut_at = time.perf_counter()
+                # 降窗前积压的延迟不再计入，平滑延迟从降窗后的请求重新开始
+                self._smoothed = None
+                self._slow_start = False
+                self.cuts += 1
+            elif self._slow_start:
+                self._window = min(float(self.maximum), self._window + SLOW_START_STEP)
+            else:
+                self._window = min(float(self.maximum), self._window + 1 / self._window)
+            self.peak = max(self.peak, int(self._window))
+            self._gauge.set(int(self._window))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'maximum': self.maximum,
+            'window': self.window,
+            'peak': self.peak,
+            'cuts': self.cuts,
+        }
+
+
+def observe_request(started: float, latency: float, status: Optional[int]) -> None:
+    """由会话调用：当前线程正在执行自适应并发任务时，把请求结果交给其控制器"""
+    controller = getattr(_local, 'controller', None)
+    if controller is not None:
+        controller.observe(started, latency, status)
+
+
+def map_adaptive(func: Callable[[Any], Any], items: Sequence[Any], controller: AdaptiveConcurrency,
+                 thread_name_prefix: str = 'halo-adaptive', lane: str = BATCH) -> Iterator[tuple[int, Any]]:
+    """
+    以自适应窗口并发执行 ``func(item)``
+
+    Args:
+        lane: 任务中发出的请求所属的优先级通道（见 ``utils.priority``），默认为批量通道
+
+    Returns:
+        按完成顺序产出 (下标, 结果)
+    """
+    def run(item: Any) -> Any:
+        _local.controller = controller
+        try:
+            with priority(lane):
+                return func(item)
+        finally:
+            _local.controller = None
+
+    with ThreadPoolExecutor(max_workers=controller.maximum, thread_name_prefix=thread_name_prefix) as executor:
+        pending: dict = {}
+        next_index = 0
+        while next_index < len(items) or pending:
+            while next_index < len(items) and len(pending) < controller.window:
+                pending[executor.submit(run, items[next_index])] = next_index
+                next_index += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
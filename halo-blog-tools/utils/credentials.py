@@ -0,0 +1,155 @@
+"""
+凭据验证
+
+并发探测多个需要认证的接口，任意一个给出确定结论（200/401/403）即返回，
+不再等待其余请求；连接超时较短，宕机的主机不会把验证拖到几十秒。
+验证通过的结果按站点（base_url + 令牌摘要）缓存，Provider 和 halo-setup 共用；
+任一工具用该令牌收到 401（例如令牌已被吊销）时立即作废。
+"""
+
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+import logging
+import time
+
+import requests
+
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession, get_session, on_unauthorized, site_key
+
+logger = logging.getLogger(__name__)
+
+PROBE_ENDPOINTS = [
+    '/apis/content.halo.run/v1alpha1/posts?page=0&size=1',
+    '/apis/content.halo.run/v1alpha1/categories?page=0&size=1'
+]
+
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 10.0
+# 整体验证耗时上限
+DEFAULT_DEADLINE = 12.0
+VALIDATION_TTL = 300
+
+# 没有任何探测成功时，按此顺序挑选最能说明问题的失败原因
+_FAILURE_PRIORITY = ('unreachable', 'timeout', 'not_found', 'error')
+
+_validation_cache = TTLCache('credentials', ttl=VALIDATION_TTL)
+
+
+class ValidationResult:
+    """
+    一次凭据验证的结论
+
+    status 取值：valid / unauthorized / forbidden / not_found / unreachable / timeout / error
+    """
+
+    def __init__(self, status: str, message: str = '', endpoint: str = '', status_code: Optional[int] = None):
+        self.status = status
+        self.message = message
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.checked_at = time.time()
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'valid'
+
+    @property
+    def decisive(self) -> bool:
+        """令牌有效或被明确拒绝，无需再等其他探测"""
+        return self.status in ('valid', 'unauthorized', 'forbidden')
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'status': self.status,
+            'message': self.message,
+            'endpoint': self.endpoint,
+            'status_code': self.status_code,
+            'checked_at': self.checked_at,
+        }
+
+
+def _probe(session: HaloSession, base_url: str, endpoint: str) -> ValidationResult:
+    try:
+        response = session.get(f"{base_url}{endpoint}", timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    except requests.exceptions.Timeout:
+        return ValidationResult('timeout', '连接超时', endpoint)
+    except requests.exceptions.ConnectionError:
+        return ValidationResult('unreachable', '无法连接到Halo CMS服务器', endpoint)
+    except requests.exceptions.RequestException as e:
+        return ValidationResult('error', f"网络请求失败: {str(e)}", endpoint)
+
+    code = response.status_code
+    if code == 200:
+        return ValidationResult('valid', '', endpoint, code)
+    if code == 401:
+        return ValidationResult('unauthorized', '访问令牌无效或已过期', endpoint, code)
+    if code == 403:
+        return ValidationResult('forbidden', '访问令牌权限不足', endpoint, code)
+    if code == 404:
+        # 404可能表示Halo版本不兼容或API路径错误
+        return ValidationResult('not_found', f"API端点不存在 ({code})", endpoint, code)
+    return ValidationResult('error', f"API返回错误状态码: {code}", endpoint, code)
+
+
+def validate_credentials(base_url: str, access_token: str, use_cache: bool = True,
+                         deadline: float = DEFAULT_DEADLINE) -> ValidationResult:
+    """
+    验证 Halo 站点地址和访问令牌
+
+    Args:
+        base_url: Halo 站点地址
+        access_token: Halo 个人访问令牌
+        use_cache: 是否直接使用 VALIDATION_TTL 内的成功结果
+        deadline: 整体耗时上限（秒）
+
+    Returns:
+        ValidationResult；仅成功结果会被缓存
+    """
+    base_url = base_url.strip().rstrip('/')
+    key = site_key(base_url, access_token)
+    if use_cache:
+        cached = _validation_cache.get(key)
+        if cached is not None:
+            return cached
+
+    session = get_session(base_url, access_token)
+    executor = ThreadPoolExecutor(max_workers=len(PROBE_ENDPOINTS), thread_name_prefix='halo-validate')
+    failures: list[ValidationResult] = []
+    result = None
+    try:
+        futures = [executor.submit(_probe, session, base_url, endpoint) for endpoint in PROBE_ENDPOINTS]
+        for future in as_completed(futures, timeout=deadline):
+            probe = future.result()
+            if probe.decisive:
+                result = probe
+                break
+            failures.append(probe)
+    except FuturesTimeoutError:
+        failures.append(ValidationResult('timeout', '连接超时'))
+    finally:
+        # 已有结论时不等待仍在进行的探测
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if result is None:
+        failures.sort(key=lambda f: _FAILURE_PRIORITY.index(f.status))
+        result = failures[0]
+
+    if result.ok:
+        _validation_cache.set(key, result)
+    logger.info(f"Credential validation for {base_url}: {result.status} {result.endpoint}")
+    return result
+
+
+def forget_credentials(base_url: str, access_token: str) -> None:
+    """丢弃站点缓存的验证结果（例如令牌被吊销后）"""
+    _forget_site(site_key(base_url.strip().rstrip('/'), access_token))
+
+
+def _forget_site(key: str) -> None:
+    if key:
+        _validation_cache.invalidate(key)
+
+
+# 任一会话收到 401 说明令牌已失效，缓存的“有效”结论不能再用
+on_unauthorized(_forget_site)
@@ -0,0 +1,249 @@
+"""
+持久化元数据缓存
+
+进程内缓存在插件重新部署或重启后全部丢失，第一次调用又要重新查询用户、能力表和
+标签/分类索引。这里把这些元数据写入插件工作目录下的 SQLite 文件，重启后先读磁盘：
+
+- 每条记录有独立的过期时间，过期记录在读取时删除
+- 每条记录可带版本戳（如 Halo 资源的 metadata.version 或数据结构版本），
+  读取时版本不一致视为未命中
+- 文件总大小超过上限时按最近访问时间淘汰
+
+缓存是可选的：HALO_DISK_CACHE=false 关闭，HALO_DISK_CACHE_PATH 指定文件位置。
+文件无法打开或读写出错时自动停用，只记录日志，工具照常走网络请求。
+"""
+
+from typing import Any, Hashable, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILENAME = '.halo_cache.sqlite3'
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# 表结构或序列化方式变化时加一，旧文件中的记录全部丢弃
+CACHE_FORMAT = 1
+# 超过上限时淘汰到上限的这个比例，避免每次写入都触发淘汰
+EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    version TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def disk_cache_enabled() -> bool:
+    """HALO_DISK_CACHE=false 时关闭持久化缓存"""
+    return os.getenv('HALO_DISK_CACHE', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def disk_cache_path() -> str:
+    """缓存文件位置，默认在插件工作目录下"""
+    return os.getenv('HALO_DISK_CACHE_PATH') or os.path.join(os.getcwd(), DEFAULT_FILENAME)
+
+
+class DiskCache:
+    """基于 SQLite 的持久化缓存，值以 JSON 保存"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None or row[0] != str(CACHE_FORMAT):
+            self._conn.execute('DELETE FROM entries')
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('format', ?)", (str(CACHE_FORMAT),))
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def get(self, namespace: str, key: Hashable, version: Optional[str] = None) -> Any:
+        """
+        读取未过期的记录
+
+        Args:
+            version: 期望的版本戳；给出时与记录的版本不一致视为未命中
+
+        Returns:
+            记录的值，未命中时为 None
+        """
+        key = str(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, version, expires_at FROM entries WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+            value = None
+            if row is not None:
+                if row[2] < now or (version is not None and row[1] != version):
+                    self._delete(namespace, key)
+                else:
+                    self._conn.execute('UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                                       (now, namespace, key))
+                    value = json.loads(row[0])
+        registry.record_cache(f"disk:{namespace}", value is not None)
+        return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float, version: Optional[str] = None) -> None:
+        """写入记录，超过容量上限时淘汰最久未访问的记录"""
+        self.set_many(namespace, [(key, value, version)], ttl)
+
+    def set_many(self, namespace: str, entries: list[tuple[Hashable, Any, Optional[str]]], ttl: float) -> None:
+        """在一个事务中写入多条 (key, value, version) 记录"""
+        rows = [(str(key), json.dumps(value, ensure_ascii=False, separators=(',', ':')), version)
+                for key, value, version in entries]
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for key, encoded, version in rows:
+                    self._delete(namespace, key)
+                    self._conn.execute(
+                        'INSERT INTO entries (namespace, key, value, version, size, stored_at, expires_at, accessed_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (namespace, key, encoded, version, len(encoded), now, now + ttl, now)
+                    )
+                    self._size += len(encoded)
+                if self._size > self.max_bytes:
+                    self._evict(now)
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+                raise
+
+    def invalidate(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        """删除一条记录；不给 key 时删除整个命名空间"""
+        with self._lock:
+            if key is None:
+                self._conn.execute('DELETE FROM entries WHERE namespace = ?', (namespace,))
+                self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            else:
+                self._delete(namespace, str(key))
+
+    def _delete(self, namespace: str, key: str) -> None:
+        row = self._conn.execute('SELECT size FROM entries WHERE namespace = ? AND key = ?',
+                                 (namespace, key)).fetchone()
+        if row is not None:
+            self._conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+            self._size -= row[0]
+
+    def _evict(self, now: float) -> None:
+        """先删过期记录，仍超限时按最近访问时间从旧到新删除"""
+        self._conn.execute('DELETE FROM entries WHERE expires_at < ?', (now,))
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        target = self.max_bytes * EVICT_TARGET
+        if self._size <= target:
+            return
+        evicted = 0
+        rows = self._conn.execute('SELECT namespace, key, size FROM entries ORDER BY accessed_at').fetchall()
+        for namespace, key, size in rows:
+            if self._size <= target:
+                break
+            self._conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+            self._size -= size
+            evicted += 1
+        logger.info(f"Disk cache evicted {evicted} entries, {self._size} bytes remain")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace'
+            ).fetchall()
+        return {
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'namespaces': {namespace: {'entries': count, 'bytes': size} for namespace, count, size in rows},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_failed = False
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """进程共享的持久化缓存；未启用或无法打开时返回 None"""
+    global _disk_cache, _disk_cache_failed
+    if _disk_cache is not None or _disk_cache_failed:
+        return _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None and not _disk_cache_failed:
+            if not disk_cache_enabled():
+                _disk_cache_failed = True
+                return None
+            path = disk_cache_path()
+            try:
+                _disk_cache = DiskCache(path)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Disk cache disabled, cannot open {path}: {e}")
+                _disk_cache_failed = True
+    return _disk_cache
+
+
+def _disable(e: Exception) -> None:
+    global _disk_cache, _disk_cache_failed
+    logger.warning(f"Disk cache disabled after error: {e}")
+    with _disk_cache_lock:
+        _disk_cache, _disk_cache_failed = None, True
+
+
+def load(namespace: str, key: Hashable, version: Optional[str] = None) -> Any:
+    """读取持久化记录；缓存未启用、未命中或出错时返回 None"""
+    cache = get_disk_cache()
+    if cache is None or not key:
+        return None
+    try:
+        return cache.get(namespace, key, version)
+    except (sqlite3.Error, ValueError) as e:
+        _disable(e)
+        return None
+
+
+def store(namespace: str, key: Hashable, value: Any, ttl: float, version: Optional[str] = None) -> None:
+    """写入持久化记录；缓存未启用或出错时忽略"""
+    cache = get_disk_cache()
+    if cache is None or not key:
+        return
+    try:
+        cache.set(namespace, key, value, ttl, version)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        _disable(e)
+
+
+def discard(namespace: str, key: Optional[Hashable] = None) -> None:
+    """删除持久化记录；缓存未启用或出错时忽略"""
+    cache = get_disk_cache()
+    if cache is None:
+        return
+    try:
+        cache.invalidate(namespace, key)
+    except sqlite3.Error as e:
+        _disable(e)
@@ -0,0 +1,300 @@
+"""
+Halo HTTP 客户端
+
+所有工具和 Provider 通过 ``get_session`` 获取会话，统一设置认证头，
+并把每一次请求的耗时、状态码、重试次数上报到进程级指标注册表。
+
+同一站点（base_url + 令牌）的会话在进程内复用，工具调用之间共享连接池，
+避免每次调用都重新建立 TCP/TLS 连接。
+
+工作流并行分支常在同一时刻发出完全相同的读请求（同一篇文章、同一页标签）。
+会话对 GET 做单飞合并：按 URL + 查询参数（含请求头覆盖）识别，已有相同请求在途时
+后来者不再发请求，等待同一次响应。每个调用方拿到各自的 Response 副本（共享已读取的
+响应体），解析结果互不影响，调用方修改返回的 dict 也不会串到别的分支。等待者最多等待
+自己的 ``timeout``（连接与读取超时之和），超时抛出 ``requests.exceptions.Timeout``。
+
+请求体和响应体的 JSON 编解码走 ``utils.json_codec``：``json=`` 参数由会话编码成 bytes，
+返回的响应是 ``HaloResponse``，其 ``.json()`` 直接解析响应体字节。
+
+批量操作（``utils.concurrency.map_adaptive``）中发出的请求，其延迟和状态码会交给
+该操作的自适应并发控制器。
+
+每个请求发送前先经过站点的令牌桶（``utils.rate_limit``）；站点返回 429 时按 ``Retry-After``
+暂停并降速，随后重新发送，最多 RATE_LIMIT_RETRIES 次。
+
+会话收到 401 时通知 ``on_unauthorized`` 登记的回调（参数为站点标识），令牌被吊销后
+缓存的验证结果等依赖令牌有效性的状态可以立即作废。
+
+拿到令牌后再在会话的优先级通道（``utils.priority``）中占用槽位，槽位只在实际发送期间占用：
+限流等待和 429 暂停期间不占槽位，交互工具的预留槽位不会被正在等待的批量请求占住。
+"""
+
+from typing import Any, Callable, Optional
+from http.cookiejar import DefaultCookiePolicy
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import json_codec
+from utils.concurrency import observe_request
+from utils.metrics import endpoint_label, registry
+from utils.priority import LaneScheduler, create_scheduler, current_priority
+from utils.rate_limit import RateLimiter, limiter_for, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Dify-Halo-Plugin/1.0'
+
+# 每个站点连接池保留的最大空闲连接数
+POOL_MAXSIZE = 32
+# 收到 429 后等待并重新发送的次数
+RATE_LIMIT_RETRIES = 3
+
+_sessions: dict[tuple[str, Optional[int]], 'HaloSession'] = {}
+_sessions_lock = threading.Lock()
+# 会话收到 401 时调用的回调
+_unauthorized_listeners: list[Callable[[str], None]] = []
+
+
+def on_unauthorized(callback: Callable[[str], None]) -> None:
+    """登记回调：任一共享会话收到 401 时以其站点标识（``site_key``）调用"""
+    _unauthorized_listeners.append(callback)
+
+
+class _MetricsRetry(Retry):
+    """每次触发重试时记录到指标"""
+
+    def increment(self, method=None, url=None, *args, **kwargs):
+        if method and url:
+            registry.record_retry(endpoint_label(method, url))
+        return super().increment(method, url, *args, **kwargs)
+
+
+# 这些参数会改变请求内容或响应的读取方式，带上它们的请求不参与合并
+_UNCOALESCABLE = ('data', 'json', 'files', 'stream', 'hooks', 'auth', 'cookies', 'proxies', 'verify', 'cert')
+
+
+class _Flight:
+    """一个进行中的读请求"""
+
+    __slots__ = ('done', 'response', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+def _wait_timeout(timeout: Any) -> Optional[float]:
+    """等待合并请求的秒数：requests 的 timeout 可以是秒数或 (连接, 读取) 元组"""
+    if isinstance(timeout, tuple):
+        if any(part is None for part in timeout):
+            return None
+        return float(sum(timeout))
+    return None if timeout is None else float(timeout)
+
+
+def _share(response: requests.Response) -> requests.Response:
+    """复制响应对象给等待者，响应体已读入内存，副本共享同一份字节"""
+    shared = copy.copy(response)
+    # CaseInsensitiveDict 的浅拷贝仍共享内部字典，需用它自己的 copy()
+    shared.headers = response.headers.copy()
+    return shared
+
+
+class HaloResponse(requests.Response):
+    """``.json()`` 使用 ``json_codec`` 直接解析响应体字节（Halo 始终返回 UTF-8 JSON）"""
+
+    def json(self, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().json(**kwargs)
+        try:
+            return json_codec.loads(self.content or b"")
+        except ValueError as e:
+            # 与 requests 一致，抛出 requests.exceptions.JSONDecodeError（同时也是 ValueError）
+            raise requests.exceptions.JSONDecodeError(getattr(e, 'msg', str(e)), getattr(e, 'doc', ''),
+                                                      getattr(e, 'pos', 0))
+
+
+class HaloSession(requests.Session):
+    """带指标上报和读请求合并的 requests 会话"""
+
+    # 站点标识，缓存按此区分不同站点和令牌；未通过 get_session 创建时为空，不参与缓存
+    site_key: str = ''
+    # 是否合并并发的相同 GET 请求
+    coalesce_reads: bool = True
+    # 站点限流器；未通过 get_session 创建时为空，不限流
+    limiter: Optional[RateLimiter] = None
+    # 在途请求槽位；为空时不限制
+    lanes: Optional[LaneScheduler] = None
+
+    def __init__(self):
+        super().__init__()
+        self._flights: dict[tuple, _Flight] = {}
+        self._flights_lock = threading.Lock()
+
+    def _flight_key(self, method: str, url: str, kwargs: dict[str, Any]) -> Optional[tuple]:
+        if not self.coalesce_reads or method.upper() != 'GET' or any(kwargs.get(k) for k in _UNCOALESCABLE):
+            return None
+        prepared = requests.models.PreparedRequest()
+        prepared.prepare_url(url, kwargs.get('params'))
+        headers = kwargs.get('headers')
+        return prepared.url, tuple(sorted(headers.items())) if headers else ()
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        if kwargs.get('json') is not None and not args and kwargs.get('data') is None:
+            kwargs['data'] = json_codec.dumps(kwargs.pop('json'))
+        # 位置参数（params 之后的各项）不好识别，只合并按关键字传参的请求
+        key = None if args else self._flight_key(method, url, kwargs)
+        if key is None:
+            return self._request(method, url, *args, **kwargs)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            registry.record_coalesced(endpoint_label(method, url))
+            if not flight.done.wait(_wait_timeout(kwargs.get('timeout'))):
+                raise requests.exceptions.Timeout(f"Timed out waiting for in-flight request to {url}")
+            if flight.error is not None:
+                raise flight.error
+            return _share(flight.response)
+
+        try:
+            flight.response = self._request(method, url, **kwargs)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        limiter = self.limiter
+        if limiter is None:
+            return self._in_lane(method, url, *args, **kwargs)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            limiter.acquire()
+            response = self._in_lane(method, url, *args, **kwargs)
+            if response.status_code != 429:
+                limiter.completed()
+                return response
+            # 429 表示站点没有处理该请求，写请求同样可以重新发送
+            limiter.throttle(parse_retry_after(response.headers.get('Retry-After')))
+            registry.record_throttled(endpoint_label(method, url))
+            if attempt < RATE_LIMIT_RETRIES:
+                response.close()
+        return response
+
+    def _in_lane(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        """在优先级通道中占用一个槽位发送请求"""
+        lanes = self.lanes
+        if lanes is None:
+            return self._send(method, url, *args, **kwargs)
+        lane = current_priority()
+        lanes.acquire(lane)
+        try:
+            return self._send(method, url, *args, **kwargs)
+        finally:
+            lanes.release(lane)
+
+    def _send(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        endpoint = endpoint_label(method, url)
+        in_flight = registry.in_flight()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            elapsed = time.perf_counter() - start
+            registry.record_request(endpoint, None, elapsed, error=type(e).__name__)
+            observe_request(start, elapsed, None)
+            raise
+        finally:
+            in_flight.dec()
+
+        elapsed = time.perf_counter() - start
+        registry.record_request(endpoint, response.status_code, elapsed)
+        observe_request(start, elapsed, response.status_code)
+        if response.status_code == 401 and self.site_key:
+            for callback in _unauthorized_listeners:
+                callback(self.site_key)
+        response.__class__ = HaloResponse
+        return response
+
+
+def create_session(access_token: str, retries: Optional[int] = None) -> HaloSession:
+    """
+    创建已配置认证头的 Halo 会话
+
+    Args:
+        access_token: Halo 个人访问令牌
+        retries: 对幂等请求和 5xx 的重试次数，None 表示不重试
+    """
+    session = HaloSession()
+
+    retry_strategy = 0
+    if retries:
+        retry_strategy = _MetricsRetry(
+            total=retries,
+            backoff_factor=1,
+            # 429 由会话的限流器处理
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"]
+        )
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=retry_strategy)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.lanes = create_scheduler(POOL_MAXSIZE)
+    # 使用令牌认证，不保存服务端下发的 Cookie，避免共享会话在调用之间串状态
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {access_token}',
+        'User-Agent': USER_AGENT
+    })
+    return session
+
+
+def site_key(base_url: str, access_token: str) -> str:
+    """站点标识：base_url 加令牌摘要，令牌本身不出现在缓存键中"""
+    digest = hashlib.sha256(access_token.encode('utf-8')).hexdigest()[:16]
+    return f"{base_url.rstrip('/')}#{digest}"
+
+
+def get_session(base_url: str, access_token: str, retries: Optional[int] = None,
+                rate_limit: Any = None) -> HaloSession:
+    """
+    获取站点共享的 Halo 会话（进程内按 base_url + 令牌 + 重试策略复用）
+
+    Args:
+        base_url: Halo 站点地址
+        access_token: Halo 个人访问令牌
+        retries: 同 ``create_session``
+        rate_limit: 凭据中的 ``rate_limit``（每秒请求数），为空时使用 HALO_RATE_LIMIT
+    """
+    limiter = limiter_for(base_url, rate_limit)
+    key = (site_key(base_url, access_token), retries)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = create_session(access_token, retries)
+                session.site_key = key[0]
+                session.limiter = limiter
+                _sessions[key] = session
+    return session
@@ -0,0 +1,385 @@
+"""
+后台任务
+
+插件清单限定单次工具调用 120 秒（manifest.yaml 的 ``timeout``）。几千条动态的批量创建、
+全站文章迁移这类操作跑不完就会被中途切断，留下做了一半的状态。
+
+需要长时间运行的工具可以改为提交后台任务：``manager.submit`` 立即返回任务 ID，任务在
+进程内的工作线程池（HALO_JOB_WORKERS 个线程，默认 2）中以批量优先级通道执行，调用
+方通过 halo-job-status 查询进度、halo-job-cancel 取消。
+
+- 任务状态和进度写入单独的 SQLite 文件（HALO_JOBS_PATH，默认为工作目录下的
+  ``.halo_jobs.sqlite3``），不受 HALO_DISK_CACHE 影响，也不参与元数据缓存的容量淘汰；
+  记录保留 JOB_TTL，每个站点只保留最近 MAX_JOBS_PER_SITE 个已结束的任务，进行中的任务
+  不会被清理。插件重启后仍可查询，重启前仍在运行、之后不再更新的任务显示为 interrupted
+- 文件无法打开或读写出错时只记录日志，任务状态退回到只保存在进程内存中
+- 任务按站点标识（base_url + 令牌摘要）隔离，只能查询和取消同一站点凭据提交的任务
+- 取消是协作式的：任务函数通过 ``job.cancelled`` 检查，已经发出的请求不会被中断
+"""
+
+from typing import Any, Callable, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.priority import BATCH, priority
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILENAME = '.halo_jobs.sqlite3'
+# 任务记录最后一次更新后的保留时间
+JOB_TTL = 7 * 24 * 3600
+# 每个站点保留的最近任务数
+MAX_JOBS_PER_SITE = 20
+# 运行中的任务最多每隔这么多秒写一次进度
+PERSIST_INTERVAL = 1.0
+# 持久化记录显示为运行中、但超过这么多秒没有更新，视为进程已退出
+STALE_SECONDS = 120
+DEFAULT_WORKERS = 2
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+INTERRUPTED = 'interrupted'
+ACTIVE = (QUEUED, RUNNING)
+STATUS_LABELS = {
+    QUEUED: '排队中',
+    RUNNING: '运行中',
+    SUCCEEDED: '已完成',
+    FAILED: '失败',
+    CANCELLED: '已取消',
+    INTERRUPTED: '已中断（插件进程重启）',
+}
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    record TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_site ON jobs (site, created_at);
+"""
+
+
+def jobs_path() -> str:
+    """任务记录文件位置，默认在插件工作目录下；``:memory:`` 表示不写文件"""
+    return os.getenv('HALO_JOBS_PATH') or os.path.join(os.getcwd(), DEFAULT_FILENAME)
+
+
+class JobStore:
+    """任务记录的 SQLite 存储，只按保留时间和每站点数量清理已结束的任务"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def save(self, record: dict[str, Any]) -> None:
+        encoded = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO jobs (id, site, status, record, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (record['job_id'], record['site'], record['status'], encoded,
+                 record['created_at'], record['updated_at'])
+            )
+
+    def load(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT record FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def recent(self, site: str, limit: int) -> list[str]:
+        """站点最近的任务 ID，新提交的在前"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id FROM jobs WHERE site = ? ORDER BY created_at DESC LIMIT ?', (site, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, site: str, keep: int) -> None:
+        """删除超过 JOB_TTL 未更新的记录，以及站点超出 ``keep`` 个的已结束任务"""
+        placeholders = ', '.join('?' for _ in ACTIVE)
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE updated_at < ?', (time.time() - JOB_TTL,))
+            self._conn.execute(
+                f'DELETE FROM jobs WHERE site = ? AND status NOT IN ({placeholders}) AND id NOT IN '
+                '(SELECT id FROM jobs WHERE site = ? ORDER BY created_at DESC LIMIT ?)',
+                (site, *ACTIVE, site, keep)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[JobStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[JobStore]:
+    """进程共享的任务存储；无法打开时返回 None，任务只保存在内存中"""
+    global _store, _store_failed
+    if _store is not None or _store_failed:
+        return _store
+    with _store_lock:
+        if _store is None and not _store_failed:
+            path = jobs_path()
+            try:
+                _store = JobStore(path)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Job store disabled, cannot open {path}: {e}")
+                _store_failed = True
+    return _store
+
+
+def _store_call(method: str, *args: Any) -> Any:
+    """调用任务存储；存储不可用或出错时返回 None，出错后本进程不再使用存储"""
+    global _store, _store_failed
+    store = get_store()
+    if store is None:
+        return None
+    try:
+        return getattr(store, method)(*args)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        logger.warning(f"Job store disabled after error: {e}")
+        with _store_lock:
+            _store, _store_failed = None, True
+        return None
+
+
+def new_job_id() -> str:
+    return f"job-{uuid.uuid4().hex[:12]}"
+
+
+def _workers() -> int:
+    try:
+        return max(1, int(os.getenv('HALO_JOB_WORKERS', '') or DEFAULT_WORKERS))
+    except ValueError:
+        logger.warning(f"Ignoring invalid HALO_JOB_WORKERS={os.getenv('HALO_JOB_WORKERS')!r}")
+        return DEFAULT_WORKERS
+
+
+class Job:
+    """一个后台任务及其进度"""
+
+    def __init__(self, kind: str, site: str, total: int = 0, description: str = ''):
+        self.id = new_job_id()
+        self.kind = kind
+        self.site = site
+        self.description = description
+        self.status = QUEUED
+        self.done = 0
+        self.total = total
+        self.message = ''
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.updated_at = self.created_at
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._persisted_at = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel.is_set()
+
+    def update(self, done: Optional[int] = None, total: Optional[int] = None,
+               message: Optional[str] = None) -> None:
+        """更新进度，按 PERSIST_INTERVAL 节流写入持久化缓存"""
+        with self._lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+            self.updated_at = time.time()
+            due = self.updated_at - self._persisted_at >= PERSIST_INTERVAL
+        if due:
+            self.persist()
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'site': self.site,
+                'description': self.description,
+                'status': self.status,
+                'done': self.done,
+                'total': self.total,
+                'progress': round(self.done / self.total, 4) if self.total else None,
+                'message': self.message,
+                'cancel_requested': self.cancelled,
+                'error': self.error,
+                'result': self.result,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'updated_at': self.updated_at,
+            }
+
+    def persist(self) -> None:
+        record = self.to_dict()
+        self._persisted_at = time.time()
+        _store_call('save', record)
+
+    def _transition(self, status: str, **fields: Any) -> None:
+        with self._lock:
+            self.status = status
+            now = time.time()
+            if status == RUNNING:
+                self.started_at = now
+            elif status not in ACTIVE:
+                self.finished_at = now
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated_at = now
+        self.persist()
+
+
+def public_view(record: dict[str, Any]) -> dict[str, Any]:
+    """返回给工具调用方的任务信息（去掉内部的站点标识）"""
+    return {key: value for key, value in record.items() if key != 'site'}
+
+
+class JobManager:
+    """进程内的后台任务池"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: dict[str, Job] = {}
+        # 站点标识 -> 最近的任务 ID，新提交的在前
+        self._recent: dict[str, list[str]] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='halo-job')
+            return self._executor
+
+    def submit(self, kind: str, site: str, func: Callable[[Job], Any], total: int = 0,
+               description: str = '') -> Job:
+        """
+        提交后台任务
+
+        Args:
+            kind: 任务类型，一般是工具名
+            site: 站点标识（``HaloSession.site_key``）
+            func: 任务函数，接收 Job，返回值作为任务结果（需可 JSON 序列化）
+            total: 预计处理的条目数
+        """
+        job = Job(kind, site, total, description)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.persist()
+        self._remember(site, job.id)
+        self._get_executor().submit(self._run, job, func)
+        logger.info(f"Queued background job {job.id} ({kind}, {total} items)")
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        if job.cancelled:
+            # 排队期间被取消
+            if job.status != CANCELLED:
+                job._transition(CANCELLED)
+            return
+        job._transition(RUNNING)
+        try:
+            with priority(BATCH):
+                result = func(job)
+        except Exception as e:
+            logger.error(f"Background job {job.id} failed: {e}")
+            job._transition(FAILED, error=str(e))
+            return
+        job._transition(CANCELLED if job.cancelled else SUCCEEDED, result=result)
+        logger.info(f"Background job {job.id} finished: {job.status}")
+
+    def _remember(self, site: str, job_id: str) -> None:
+        """把任务加入站点最近任务列表，清理存储中多余的已结束任务"""
+        _store_call('prune', site, MAX_JOBS_PER_SITE)
+        with self._lock:
+            ids = list(dict.fromkeys([job_id] + self._recent.get(site, [])))[:MAX_JOBS_PER_SITE]
+            self._recent[site] = ids
+            # 只保留本站点最近的任务对象
+            for old in [i for i, job in self._jobs.items()
+                        if job.site == site and i not in ids and job.status not in ACTIVE]:
+                del self._jobs[old]
+
+    def get(self, job_id: str, site: str) -> Optional[dict[str, Any]]:
+        """查询任务；不存在或不属于该站点时返回 None"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict() if job.site == site else None
+        record = _store_call('load', job_id)
+        if not isinstance(record, dict) or record.get('site') != site:
+            return None
+        if record.get('status') in ACTIVE and time.time() - record.get('updated_at', 0) > STALE_SECONDS:
+            record = {**record, 'status': INTERRUPTED}
+        return record
+
+    def list(self, site: str) -> list[dict[str, Any]]:
+        """站点最近的任务，新提交的在前"""
+        persisted = _store_call('recent', site, MAX_JOBS_PER_SITE) or []
+        with self._lock:
+            ids = list(dict.fromkeys(self._recent.get(site, []) + persisted))
+        records = [record for record in (self.get(job_id, site) for job_id in ids) if record is not None]
+        records.sort(key=lambda record: record.get('created_at', 0), reverse=True)
+        return records[:MAX_JOBS_PER_SITE]
+
+    def cancel(self, job_id: str, site: str) -> Union[Job, dict[str, Any], None]:
+        """
+        请求取消任务
+
+        Returns:
+            当前进程中的 Job（已请求取消）；任务只存在于持久化记录中（其它进程或重启前提交）
+            时返回其记录，无法取消；不存在或不属于该站点时返回 None
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.site != site:
+            return self.get(job_id, site)
+        if job.status in ACTIVE:
+            job._cancel.set()
+            if job.status == QUEUED:
+                job._transition(CANCELLED)
+            else:
+                job.update(message='已请求取消')
+        return job
+
+
+def drain(job: Job, events: Iterable[Union[str, dict[str, Any]]]) -> Optional[dict[str, Any]]:
+    """
+    在后台执行工具的事件生成器
+
+    文本事件记为任务的最新消息，dict 事件作为任务结果。
+    """
+    result = None
+    for event in events:
+        if isinstance(event, dict):
+            result = event
+        else:
+            job.update(message=event)
+    return result
+
+
+manager = JobManager()
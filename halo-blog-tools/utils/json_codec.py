@@ -0,0 +1,68 @@
+"""
+JSON 编解码
+
+请求体原先由各工具 ``json.dumps(...)`` 拼成 str，再由 requests 编码成 bytes 发送；
+响应由 ``response.json()`` 先把响应体解码成 str 再解析。长文章和大列表页上，
+标准库编解码和这两次 str/bytes 转换是工具 CPU 时间的主要部分。
+
+这里统一提供 ``dumps`` / ``loads``：
+
+- 安装了 orjson 时使用 orjson，``dumps`` 直接返回 UTF-8 bytes，``loads`` 直接解析 bytes
+- 否则退回标准库，``dumps`` 同样返回 bytes（紧凑格式；非 ASCII 字符仍转义，标准库在
+  ``ensure_ascii=False`` 时编码大段中文反而更慢）
+
+设置 HALO_JSON_CODEC=stdlib 可强制使用标准库。共享会话（``utils.halo_client``）的
+``json=`` 请求体和 ``response.json()`` 都走这里，工具拼请求体时用 ``dumps``。
+"""
+
+from typing import Any, Union
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':')).encode('ascii')
+
+
+def _stdlib_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        # orjson 不支持的情况（非字符串键、超出 64 位的整数等）交给标准库
+        return _stdlib_dumps(obj)
+
+
+def _select() -> str:
+    wanted = os.getenv('HALO_JSON_CODEC', 'auto').strip().lower()
+    if wanted == 'stdlib':
+        return 'stdlib'
+    if orjson is None:
+        if wanted == 'orjson':
+            logger.warning("HALO_JSON_CODEC=orjson but orjson is not installed, falling back to stdlib json")
+        return 'stdlib'
+    return 'orjson'
+
+
+# 当前使用的实现：'orjson' 或 'stdlib'
+BACKEND = _select()
+
+if BACKEND == 'orjson':
+    dumps = _orjson_dumps
+    loads = orjson.loads
+else:
+    dumps = _stdlib_dumps
+    loads = _stdlib_loads
@@ -0,0 +1,174 @@
+"""
+列表响应的流式解码
+
+Halo 的列表接口返回 ``{"page": .., "items": [..], ...}``。文章条目带着完整的
+``content.halo.run/content-json`` 注解（旧版本的 post-create 把整篇正文写在里面），
+``response.json()`` 会一次性把整页正文解析成字符串，工具再从中挑出少数字段。
+
+这里边读响应体边逐条解码 ``items``：每条解码时就丢掉不需要的大字段，随后交给投影
+函数转换，整页原始结构和响应体都不会同时留在内存里。只用标准库的
+``json.JSONDecoder.raw_decode``，不引入额外依赖。
+"""
+
+from typing import Any, Callable, Iterator, Optional
+import codecs
+import json
+
+import requests
+
+# 读取响应体的块大小
+CHUNK_SIZE = 64 * 1024
+# 列表条目中不会被任何工具使用、但可能很大的注解
+HEAVY_ANNOTATIONS = ('content.halo.run/content-json',)
+
+_WHITESPACE = ' \t\n\r'
+# 数字之后只能出现的字符
+_DELIMITERS = _WHITESPACE + ',]}'
+
+
+def _drop_heavy(obj: dict[str, Any]) -> dict[str, Any]:
+    for key in HEAVY_ANNOTATIONS:
+        if key in obj:
+            del obj[key]
+    return obj
+
+
+def _measure_heavy(obj: dict[str, Any]) -> dict[str, Any]:
+    for key in HEAVY_ANNOTATIONS:
+        if key in obj:
+            value = obj[key]
+            obj[key] = len(value) if isinstance(value, str) else 0
+    return obj
+
+
+_decoder = json.JSONDecoder(object_hook=_drop_heavy)
+_measuring_decoder = json.JSONDecoder(object_hook=_measure_heavy)
+
+
+class _Reader:
+    """在按块到达的文本上逐个解码 JSON 值"""
+
+    def __init__(self, chunks: Iterator[str], decoder: json.JSONDecoder = _decoder):
+        self._chunks = chunks
+        self._decoder = decoder
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        # 上一个值的长度；列表条目大小相近，先读够这么多再解码，减少不完整时的重复解析
+        self._hint = 0
+
+    def _fill(self, at_least: int = 1) -> bool:
+        """读入更多文本，丢弃已消费的部分；已到末尾时返回 False"""
+        if self._eof:
+            return False
+        parts = [self._buf[self._pos:]]
+        read = 0
+        while read < at_least:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                break
+            parts.append(chunk)
+            read += len(chunk)
+        self._buf = ''.join(parts)
+        self._pos = 0
+        return read > 0
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（末尾时为空字符串）"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式错误：期望 {char!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """解码下一个完整的 JSON 值，不完整时继续读取"""
+        self.peek()
+        available = len(self._buf) - self._pos
+        if available < self._hint:
+            self._fill(self._hint - available)
+        need = max(CHUNK_SIZE, self._hint)
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(need):
+                    raise
+                need *= 2
+                continue
+            # 数字可能在块边界处被截断（如 "12" 之后还有 "3"、"1." 之后还有 "5"），
+            # 确认其后是分隔符再接受
+            if (not self._eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self._buf) or self._buf[end] not in _DELIMITERS)):
+                self._fill(need)
+                continue
+            self._hint = end - self._pos
+            self._pos = end
+            return value
+
+
+def _text_chunks(response: requests.Response) -> Iterator[str]:
+    """以文本块形式读取响应体（仅支持 UTF-8，Halo 始终返回 UTF-8 JSON）"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    if response._content_consumed:
+        # 非流式请求：响应体已在内存中，仍按块解码以避免一次性构建整页结构
+        content = response.content or b''
+        for start in range(0, len(content), CHUNK_SIZE):
+            yield decoder.decode(content[start:start + CHUNK_SIZE])
+    else:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def decode_list(response: requests.Response, project: Optional[Callable[[dict[str, Any]], Any]] = None,
+                list_key: str = 'items', measure_heavy: bool = False) -> dict[str, Any]:
+    """
+    流式解码列表响应
+
+    Args:
+        response: 列表接口的响应，建议以 ``stream=True`` 请求
+        project: 对每个条目的转换，结果替代原条目；None 时保留（已去掉大字段的）原条目
+        list_key: 条目数组的字段名
+        measure_heavy: 为 True 时大字段不丢弃，而是替换为其字符数，便于判断哪些条目带有大字段
+
+    Returns:
+        与 ``response.json()`` 结构相同的 dict，条目为投影后的结果
+    """
+    reader = _Reader(_text_chunks(response), _measuring_decoder if measure_heavy else _decoder)
+    data: dict[str, Any] = {}
+    reader.expect('{')
+    if reader.peek() == '}':
+        return data
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == list_key and reader.peek() == '[':
+            reader.expect('[')
+            items = []
+            if reader.peek() != ']':
+                while True:
+                    item = reader.value()
+                    items.append(project(item) if project else item)
+                    if reader.peek() != ',':
+                        break
+                    reader.expect(',')
+            reader.expect(']')
+            data[key] = items
+        else:
+            data[key] = reader.value()
+        if reader.peek() != ',':
+            break
+        reader.expect(',')
+    reader.expect('}')
+    return data
@@ -0,0 +1,165 @@
+"""
+动态附件的媒体信息解析
+
+先看 URL 路径的扩展名（字典查找，不会被域名或查询串中的片段误导），
+扩展名缺失或未知时再并发发起 HEAD 请求读取 Content-Type / Content-Length。
+结果按 URL 缓存在共享的 LRU 中，九张图的动态只需一个往返即可全部解析。
+
+URL 来自用户或 LLM，HEAD 请求从插件所在主机发出。为避免借此访问插件主机所在的内网，
+探测只接受 http/https，先解析主机名，任一地址不是公网地址（私有、回环、链路本地、保留、
+组播）就不发请求；重定向不交给 requests 自动跟随，而是逐跳重新检查，最多 MAX_REDIRECTS 跳。
+被拒绝的 URL 按默认媒体类型处理。
+"""
+
+from typing import NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+import ipaddress
+import logging
+import posixpath
+import socket
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cache import TTLCache
+from utils.halo_client import USER_AGENT
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_TYPE = "PHOTO"  # 默认为图片类型
+DEFAULT_MIME_TYPE = "application/octet-stream"
+HEAD_TIMEOUT = (3, 5)
+MAX_CONCURRENT_PROBES = 9
+MAX_REDIRECTS = 5
+
+
+class MediaInfo(NamedTuple):
+    type: str
+    mime: str
+    size: Optional[int] = None
+
+
+# 扩展名 -> (Halo 媒体类型, MIME)
+EXTENSIONS = {
+    '.jpg': ('PHOTO', 'image/jpeg'), '.jpeg': ('PHOTO', 'image/jpeg'), '.png': ('PHOTO', 'image/png'),
+    '.gif': ('PHOTO', 'image/gif'), '.webp': ('PHOTO', 'image/webp'), '.bmp': ('PHOTO', 'image/bmp'),
+    '.svg': ('PHOTO', 'image/svg+xml'), '.avif': ('PHOTO', 'image/avif'), '.heic': ('PHOTO', 'image/heic'),
+    '.mp4': ('VIDEO', 'video/mp4'), '.avi': ('VIDEO', 'video/x-msvideo'), '.mov': ('VIDEO', 'video/quicktime'),
+    '.mkv': ('VIDEO', 'video/x-matroska'), '.webm': ('VIDEO', 'video/webm'), '.flv': ('VIDEO', 'video/x-flv'),
+    '.m4v': ('VIDEO', 'video/x-m4v'),
+    '.mp3': ('AUDIO', 'audio/mpeg'), '.wav': ('AUDIO', 'audio/wav'), '.flac': ('AUDIO', 'audio/flac'),
+    '.aac': ('AUDIO', 'audio/aac'), '.ogg': ('AUDIO', 'audio/ogg'), '.m4a': ('AUDIO', 'audio/mp4'),
+    '.opus': ('AUDIO', 'audio/opus'),
+}
+
+# MIME 主类型 -> Halo 媒体类型
+MIME_PREFIXES = {'image': 'PHOTO', 'video': 'VIDEO', 'audio': 'AUDIO'}
+
+_media_cache = TTLCache('media', ttl=3600, maxsize=1024)
+
+# 媒体多托管在第三方 CDN，探测时不能带 Halo 的认证头，因此不复用站点会话
+_probe_session = requests.Session()
+_probe_session.headers['User-Agent'] = USER_AGENT
+_probe_session.mount('http://', HTTPAdapter(pool_maxsize=MAX_CONCURRENT_PROBES))
+_probe_session.mount('https://', HTTPAdapter(pool_maxsize=MAX_CONCURRENT_PROBES))
+
+
+def from_extension(url: str) -> Optional[MediaInfo]:
+    """根据 URL 路径的扩展名判断，无法判断时返回 None"""
+    extension = posixpath.splitext(unquote(urlsplit(url).path))[1].lower()
+    known = EXTENSIONS.get(extension)
+    return MediaInfo(*known) if known else None
+
+
+def from_content_type(content_type: str, size: Optional[int] = None) -> Optional[MediaInfo]:
+    mime = content_type.split(';', 1)[0].strip().lower()
+    media_type = MIME_PREFIXES.get(mime.split('/', 1)[0])
+    return MediaInfo(media_type, mime, size) if media_type else None
+
+
+def blocked_reason(url: str) -> Optional[str]:
+    """URL 不允许探测时返回原因：非 http/https，或主机解析到非公网地址"""
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            return f"unsupported scheme {scheme or '(none)'}"
+        if not parts.hostname:
+            return "missing host"
+        port = parts.port or (443 if scheme == 'https' else 80)
+        addresses = socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except (ValueError, UnicodeError, socket.gaierror) as e:
+        return f"cannot resolve host: {e}"
+    for *_, sockaddr in addresses:
+        # 去掉 IPv6 链路本地地址的 %scope
+        address = ipaddress.ip_address(str(sockaddr[0]).split('%', 1)[0])
+        if not address.is_global or address.is_multicast:
+            return f"{parts.hostname} resolves to non-public address {address}"
+    return None
+
+
+def probe(url: str, timeout=HEAD_TIMEOUT) -> MediaInfo:
+    """HEAD 请求读取媒体信息，失败或 URL 不允许探测时返回默认值"""
+    start = time.perf_counter()
+    status = None
+    error = None
+    try:
+        target = url
+        for _ in range(MAX_REDIRECTS + 1):
+            reason = blocked_reason(target)
+            if reason:
+                error = 'Blocked'
+                logger.warning(f"Refusing to probe {target}: {reason}")
+                break
+            response = _probe_session.head(target, allow_redirects=False, timeout=timeout)
+            status = response.status_code
+            if response.is_redirect:
+                # 每一跳都重新检查目标地址
+                target = urljoin(target, response.headers['Location'])
+                response.close()
+                continue
+            if response.ok:
+                length = response.headers.get('Content-Length')
+                info = from_content_type(response.headers.get('Content-Type', ''),
+                                         int(length) if length and length.isdigit() else None)
+                if info:
+                    return info
+            break
+        else:
+            error = 'TooManyRedirects'
+            logger.warning(f"HEAD {url} exceeded {MAX_REDIRECTS} redirects")
+    except requests.exceptions.RequestException as e:
+        error = type(e).__name__
+        logger.warning(f"HEAD {url} failed: {e}")
+    finally:
+        # 外部 URL 统一记为一个接口标签，避免指标标签无限增长
+        registry.record_request('HEAD media', status, time.perf_counter() - start, error=error)
+    return MediaInfo(DEFAULT_MEDIA_TYPE, DEFAULT_MIME_TYPE)
+
+
+def resolve_media(urls: list[str], timeout=HEAD_TIMEOUT) -> list[MediaInfo]:
+    """
+    解析一组媒体 URL，返回与输入顺序一致的 MediaInfo 列表
+
+    扩展名能确定的直接返回；其余 URL 先查缓存，未命中的去重后并发 HEAD。
+    """
+    results: list[Optional[MediaInfo]] = []
+    pending: dict[str, list[int]] = {}
+    for i, url in enumerate(urls):
+        info = from_extension(url) or _media_cache.get(url)
+        results.append(info)
+        if info is None:
+            pending.setdefault(url, []).append(i)
+
+    if pending:
+        workers = min(len(pending), MAX_CONCURRENT_PROBES)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='halo-media') as executor:
+            for url, info in zip(pending, executor.map(lambda u: probe(u, timeout), pending)):
+                # 探测失败得到的默认值只短暂缓存，便于稍后重试
+                _media_cache.set(url, info, ttl=60 if info.mime == DEFAULT_MIME_TYPE else None)
+                for i in pending[url]:
+                    results[i] = info
+    return results
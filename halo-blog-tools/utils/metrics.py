@@ -0,0 +1,318 @@
+"""
+进程级指标注册表
+
+插件进程内所有工具调用共享同一个注册表，汇总每个 Halo 接口的延迟分布、
+错误率、重试次数、限流次数、缓存命中率以及当前并发请求数。
+
+注册表对所有调用方可见，按站点区分的指标只用 ``site_label`` 生成的摘要作标签，
+不暴露站点地址。
+"""
+
+from typing import Any, Optional
+import bisect
+import hashlib
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+# 延迟直方图的桶上界（秒），最后一个桶为 +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_API_PATH = re.compile(
+    r'^/apis/(?P<group>[^/]+)/(?P<version>[^/]+)/(?P<resource>[^/]+)'
+    r'(?:/(?P<name>[^/]+))?(?:/(?P<sub>.+))?$'
+)
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """将请求归一化为接口标签，例如 ``GET content.halo.run/posts/{name}``"""
+    path = urlsplit(url).path
+    match = _API_PATH.match(path)
+    if not match:
+        return f"{method.upper()} {path or '/'}"
+
+    label = f"{match.group('group')}/{match.group('resource')}"
+    if match.group('name'):
+        label += "/{name}"
+    if match.group('sub'):
+        label += f"/{match.group('sub')}"
+    return f"{method.upper()} {label}"
+
+
+def site_label(site: str) -> str:
+    """站点在指标中的标签：站点标识的摘要，不含站点地址"""
+    return hashlib.sha256(site.encode('utf-8')).hexdigest()[:12]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """单调递增计数器"""
+
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Gauge:
+    """可增可减的瞬时值"""
+
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """固定分桶直方图，分位数通过桶内线性插值估算"""
+
+    __slots__ = ('bounds', '_counts', '_sum', '_count', '_lock')
+
+    def __init__(self, bounds: tuple = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def quantile(self, q: float, counts: Optional[list[int]] = None, total: Optional[int] = None) -> float:
+        if counts is None:
+            counts, _, total = self.snapshot()
+        if not total:
+            return 0.0
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index >= len(self.bounds):
+                    # 落在 +Inf 桶里，只能返回最后一个有限上界
+                    return self.bounds[-1]
+                upper = self.bounds[index]
+                return lower + (upper - lower) * ((rank - cumulative) / count)
+            cumulative += count
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    指标按 (名称, 标签) 懒创建；读路径不加锁，只有首次创建某个指标时才获取注册表锁，
+    之后每次更新只锁住单个指标对象，各接口之间互不竞争。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[tuple, Any] = {}
+        self._started_at = time.time()
+
+    def _get(self, kind: type, name: str, labels: tuple) -> Any:
+        key = (name, labels)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = kind()
+                    self._metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        return self._get(Counter, name, tuple(sorted(labels.items())))
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        return self._get(Gauge, name, tuple(sorted(labels.items())))
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        return self._get(Histogram, name, tuple(sorted(labels.items())))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics = {}
+            self._started_at = time.time()
+
+    # ---- 记录入口 ----
+
+    def record_request(self, endpoint: str, status: Optional[int], duration: float,
+                       error: Optional[str] = None) -> None:
+        """记录一次 HTTP 请求（status 为 None 表示网络层异常）"""
+        status_label = str(status) if status is not None else 'error'
+        self.counter('halo_http_requests_total', endpoint=endpoint, status=status_label).inc()
+        self.histogram('halo_http_request_duration_seconds', endpoint=endpoint).observe(duration)
+        if error or status is None or status >= 400:
+            kind = error or f"http_{status}"
+            self.counter('halo_http_errors_total', endpoint=endpoint, kind=kind).inc()
+
+    def record_retry(self, endpoint: str) -> None:
+        self.counter('halo_http_retries_total', endpoint=endpoint).inc()
+
+    def record_throttled(self, endpoint: str) -> None:
+        """站点返回 429，请求在限流暂停后重新发送"""
+        self.counter('halo_http_throttled_total', endpoint=endpoint).inc()
+
+    def record_coalesced(self, endpoint: str) -> None:
+        """相同的读请求合并到进行中的请求，没有单独发出"""
+        self.counter('halo_http_coalesced_total', endpoint=endpoint).inc()
+
+    def record_lane_wait(self, lane: str, duration: float) -> None:
+        """请求在优先级通道中排队等待槽位"""
+        self.histogram('halo_lane_wait_seconds', lane=lane).observe(duration)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self.counter('halo_cache_requests_total', cache=cache, result='hit' if hit else 'miss').inc()
+
+    def in_flight(self) -> Gauge:
+        return self.gauge('halo_http_in_flight')
+
+    # ---- 导出 ----
+
+    def _items(self) -> list[tuple[str, dict, Any]]:
+        return [(name, dict(labels), metric) for (name, labels), metric in list(self._metrics.items())]
+
+    def to_dict(self) -> dict[str, Any]:
+        """汇总为便于阅读的 JSON 结构"""
+        endpoints: dict[str, dict[str, Any]] = {}
+        retries: dict[str, int] = {}
+        coalesced: dict[str, int] = {}
+        throttled: dict[str, int] = {}
+        lanes: dict[str, dict[str, Any]] = {}
+        caches: dict[str, dict[str, Any]] = {}
+        gauges: dict[str, float] = {}
+
+        def endpoint_entry(endpoint: str) -> dict[str, Any]:
+            return endpoints.setdefault(endpoint, {'requests': 0, 'errors': 0, 'status': {}})
+
+        for name, labels, metric in self._items():
+            if name == 'halo_http_requests_total':
+                entry = endpoint_entry(labels['endpoint'])
+                entry['requests'] += metric.value
+                entry['status'][labels['status']] = metric.value
+            elif name == 'halo_http_errors_total':
+                endpoint_entry(labels['endpoint'])['errors'] += metric.value
+            elif name == 'halo_http_request_duration_seconds':
+                counts, total_sum, total = metric.snapshot()
+                entry = endpoint_entry(labels['endpoint'])
+                entry['latency_seconds'] = {
+                    'mean': round(total_sum / total, 6) if total else 0.0,
+                    'p50': round(metric.quantile(0.50, counts, total), 6),
+                    'p95': round(metric.quantile(0.95, counts, total), 6),
+                    'p99': round(metric.quantile(0.99, counts, total), 6),
+                }
+            elif name == 'halo_http_retries_total':
+                retries[labels['endpoint']] = retries.get(labels['endpoint'], 0) + metric.value
+            elif name == 'halo_http_coalesced_total':
+                coalesced[labels['endpoint']] = coalesced.get(labels['endpoint'], 0) + metric.value
+            elif name == 'halo_http_throttled_total':
+                throttled[labels['endpoint']] = throttled.get(labels['endpoint'], 0) + metric.value
+            elif name == 'halo_lane_wait_seconds':
+                counts, total_sum, total = metric.snapshot()
+                lanes[labels['lane']] = {
+                    'waits': total,
+                    'mean': round(total_sum / total, 6) if total else 0.0,
+                    'p99': round(metric.quantile(0.99, counts, total), 6),
+                }
+            elif name == 'halo_cache_requests_total':
+                entry = caches.setdefault(labels['cache'], {'hits': 0, 'misses': 0})
+                entry['hits' if labels['result'] == 'hit' else 'misses'] += metric.value
+            elif isinstance(metric, Gauge):
+                key = name
+                if labels:
+                    key += '{' + ','.join(f"{k}={v}" for k, v in sorted(labels.items())) + '}'
+                gauges[key] = metric.value
+
+        for entry in endpoints.values():
+            entry['error_rate'] = round(entry['errors'] / entry['requests'], 4) if entry['requests'] else 0.0
+        for entry in caches.values():
+            lookups = entry['hits'] + entry['misses']
+            entry['hit_ratio'] = round(entry['hits'] / lookups, 4) if lookups else 0.0
+
+        return {
+            'uptime_seconds': round(time.time() - self._started_at, 3),
+            'in_flight': self.in_flight().value,
+            'endpoints': dict(sorted(endpoints.items())),
+            'retries': dict(sorted(retries.items())),
+            'coalesced': dict(sorted(coalesced.items())),
+            'throttled': dict(sorted(throttled.items())),
+            'lanes': dict(sorted(lanes.items())),
+            'caches': dict(sorted(caches.items())),
+            'gauges': dict(sorted(gauges.items())),
+        }
+
+    def to_prometheus(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        families: dict[str, list[tuple[dict, Any]]] = {}
+        for name, labels, metric in self._items():
+            families.setdefault(name, []).append((labels, metric))
+
+        def fmt_labels(labels: dict) -> str:
+            if not labels:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + '}'
+
+        lines = []
+        for name in sorted(families):
+            samples = families[name]
+            first = samples[0][1]
+            if isinstance(first, Histogram):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, metric in samples:
+                    counts, total_sum, total = metric.snapshot()
+                    cumulative = 0
+                    for bound, count in zip(metric.bounds, counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt_labels({**labels, 'le': repr(bound)})} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt_labels({**labels, 'le': '+Inf'})} {total}")
+                    lines.append(f"{name}_sum{fmt_labels(labels)} {total_sum}")
+                    lines.append(f"{name}_count{fmt_labels(labels)} {total}")
+            else:
+                kind = 'counter' if isinstance(first, Counter) else 'gauge'
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, metric in samples:
+                    lines.append(f"{name}{fmt_labels(labels)} {metric.value}")
+        return '\n'.join(lines) + '\n'
+
+
+# 进程级单例，所有工具共享
+registry = MetricsRegistry()
@@ -0,0 +1,294 @@
+"""
+文章、标签、分类和动态的数据模型
+
+Halo 返回的资源是 ``metadata`` / ``spec`` / ``status`` 三层嵌套的 dict，原先每个工具都
+各自用一串 ``.get('spec', {}).get(...)`` 取字段再拼出输出 dict，缓存里保存的也是整份
+原始 JSON（含 finalizers、labels、注解等用不到的字段）。
+
+这里的模型只保留工具用到的字段，使用 ``__slots__``（``dataclass(slots=True)``），
+每种资源只有一个解码入口 ``from_json``：
+
+- ``to_dict()`` 生成工具输出格式，与原先各工具拼出的 dict 一致
+- 标签和分类可以 ``to_row()`` / ``from_row()`` 转成定长列表，写入持久化缓存
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# 模型字段变化时加一，持久化缓存中旧格式的记录随之失效
+MODEL_VERSION = '1'
+
+
+def _parts(item: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    return item.get('metadata') or {}, item.get('spec') or {}, item.get('status') or {}
+
+
+class _Row:
+    """按字段顺序与定长列表互转，用于持久化缓存"""
+
+    __slots__ = ()
+
+    def to_row(self) -> list[Any]:
+        return [getattr(self, name) for name in self.__match_args__]
+
+    @classmethod
+    def from_row(cls, row: list[Any]):
+        return cls(*row)
+
+
+@dataclass(slots=True)
+class Tag(_Row):
+    name: str
+    display_name: str
+    slug: str = ''
+    description: str = ''
+    cover: str = ''
+    color: str = ''
+    visible_in_list: bool = True
+    permalink: str = ''
+    post_count: int = 0
+    visible_post_count: int = 0
+    creation_time: Optional[str] = None
+    version: Any = None
+
+    @classmethod
+    def from_json(cls, item: dict[str, Any]) -> 'Tag':
+        metadata, spec, status = _parts(item)
+        return cls(
+            metadata.get('name', ''), spec.get('displayName', ''), spec.get('slug', ''),
+            spec.get('description', ''), spec.get('cover', ''), spec.get('color', ''),
+            spec.get('visibleInList', True), status.get('permalink', ''),
+            status.get('postCount') or 0, status.get('visiblePostCount') or 0,
+            metadata.get('creationTimestamp'), metadata.get('version'),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'id': self.name,
+            'name': self.display_name,
+            'slug': self.slug,
+            'description': self.description,
+            'cover': self.cover,
+            'color': self.color,
+            'visible_in_list': self.visible_in_list,
+            'permalink': self.permalink,
+            'post_count': self.post_count,
+            'visible_post_count': self.visible_post_count,
+            'creation_time': self.creation_time,
+        }
+
+
+@dataclass(slots=True)
+class Category(_Row):
+    name: str
+    display_name: str
+    slug: str = ''
+    description: str = ''
+    cover: str = ''
+    color: str = ''
+    priority: int = 0
+    visible_in_list: bool = True
+    hide_from_list: bool = False
+    prevent_parent_post_cascade_query: bool = False
+    parent: str = ''
+    children: list[str] = field(default_factory=list)
+    template: str = ''
+    permalink: str = ''
+    post_count: int = 0
+    visible_post_count: int = 0
+    full_path: str = ''
+    creation_time: Optional[str] = None
+    version: Any = None
+
+    @classmethod
+    def from_json(cls, item: dict[str, Any]) -> 'Category':
+        metadata, spec, status = _parts(item)
+        return cls(
+            metadata.get('name', ''), spec.get('displayName', ''), spec.get('slug', ''),
+            spec.get('description', ''), spec.get('cover', ''), spec.get('color', ''),
+            spec.get('priority') or 0, spec.get('visibleInList', True), spec.get('hideFromList', False),
+            spec.get('preventParentPostCascadeQuery', False), spec.get('parent', ''),
+            spec.get('children') or [], spec.get('template', ''), status.get('permalink', ''),
+            status.get('postCount') or 0, status.get('visiblePostCount') or 0, status.get('fullPath', ''),
+            metadata.get('creationTimestamp'), metadata.get('version'),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'id': self.name,
+            'name': self.display_name,
+            'slug': self.slug,
+            'description': self.description,
+            'cover': self.cover,
+            'color': self.color,
+            'priority': self.priority,
+            'visible_in_list': self.visible_in_list,
+            'hide_from_list': self.hide_from_list,
+            'prevent_parent_post_cascade_query': self.prevent_parent_post_cascade_query,
+            'parent': self.parent,
+            'children': self.children,
+            'template': self.template,
+            'permalink': self.permalink,
+            'post_count': self.post_count,
+            'visible_post_count': self.visible_post_count,
+            'creation_time': self.creation_time,
+            'full_path': self.full_path,
+        }
+
+
+# 资源名 -> 模型
+TERM_MODELS = {'tags': Tag, 'categories': Category}
+
+
+@dataclass(slots=True)
+class Post:
+    name: str
+    title: str
+    slug: str
+    excerpt: Any
+    cover: str
+    published: bool
+    pinned: bool
+    allow_comment: bool
+    visible: str
+    priority: int
+    tags: list[str]
+    categories: list[str]
+    publish_time: Optional[str]
+    owner: str
+    permalink: str
+    excerpt_from_content: str
+    word_count: int
+    creation_time: Optional[str]
+    modification_time: Optional[str]
+    last_modified: Optional[str]
+    version: Any
+    # ListedPost（Console / UC 列表）自带的标签和分类显示名称
+    tag_names: Optional[list[str]] = None
+    category_names: Optional[list[str]] = None
+
+    @classmethod
+    def from_json(cls, item: dict[str, Any]) -> 'Post':
+        """解码 Post 或 Console / UC 接口返回的 ListedPost"""
+        post = item.get('post')
+        listed = isinstance(post, dict)
+        metadata, spec, status = _parts(post if listed else item)
+        return cls(
+            metadata.get('name', ''), spec.get('title', ''), spec.get('slug', ''), spec.get('excerpt', ''),
+            spec.get('cover', ''), spec.get('publish', False), spec.get('pinned', False),
+            spec.get('allowComment', True), spec.get('visible', 'PUBLIC'), spec.get('priority', 0),
+            spec.get('tags') or [], spec.get('categories') or [], spec.get('publishTime'),
+            spec.get('owner', ''), status.get('permalink', ''), status.get('excerpt', ''),
+            status.get('size', 0), metadata.get('creationTimestamp'),
+            metadata.get('lastModificationTimestamp'), status.get('lastModifyTime'), metadata.get('version'),
+            [(t.get('spec') or {}).get('displayName', '') for t in item.get('tags') or []] if listed else None,
+            [(c.get('spec') or {}).get('displayName', '') for c in item.get('categories') or []] if listed else None,
+        )
+
+    @property
+    def excerpt_raw(self) -> str:
+        return self.excerpt.get('raw', '') if isinstance(self.excerpt, dict) else ''
+
+    def to_dict(self) -> dict[str, Any]:
+        """文章列表的输出格式"""
+        formatted = {
+            'id': self.name,
+            'title': self.title or '未知标题',
+            'slug': self.slug,
+            'excerpt': self.excerpt,
+            'cover': self.cover,
+            'published': self.published,
+            'pinned': self.pinned,
+            'allowComment': self.allow_comment,
+            'visible': self.visible,
+            'priority': self.priority,
+            'tags': self.tags,
+            'categories': self.categories,
+            'publishTime': self.publish_time,
+            'permalink': self.permalink,
+            'excerpt_from_content': self.excerpt_from_content,
+            'word_count': self.word_count,
+            'creation_time': self.creation_time,
+            'last_modified': self.last_modified,
+        }
+        if self.tag_names is not None:
+            formatted['tag_names'] = self.tag_names
+            formatted['category_names'] = self.category_names
+        return formatted
+
+
+@dataclass(slots=True)
+class Moment:
+    name: str
+    content: str
+    html_content: str
+    media: list[dict[str, str]]
+    tags: list[str]
+    approved: bool
+    visible: Any
+    allow_comment: bool
+    creation_time: Optional[str]
+    release_time: Optional[str]
+    owner: str
+    owner_display_name: str
+    permalink: str
+    comment_count: int
+
+    @classmethod
+    def from_json(cls, item: dict[str, Any]) -> 'Moment':
+        """解码 Moment 或 Console 接口返回的 ListedMoment"""
+        # 以 moment 字段识别 ListedMoment；作者可能已被删除，owner 为空时不影响解码
+        listed = isinstance(item.get('moment'), dict)
+        listed_owner = item.get('owner') if listed else None
+        metadata, spec, status = _parts(item['moment'] if listed else item)
+
+        # 官方API使用medium字段
+        content = spec.get('content', {})
+        media = []
+        if isinstance(content, dict):
+            medium_list = content.get('medium', [])
+            if isinstance(medium_list, list):
+                media = [{'type': m.get('type', ''), 'url': m.get('url', ''), 'origin_type': m.get('originType', '')}
+                         for m in medium_list if isinstance(m, dict)]
+            raw_content = content.get('raw', '')
+            html_content = content.get('html', '')
+        else:
+            raw_content = str(content) if content else ''
+            html_content = raw_content
+
+        tags = spec.get('tags', [])
+        if not isinstance(tags, list):
+            tags = []
+
+        # spec.owner 是用户名；Console 接口额外返回作者信息
+        owner = spec.get('owner')
+        owner_info = listed_owner if isinstance(listed_owner, dict) else owner if isinstance(owner, dict) else {}
+
+        return cls(
+            metadata.get('name', ''), raw_content, html_content, media, tags,
+            spec.get('approved', False), spec.get('visible', True), spec.get('allowComment', True),
+            metadata.get('creationTimestamp'), spec.get('releaseTime'),
+            owner_info.get('name', '') if owner_info else owner if isinstance(owner, str) else '',
+            owner_info.get('displayName', '') if owner_info else '',
+            status.get('permalink', ''), status.get('commentCount', 0),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """动态列表的输出格式"""
+        return {
+            'id': self.name,
+            'content': self.content,
+            'html_content': self.html_content,
+            'media': self.media,
+            'tags': self.tags,
+            'approved': self.approved,
+            'visible': self.visible,
+            'allow_comment': self.allow_comment,
+            'creation_time': self.creation_time,
+            'release_time': self.release_time,
+            'owner': self.owner,
+            'owner_display_name': self.owner_display_name,
+            'permalink': self.permalink,
+            'media_count': len(self.media),
+            'comment_count': self.comment_count,
+        }
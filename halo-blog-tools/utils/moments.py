@@ -0,0 +1,260 @@
+"""
+动态（Moment）构造与查询
+
+单条创建和批量创建共用的动态名称生成、带标签链接的内容渲染和请求体构造；
+列表和时间线共用的分页拉取、结果格式化和筛选。
+
+动态插件的 Extension 接口（moment.halo.run）会忽略 approved/visible/keyword 等参数，
+插件自带的 Console 接口（console.api.moment.halo.run）则支持按关键词、标签、可见性、
+审核状态和时间范围在服务端筛选，并按发布时间倒序返回。可用时优先使用后者。
+"""
+
+from typing import Any, Iterator, Optional
+from datetime import datetime, timezone
+import logging
+import urllib.parse
+import uuid
+
+import requests
+
+from utils.capabilities import cached_capabilities
+from utils.halo_client import HaloSession
+from utils.models import Moment
+
+logger = logging.getLogger(__name__)
+
+MOMENTS_PATH = "/apis/moment.halo.run/v1alpha1/moments"
+CONSOLE_MOMENTS_PATH = "/apis/console.api.moment.halo.run/v1alpha1/moments"
+
+TIMELINE_PAGE_SIZE = 100
+# 时间线最多扫描的页数，避免筛选条件过严时把整站动态拉一遍
+MAX_TIMELINE_PAGES = 50
+MEDIA_TYPES = ('PHOTO', 'VIDEO', 'AUDIO', 'POST')
+
+
+def new_moment_name() -> str:
+    """生成不会冲突的动态名称（原先按秒时间戳命名，同一秒内创建会 409）"""
+    return f"moment-{uuid.uuid4().hex[:16]}"
+
+
+def generate_content_with_tags(raw_content: str, tag_list: list[str]) -> tuple[str, str]:
+    """生成包含标签链接的内容，返回 (raw, html)"""
+    if not tag_list:
+        return raw_content, raw_content.replace('\n', '<br>')
+
+    # 为每个标签生成HTML链接
+    tag_links = []
+    for tag in tag_list:
+        encoded_tag = urllib.parse.quote(tag)
+        tag_link = f'<a class="tag" href="/moments?tag={encoded_tag}" data-pjax="">{tag}</a>'
+        tag_links.append(tag_link)
+
+    # ✅ 修复标签分行问题：使用更好的HTML结构避免分行问题
+    tag_html = '<span class="tags">' + ' '.join(tag_links) + '</span>'
+
+    # 在标签和内容之间添加换行
+    raw_with_tags = ''.join([f'#{tag} ' for tag in tag_list]) + raw_content
+    html_with_tags = tag_html + '<br>' + raw_content.replace('\n', '<br>')
+
+    return raw_with_tags, html_with_tags
+
+
+def build_moment(content: str, owner: str, tag_names: list[str], visible: str,
+                 medium_list: list[dict[str, Any]]) -> dict[str, Any]:
+    """按 Halo 官方 API 格式构造动态请求体"""
+    content_with_tags, html_with_tags = generate_content_with_tags(content, tag_names)
+
+    # ✅ 修复时间戳显示问题：添加发布时间字段
+    current_time = datetime.now().isoformat() + "Z"
+
+    return {
+        "apiVersion": "moment.halo.run/v1alpha1",
+        "kind": "Moment",
+        "metadata": {
+            "name": new_moment_name(),
+            "generateName": "moment-"
+        },
+        "spec": {
+            "content": {
+                "raw": content_with_tags,  # 包含标签的raw内容
+                "html": html_with_tags,    # 包含标签HTML链接的内容
+                "medium": medium_list  # 媒体文件数组 - 官方API使用medium不是media
+            },
+            "owner": owner,
+            "tags": tag_names,  # 使用标签显示名称，符合官方API spec.tags格式
+            "visible": visible,
+            "approved": True,
+            "allowComment": True,
+            "releaseTime": current_time  # ✅ 新增：发布时间字段，修复时间戳显示问题
+        }
+    }
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """解析 ISO 8601 日期或时间，未带时区的按 UTC 处理，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def format_moment(item: dict[str, Any]) -> dict[str, Any]:
+    """把 Moment 或 Console 接口返回的 ListedMoment 转成工具输出格式"""
+    return Moment.from_json(item).to_dict()
+
+
+class MomentFilter:
+    """
+    动态筛选条件
+
+    能下推的条件通过 console_params() 交给 Console 接口；matches() 在解析时再校验一遍，
+    服务端忽略了某个参数（或回退到 Extension 接口）时结果依然正确。
+    媒体类型没有服务端参数，只在客户端筛选。
+    """
+
+    def __init__(self, keyword: str = '', tag: str = '', start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, visible: Optional[str] = None,
+                 approved: Optional[bool] = None, media_type: Optional[str] = None):
+        self.keyword = keyword
+        self.tag = tag
+        self.start = start
+        self.end = end
+        self.visible = visible
+        self.approved = approved
+        # NONE 表示纯文字动态
+        self.media_type = media_type
+
+    def console_params(self) -> dict[str, str]:
+        params = {}
+        if self.keyword:
+            params['keyword'] = self.keyword
+        if self.tag:
+            params['tag'] = self.tag
+        if self.visible:
+            params['visible'] = self.visible
+        if self.approved is not None:
+            params['approved'] = str(self.approved).lower()
+        if self.start:
+            params['startDate'] = self.start.isoformat().replace('+00:00', 'Z')
+        if self.end:
+            params['endDate'] = self.end.isoformat().replace('+00:00', 'Z')
+        return params
+
+    def matches(self, moment: Moment, keyword: bool = True) -> bool:
+        """校验解码后的动态；keyword=False 时跳过关键词（服务端全文检索口径与客户端不同）"""
+        if self.tag and self.tag.lower() not in (str(t).lower() for t in moment.tags):
+            return False
+        if self.visible and moment.visible != self.visible:
+            return False
+        if self.approved is not None and bool(moment.approved) != self.approved:
+            return False
+        if self.media_type:
+            types = {m['type'] for m in moment.media}
+            if (self.media_type == 'NONE' and types) or (self.media_type != 'NONE' and self.media_type not in types):
+                return False
+        if self.start or self.end:
+            released = moment_time(moment)
+            if released is None or (self.start and released < self.start) or (self.end and released > self.end):
+                return False
+        if keyword and self.keyword and self.keyword.lower() not in moment.content.lower():
+            return False
+        return True
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'keyword': self.keyword,
+            'tag': self.tag,
+            'start_time': self.start.isoformat() if self.start else None,
+            'end_time': self.end.isoformat() if self.end else None,
+            'visible': self.visible,
+            'approved': self.approved,
+            'media_type': self.media_type,
+        }
+
+
+def moment_time(moment: Moment) -> Optional[datetime]:
+    """动态的发布时间，缺失时用创建时间"""
+    return parse_time(moment.release_time or moment.creation_time)
+
+
+def fetch_moments_page(session: HaloSession, base_url: str, page: int, size: int,
+                       filters: Optional[MomentFilter] = None,
+                       legacy_params: Optional[dict[str, Any]] = None,
+                       console: bool = True, timeout: float = 30) -> tuple[requests.Response, bool]:
+    """
+    拉取一页动态，优先使用 Console 接口并下推筛选条件
+
+    Console 接口返回 404/405 时记入能力表并回退到 Extension 接口，
+    legacy_params 是回退时附加的查询参数；console=False 时直接使用 Extension 接口。
+
+    Returns:
+        (响应, 是否来自 Console 接口)
+    """
+    capabilities = cached_capabilities(session)
+    if console and (capabilities is None or capabilities.moment_console_api is not False):
+        params = {'page': page, 'size': size, 'sort': 'spec.releaseTime,desc'}
+        if filters:
+            params.update(filters.console_params())
+        response = session.get(f"{base_url}{CONSOLE_MOMENTS_PATH}", params=params, timeout=timeout)
+        if response.status_code not in (404, 405):
+            if capabilities is not None and response.status_code == 200:
+                capabilities.record('moment_console_api', True)
+            return response, True
+        if capabilities is not None:
+            capabilities.record('moment_console_api', False)
+
+    params = {'page': page, 'size': size, 'sort': 'metadata.creationTimestamp,desc'}
+    params.update(legacy_params or {})
+    return session.get(f"{base_url}{MOMENTS_PATH}", params=params, timeout=timeout), False
+
+
+def iter_timeline(session: HaloSession, base_url: str, filters: MomentFilter,
+                  page_size: int = TIMELINE_PAGE_SIZE, max_pages: int = MAX_TIMELINE_PAGES,
+                  stats: Optional[dict[str, Any]] = None) -> Iterator[dict[str, Any]]:
+    """
+    按发布时间从新到旧逐条产出符合条件的动态
+
+    逐页拉取、边解析边筛选，调用方拿够数量后停止迭代即不再请求后续页面。
+    stats 会被写入扫描的页数、条数、数据来源和是否已到末尾。
+
+    Raises:
+        requests.HTTPError: 接口返回非 200
+    """
+    stats = stats if stats is not None else {}
+    stats.update({'pages': 0, 'scanned': 0, 'source': None, 'exhausted': False})
+
+    capabilities = cached_capabilities(session)
+    if capabilities is not None and capabilities.moment_console_api is False:
+        # 只能在客户端筛选时按整页扫描
+        page_size = max(page_size, TIMELINE_PAGE_SIZE)
+
+    from_console = True
+    for page in range(1, max_pages + 1):
+        # 第一页回退到 Extension 接口后，后续页不再尝试 Console 接口
+        response, from_console = fetch_moments_page(session, base_url, page, page_size, filters,
+                                                    console=from_console)
+        response.raise_for_status()
+        data = response.json()
+        stats['pages'] += 1
+        stats['source'] = 'console' if from_console else 'extension'
+
+        for item in data.get('items') or []:
+            if not isinstance(item, dict):
+                continue
+            stats['scanned'] += 1
+            moment = Moment.from_json(item)
+            # Console 接口按发布时间倒序，越过时间窗口下界后后面不会再有匹配项
+            if from_console and filters.start:
+                released = moment_time(moment)
+                if released is not None and released < filters.start:
+                    stats['exhausted'] = True
+                    return
+            if filters.matches(moment, keyword=not from_console):
+                yield moment.to_dict()
+
+        if not data.get('hasNext'):
+            stats['exhausted'] = True
+            return
@@ -0,0 +1,163 @@
+"""
+当前用户（文章/动态 owner）查询
+
+依次尝试多个用户信息端点，成功结果按站点缓存，同一进程内只查询一次。
+可用的端点也会被记住，缓存过期后直接访问该端点，不再重走失败的分支。
+用户名和端点同时写入持久化缓存，插件重启后不必重新查询。
+"""
+
+from typing import Optional
+import logging
+
+import requests
+
+from utils import disk_cache
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession
+
+logger = logging.getLogger(__name__)
+
+# 所有端点都失败时使用的用户名
+FALLBACK_OWNER = "jason"  # 根据用户反馈，使用正确的用户名
+
+USER_ENDPOINTS = [
+    "/apis/api.console.halo.run/v1alpha1/users/-",
+    "/apis/api.console.halo.run/v1alpha1/users/-/profile",
+    "/apis/api.halo.run/v1alpha1/users/-",
+    "/apis/uc.api.console.halo.run/v1alpha1/users/-"
+]
+
+OWNER_TTL = 3600
+# 持久化副本的有效期；用户名几乎不变，失败时会回退到重新查询
+PERSIST_TTL = 86400
+
+_owner_cache = TTLCache('owner', ttl=OWNER_TTL)
+# 站点 -> 可用的用户信息端点
+_user_endpoints: dict[str, str] = {}
+
+
+def _extract_username(user_data: dict) -> str:
+    """从用户接口响应中提取用户名，兼容多种返回格式"""
+    username = None
+
+    # 方法1：从嵌套的user.metadata.name获取（实际API返回格式）
+    if "user" in user_data and "metadata" in user_data["user"]:
+        username = user_data["user"]["metadata"].get("name")
+
+    # 方法2：从顶级metadata.name获取
+    elif "metadata" in user_data and "name" in user_data["metadata"]:
+        username = user_data["metadata"]["name"]
+
+    # 方法3：从spec.displayName获取
+    elif "spec" in user_data and "displayName" in user_data["spec"]:
+        username = user_data["spec"]["displayName"]
+
+    # 方法4：从嵌套的user.spec.displayName获取
+    elif "user" in user_data and "spec" in user_data["user"]:
+        username = user_data["user"]["spec"].get("displayName")
+
+    # 方法5：直接从顶级字段获取
+    elif "name" in user_data:
+        username = user_data["name"]
+    elif "username" in user_data:
+        username = user_data["username"]
+    elif "displayName" in user_data:
+        username = user_data["displayName"]
+
+    return username.strip() if isinstance(username, str) else ''
+
+
+def discover_user(session: HaloSession, base_url: str, timeout: float = 10) -> tuple[Optional[str], str]:
+    """
+    查询当前用户名
+
+    优先访问之前探测到的可用端点，失败后再按顺序尝试其余端点。
+
+    Returns:
+        (可用端点, 用户名)；全部失败时为 (None, '')
+    """
+    known = _user_endpoints.get(session.site_key)
+    endpoints = [known] + [e for e in USER_ENDPOINTS if e != known] if known else USER_ENDPOINTS
+
+    for endpoint in endpoints:
+        try:
+            user_response = session.get(f"{base_url}{endpoint}", timeout=timeout)
+            logger.info(f"Trying endpoint {endpoint}: status {user_response.status_code}")
+
+            if user_response.status_code == 200:
+                username = _extract_username(user_response.json())
+                if username:
+                    logger.info(f"Successfully got username: {username}")
+                    if session.site_key:
+                        _user_endpoints[session.site_key] = endpoint
+                    return endpoint, username
+                logger.warning(f"No valid username found in response from {endpoint}")
+            elif user_response.status_code == 404:
+                logger.info(f"Endpoint {endpoint} not found, trying next...")
+            else:
+                logger.warning(f"Endpoint {endpoint} returned status {user_response.status_code}")
+
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Request to {endpoint} failed: {e}")
+
+    return None, ''
+
+
+def _remember(session: HaloSession, endpoint: Optional[str], username: str) -> None:
+    if session.site_key and username:
+        _owner_cache.set(session.site_key, username)
+        disk_cache.store('owner', session.site_key, {'owner': username, 'endpoint': endpoint}, PERSIST_TTL)
+
+
+def _restore(session: HaloSession) -> Optional[str]:
+    """从持久化缓存恢复用户名和可用端点"""
+    persisted = disk_cache.load('owner', session.site_key)
+    if not persisted or not persisted.get('owner'):
+        return None
+    if persisted.get('endpoint'):
+        _user_endpoints.setdefault(session.site_key, persisted['endpoint'])
+    return persisted['owner']
+
+
+def _load_current_user(session: HaloSession, base_url: str) -> Optional[str]:
+    username = _restore(session)
+    if username:
+        return username
+    endpoint, username = discover_user(session, base_url)
+    if username:
+        disk_cache.store('owner', session.site_key, {'owner': username, 'endpoint': endpoint}, PERSIST_TTL)
+    return username or None
+
+
+def fetch_current_user(session: HaloSession, base_url: str, timeout: float = 10) -> str:
+    """查询当前用户名，全部端点失败时返回空字符串"""
+    return discover_user(session, base_url, timeout=timeout)[1]
+
+
+def user_endpoint(session: HaloSession) -> Optional[str]:
+    """之前探测到的可用用户信息端点"""
+    return _user_endpoints.get(session.site_key)
+
+
+def get_current_user(session: HaloSession, base_url: str) -> str:
+    """获取当前用户名（按站点缓存），查询失败时返回 FALLBACK_OWNER 且不缓存"""
+    try:
+        if session.site_key:
+            username = _owner_cache.get_or_load(session.site_key, lambda: _load_current_user(session, base_url))
+        else:
+            username = fetch_current_user(session, base_url)
+    except Exception as e:
+        logger.error(f"Exception in get_current_user: {e}")
+        username = None
+
+    if not username:
+        logger.warning("Failed to get user info from all available endpoints")
+        return FALLBACK_OWNER
+    return username
+
+
+def prime_current_user(session: HaloSession, base_url: str, timeout: float) -> str:
+    """预取当前用户名写入缓存（用于预热和能力探测），返回用户名或空字符串"""
+    endpoint, username = discover_user(session, base_url, timeout=timeout)
+    _remember(session, endpoint, username)
+    return username
@@ -0,0 +1,113 @@
+"""
+文章正文的存放方式
+
+早期版本在文章的 ``content.halo.run/content-json`` 注解里再存一份完整正文（JSON 编码），
+而正文本来就保存在快照中。注解属于文章元数据，每次列出文章都会把整篇正文一起返回，
+文章越长列表越慢。
+
+现在默认使用精简写入：创建和更新文章时不再写入该注解，正文只保存在快照里，读取正文走
+Console 内容接口。设置 HALO_LEAN_POSTS=false 可恢复旧行为。已有文章中的注解可以用
+halo-post-migrate-content 工具批量移除。
+
+快照创建或关联失败时正文就无处保存，这时用 ``keep_content_annotation`` 退回到注解。
+"""
+
+from typing import Any, Optional
+import json
+import logging
+import os
+
+import requests
+
+from utils.halo_client import HaloSession
+
+logger = logging.getLogger(__name__)
+
+CONTENT_JSON_ANNOTATION = 'content.halo.run/content-json'
+POSTS_PATH = '/apis/content.halo.run/v1alpha1/posts'
+CONSOLE_CONTENT_PATH = '/apis/api.console.halo.run/v1alpha1/posts/{name}/content'
+
+
+def lean_posts_enabled() -> bool:
+    """HALO_LEAN_POSTS=false 时正文同时写入 content-json 注解（旧行为）"""
+    return os.getenv('HALO_LEAN_POSTS', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def apply_content_annotation(annotations: dict[str, Any], content_data: dict[str, Any]) -> None:
+    """按写入模式设置注解：精简模式下移除 content-json，否则写入正文"""
+    if lean_posts_enabled():
+        annotations.pop(CONTENT_JSON_ANNOTATION, None)
+    else:
+        annotations[CONTENT_JSON_ANNOTATION] = json.dumps(content_data)
+
+
+def keep_content_annotation(session: HaloSession, base_url: str, name: str, content_data: dict[str, Any]) -> bool:
+    """
+    快照未能关联到文章时，把正文写回 content-json 注解
+
+    非精简模式下注解已随文章一起写入，直接返回 True。
+
+    Returns:
+        正文是否已保存在注解中
+    """
+    if not lean_posts_enabled():
+        return True
+    url = f"{base_url}{POSTS_PATH}/{name}"
+    try:
+        response = session.get(url, timeout=30)
+        if response.status_code == 200:
+            post = response.json()
+            metadata = post.setdefault('metadata', {})
+            metadata['annotations'] = {**(metadata.get('annotations') or {}),
+                                       CONTENT_JSON_ANNOTATION: json.dumps(content_data)}
+            response = session.put(url, json=post, timeout=30)
+            if response.status_code in (200, 201):
+                return True
+        logger.warning(f"Failed to keep content annotation on post {name}: HTTP {response.status_code}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to keep content annotation on post {name}: {e}")
+    return False
+
+
+def fetch_snapshot_content(session: HaloSession, base_url: str, name: str) -> Optional[dict[str, Any]]:
+    """
+    通过 Console 内容接口读取文章头快照中的正文
+
+    Returns:
+        {"rawType", "raw", "content"}，请求失败时为 None
+    """
+    try:
+        response = session.get(f"{base_url}{CONSOLE_CONTENT_PATH.format(name=name)}", timeout=30)
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "rawType": data.get("rawType") or "markdown",
+                "raw": data.get("raw") or "",
+                "content": data.get("content") or "",
+            }
+        logger.warning(f"Failed to fetch content of post {name}: HTTP {response.status_code}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to fetch content of post {name}: {e}")
+    return None
+
+
+def fetch_post_content(session: HaloSession, base_url: str, post: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """
+    读取文章当前的正文
+
+    优先使用 Console 内容接口（来自快照），失败时退回到旧文章的 content-json 注解。
+
+    Returns:
+        {"rawType", "raw", "content"}，都取不到时为 None
+    """
+    content = fetch_snapshot_content(session, base_url, post.get('metadata', {}).get('name', ''))
+    if content is not None:
+        return content
+
+    existing = (post.get('metadata', {}).get('annotations') or {}).get(CONTENT_JSON_ANNOTATION)
+    if existing:
+        try:
+            return json.loads(existing)
+        except ValueError:
+            pass
+    return None
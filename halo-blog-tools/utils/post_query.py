@@ -0,0 +1,304 @@
+"""
+文章列表查询规划
+
+文章列表工具原先把 keyword/category/tag/published 原样转发给 Extension 接口，
+这些参数都不会生效，调用方只能自己翻页过滤。这里先通过缓存的标签索引和分类树
+把名称解析为 metadata.name，再选择真正支持这些筛选的接口：
+
+- Console API：keyword、categoryWithChildren、publishPhase，标签用 fieldSelector
+- UC API：参数与 Console 相同，但只能看到自己的文章
+- Extension API：只支持 labelSelector / fieldSelector，关键词和子分类无法下推
+
+名称无法解析时不发请求，直接返回空结果。
+
+列表响应逐条解码（见 ``utils.json_stream``），每条解码后立即转成 ``utils.models.Post``，
+整页原始结构和文章正文不会一次性变成 Python 对象；大页面还会边收边解码，响应体也不会整体留在内存里。
+小页面不流式读取，以便并发的相同请求仍能合并。
+
+深度翻页使用游标：固定按 (creationTimestamp, name) 倒序排列，游标记录上一批最后一篇
+的排序键、续读页和当时的总数。Halo 的 URL fieldSelector 只支持相等判断，不能表达
+“早于某个时间”，因此续读时从记录的页开始，按排序键跳过已返回的文章：
+
+- 新文章的创建时间总是最新，插入只会让已返回的文章后移，跳过即可，不会重复
+- 只有删除会让未返回的文章前移；前移量不超过总数的减少量，按此回退若干页补齐，不会遗漏
+"""
+
+from typing import Any, Optional
+from datetime import datetime, timezone
+import base64
+import hashlib
+import json
+import logging
+
+import requests
+
+from utils.capabilities import cached_capabilities
+from utils.category_tree import get_category_tree
+from utils.halo_client import HaloSession
+from utils.json_stream import decode_list
+from utils.models import Post
+from utils.taxonomy import get_index
+
+logger = logging.getLogger(__name__)
+
+# 文章列表接口，按优先顺序排列：(能力表字段, 路径)
+POST_LIST_APIS = {
+    'console': ('console_api', '/apis/api.console.halo.run/v1alpha1/posts'),
+    'uc': ('uc_api', '/apis/uc.api.content.halo.run/v1alpha1/posts'),
+    'extension': (None, '/apis/content.halo.run/v1alpha1/posts'),
+}
+
+PUBLISHED_LABEL = 'content.halo.run/published'
+# 每页条数达到此值时流式读取响应体
+STREAM_PAGE_SIZE = 50
+
+# 游标模式固定的排序
+CURSOR_SORT = ['metadata.creationTimestamp,desc', 'metadata.name,desc']
+# 游标模式单次调用最多请求的页数（被跳过的文章较多时继续读下一页）
+MAX_CURSOR_PAGES = 5
+
+
+class PostQueryPlan:
+    """一次文章列表查询的筛选条件及其解析结果"""
+
+    def __init__(self, keyword: str = '', category: str = '', tag: str = '', published: Optional[bool] = None):
+        self.keyword = keyword
+        self.category_input = category
+        self.tag_input = tag
+        self.published = published
+        # 解析后的 metadata.name；categories 含全部子分类
+        self.category: Optional[str] = None
+        self.categories: list[str] = []
+        self.tag: Optional[str] = None
+        self.unresolved: list[str] = []
+
+    @property
+    def empty(self) -> bool:
+        """有筛选名称无法解析时，结果必然为空"""
+        return bool(self.unresolved)
+
+    def params(self, api: str) -> dict[str, Any]:
+        """生成指定接口的查询参数"""
+        params: dict[str, Any] = {}
+        field_selectors = []
+        if api == 'extension':
+            if self.published is not None:
+                # 草稿可能没有该标签，用 != 匹配
+                params['labelSelector'] = f"{PUBLISHED_LABEL}{'=' if self.published else '!='}true"
+            if self.category:
+                field_selectors.append(f"spec.categories={self.category}")
+        else:
+            if self.keyword:
+                params['keyword'] = self.keyword
+            if self.category:
+                params['categoryWithChildren'] = self.category
+            if self.published is not None:
+                params['publishPhase'] = 'PUBLISHED' if self.published else 'DRAFT'
+        if self.tag:
+            field_selectors.append(f"spec.tags={self.tag}")
+        if field_selectors:
+            params['fieldSelector'] = field_selectors
+        return params
+
+    def unsupported(self, api: str) -> list[str]:
+        """指定接口无法在服务端处理的筛选条件"""
+        if api != 'extension':
+            return []
+        unsupported = []
+        if self.keyword:
+            unsupported.append('keyword')
+        if len(self.categories) > 1:
+            unsupported.append('category_children')
+        return unsupported
+
+    def fingerprint(self) -> str:
+        """筛选条件的指纹，防止游标与不同的查询混用"""
+        key = json.dumps([self.keyword, self.category, self.tag, self.published], ensure_ascii=False)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'keyword': self.keyword,
+            'category': self.category_input,
+            'tag': self.tag_input,
+            'published': self.published,
+            'resolved': {
+                'category': self.category,
+                'categories': self.categories,
+                'tag': self.tag,
+            },
+            'unresolved': self.unresolved,
+        }
+
+
+def plan_post_query(session: HaloSession, base_url: str, keyword: str = '', category: str = '',
+                    tag: str = '', published: Optional[bool] = None) -> PostQueryPlan:
+    """
+    解析筛选条件
+
+    分类可以是 metadata.name、显示名称或“父 / 子”路径，标签可以是 metadata.name 或显示名称。
+    """
+    plan = PostQueryPlan(keyword, category, tag, published)
+    if category:
+        tree = get_category_tree(session, base_url)
+        plan.category = tree.resolve(category)
+        if plan.category is None:
+            plan.unresolved.append(f"分类'{category}'")
+        else:
+            plan.categories = tree.expand([plan.category])
+    if tag:
+        index = get_index(session, base_url, 'tags')
+        item = index.get(tag) or index.find(tag)
+        if item is None:
+            plan.unresolved.append(f"标签'{tag}'")
+        else:
+            plan.tag = item.name
+    return plan
+
+
+def execute_post_query(session: HaloSession, base_url: str, plan: PostQueryPlan, params: dict[str, Any],
+                       timeout: float = 30, stream: Optional[bool] = None) -> tuple[requests.Response, str]:
+    """
+    按优先顺序选择可用的文章列表接口执行查询
+
+    只有在接口组未被确认可用且返回 404/405 时才换下一个接口。
+
+    Args:
+        params: 分页等公共参数，与筛选参数合并
+        stream: 是否流式读取响应体，None 时按每页条数决定；成功的响应用 ``read_post_page`` 解码
+
+    Returns:
+        (最后一次请求的响应, 使用的接口)
+    """
+    capabilities = cached_capabilities(session)
+    if stream is None:
+        stream = int(params.get('size') or 0) >= STREAM_PAGE_SIZE
+    response = None
+    api = 'extension'
+    for api in POST_LIST_APIS:
+        capability, path = POST_LIST_APIS[api]
+        if capability and capabilities is not None and getattr(capabilities, capability) is False:
+            continue
+        response = session.get(f"{base_url}{path}", params={**params, **plan.params(api)}, timeout=timeout,
+                               stream=stream)
+        if response.status_code in (404, 405) and capability:
+            if capabilities is not None and getattr(capabilities, capability) is not True:
+                capabilities.record(capability, False)
+            response.close()
+            continue
+        if response.status_code == 200 and capability and capabilities is not None:
+            capabilities.record(capability, True)
+        return response, api
+    return response, api
+
+
+def read_post_page(response: requests.Response) -> dict[str, Any]:
+    """流式解码文章列表响应，每个条目解码后直接转成 Post 模型"""
+    return decode_list(response, Post.from_json)
+
+
+def format_post(item: dict[str, Any]) -> dict[str, Any]:
+    """把 Post 或 Console / UC 接口返回的 ListedPost 转成工具输出格式"""
+    return Post.from_json(item).to_dict()
+
+
+class CursorError(ValueError):
+    """游标无法解析或与当前查询不匹配"""
+
+
+def _sort_key(post: Post) -> tuple[datetime, str]:
+    try:
+        created = datetime.fromisoformat((post.creation_time or '').replace('Z', '+00:00'))
+    except ValueError:
+        created = datetime.min.replace(tzinfo=timezone.utc)
+    return created, post.name
+
+
+def encode_cursor(key: tuple[datetime, str], page: int, total: int, plan: PostQueryPlan) -> str:
+    created, name = key
+    state = {'t': created.isoformat(), 'n': name, 'p': page, 'c': total, 'f': plan.fingerprint()}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, plan: PostQueryPlan) -> tuple[tuple[datetime, str], int, int]:
+    """
+    Returns:
+        (上一批最后一篇的排序键, 续读起始页, 上一批读取时的总数)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+        key = (datetime.fromisoformat(state['t']), str(state['n']))
+        page = max(int(state['p']), 1)
+        total = int(state['c'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError('游标格式不正确') from e
+    if state.get('f') != plan.fingerprint():
+        raise CursorError('游标与当前筛选条件不匹配，请去掉游标重新开始')
+    return key, page, total
+
+
+def cursor_query(session: HaloSession, base_url: str, plan: PostQueryPlan, size: int,
+                 cursor: Optional[str] = None,
+                 timeout: float = 30) -> tuple[list[Post], Optional[str], requests.Response, str]:
+    """
+    按 (creationTimestamp, name) 倒序做游标分页
+
+    Returns:
+        (本批文章, 下一批的游标（已到末尾时为 None）, 最后一次请求的响应, 使用的接口)
+
+    Raises:
+        CursorError: 游标无效
+    """
+    key, page, last_total = decode_cursor(cursor, plan) if cursor else (None, 1, 0)
+    collected: list[Post] = []
+    backtracked = False
+    next_page = page
+    total = last_total
+    exhausted = False
+    response, api = None, 'extension'
+
+    for _ in range(MAX_CURSOR_PAGES):
+        response, api = execute_post_query(session, base_url, plan,
+                                           {'page': page, 'size': size, 'sort': CURSOR_SORT}, timeout=timeout)
+        if response.status_code != 200:
+            return [], None, response, api
+        data = read_post_page(response)
+        items = data.get('items') or []
+        total = data.get('total') or 0
+
+        # 总数减少说明有文章被删除，未返回的文章最多前移减少的数量，回退相应页数补齐
+        if key is not None and not backtracked and total < last_total and page > 1:
+            backtracked = True
+            page = max(1, page - -(-(last_total - total) // size))
+            continue
+
+        consumed = 0
+        for item in items:
+            consumed += 1
+            # 插入新文章导致整体后移时，本页开头会出现已返回过的文章
+            if key is not None and _sort_key(item) >= key:
+                continue
+            collected.append(item)
+            if len(collected) == size:
+                break
+
+        if consumed == len(items):
+            # 本页已读完，下一批从下一页开始
+            next_page = page + 1
+            if not data.get('hasNext'):
+                exhausted = True
+                break
+        else:
+            next_page = page
+        if len(collected) == size:
+            break
+        page += 1
+
+    if exhausted:
+        return collected, None, response, api
+    # 本批全被跳过（达到单次页数上限）时沿用原排序键，只推进页号
+    last_key = _sort_key(collected[-1]) if collected else key
+    if last_key is None:
+        return collected, None, response, api
+    return collected, encode_cursor(last_key, next_page, total, plan), response, api
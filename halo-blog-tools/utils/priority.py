@@ -0,0 +1,143 @@
+"""
+请求优先级通道
+
+同一站点的工具共用一个会话和连接池。批量创建、内容迁移等批量任务长时间占满连接时，
+聊天应用里的 halo-post-get 之类交互调用只能排在后面，延迟随批量任务的规模上涨。
+
+会话发出的请求分两个通道：
+
+- INTERACTIVE（默认）：单条读写的交互工具
+- BATCH：批量任务。``utils.concurrency.map_adaptive`` 中执行的请求自动归入该通道，
+  其它批量代码用 ``with priority(BATCH):`` 标记
+
+``LaneScheduler`` 为每个会话限定同时在途的请求数（HALO_MAX_IN_FLIGHT，默认与连接池
+大小相同），其中 HALO_INTERACTIVE_SLOTS 个只留给交互通道，批量通道最多占用其余部分。
+槽位用满时按权重调度：两个通道都有请求排队时，每放行 INTERACTIVE_WEIGHT 个交互请求
+放行一个批量请求，批量任务不会被完全饿死。
+"""
+
+from typing import Any, Iterator, Optional
+from collections import deque
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+LANES = (INTERACTIVE, BATCH)
+
+# 两个通道都有请求排队时，每放行一个批量请求之前最多放行的交互请求数
+INTERACTIVE_WEIGHT = 4
+DEFAULT_INTERACTIVE_SLOTS = 4
+
+_local = threading.local()
+
+
+def current_priority() -> str:
+    """当前线程发出的请求所属的通道"""
+    return getattr(_local, 'lane', INTERACTIVE)
+
+
+@contextmanager
+def priority(lane: str) -> Iterator[None]:
+    """在代码块内把当前线程发出的请求归入 ``lane``"""
+    if lane not in LANES:
+        raise ValueError(f"unknown priority lane: {lane!r}")
+    previous = current_priority()
+    _local.lane = lane
+    try:
+        yield
+    finally:
+        _local.lane = previous
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, '').strip()
+    if not value:
+        return default
+    try:
+        return max(0, int(value))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+class LaneScheduler:
+    """单个会话的在途请求槽位，按通道预留和加权放行"""
+
+    def __init__(self, slots: int, reserved: int = DEFAULT_INTERACTIVE_SLOTS):
+        self.slots = max(1, slots)
+        # 至少给批量通道留一个槽位
+        self.reserved = min(max(0, reserved), self.slots - 1)
+        self._lock = threading.Lock()
+        self._in_use = {lane: 0 for lane in LANES}
+        self._waiting: dict[str, deque] = {lane: deque() for lane in LANES}
+        # 连续放行的交互请求数，用于加权
+        self._streak = 0
+
+    def _eligible(self, lane: str) -> bool:
+        if sum(self._in_use.values()) >= self.slots:
+            return False
+        return lane == INTERACTIVE or self._in_use[BATCH] < self.slots - self.reserved
+
+    def _grant(self, lane: str) -> None:
+        self._in_use[lane] += 1
+        self._streak = self._streak + 1 if lane == INTERACTIVE else 0
+        registry.gauge('halo_lane_in_use', lane=lane).inc()
+
+    def _dispatch(self) -> None:
+        """把空出的槽位分给排队的请求"""
+        while True:
+            interactive = bool(self._waiting[INTERACTIVE]) and self._eligible(INTERACTIVE)
+            batch = bool(self._waiting[BATCH]) and self._eligible(BATCH)
+            if not interactive and not batch:
+                break
+            lane = INTERACTIVE if interactive and (not batch or self._streak < INTERACTIVE_WEIGHT) else BATCH
+            self._grant(lane)
+            self._waiting[lane].popleft().set()
+
+    def acquire(self, lane: str) -> float:
+        """占用一个槽位，必要时排队；返回排队的秒数"""
+        with self._lock:
+            # 有交互请求排队时槽位已满，批量请求同样不满足条件，不会插队
+            if not self._waiting[lane] and self._eligible(lane):
+                self._grant(lane)
+                return 0.0
+            start = time.perf_counter()
+            # 每个排队者一个 Event，放行时只唤醒它自己
+            ticket = threading.Event()
+            self._waiting[lane].append(ticket)
+            self._dispatch()
+        ticket.wait()
+        waited = time.perf_counter() - start
+        registry.record_lane_wait(lane, waited)
+        return waited
+
+    def release(self, lane: str) -> None:
+        with self._lock:
+            self._in_use[lane] -= 1
+            registry.gauge('halo_lane_in_use', lane=lane).dec()
+            self._dispatch()
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'reserved': self.reserved,
+                'in_use': dict(self._in_use),
+                'waiting': {lane: len(queue) for lane, queue in self._waiting.items()},
+            }
+
+
+def create_scheduler(pool_size: int) -> Optional[LaneScheduler]:
+    """按环境变量创建会话的调度器；HALO_MAX_IN_FLIGHT=0 时不限制"""
+    slots = _env_int('HALO_MAX_IN_FLIGHT', pool_size)
+    if not slots:
+        return None
+    return LaneScheduler(slots, _env_int('HALO_INTERACTIVE_SLOTS', DEFAULT_INTERACTIVE_SLOTS))
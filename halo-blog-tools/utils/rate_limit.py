@@ -0,0 +1,281 @@
+"""
+按站点的客户端限流
+
+批量写入、工作流并行分支等场景会在一秒内向同一个 Halo 站点发出几百个请求，小规格的
+站点会直接返回 429 甚至失去响应。这里为每个 base_url 维护一个令牌桶，进程内所有工具、
+所有会话（不同令牌、不同重试策略）共用：
+
+- 速率上限来自凭据中的 ``rate_limit``（每秒请求数），未填写时取环境变量
+  HALO_RATE_LIMIT，0 表示不设固定上限；突发容量取 HALO_RATE_BURST，默认等于速率
+- 收到 429 时按 ``Retry-After`` 暂停该站点的所有请求，并按 DECREASE_FACTOR 降速（AIMD），
+  之后逐步加回，直到上限或下一次 429。站点能承受的速率低于上限时，实际速率在其附近
+  小幅振荡，总吞吐保持在站点能承受的最大值
+- 没有固定上限时平时不排队；收到 429 后以最近一秒站点成功处理的请求数为基准进入限流，
+  RELEASE_SECONDS 内不再收到 429 则重新放开
+
+``utils.halo_client`` 在每次发送前调用 ``acquire``，收到非 429 响应时调用 ``completed``，
+收到 429 时调用 ``throttle`` 并在暂停结束后重新发送。
+"""
+
+from typing import Any, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import registry, site_label
+
+logger = logging.getLogger(__name__)
+
+# 限流后的最低速率（每秒请求数）
+MIN_RATE = 0.5
+# 收到 429 时速率乘以该系数
+DECREASE_FACTOR = 0.7
+# 超过门限后，每秒加回上限（无上限时为门限）的 1/RECOVERY_SECONDS
+RECOVERY_SECONDS = 10.0
+# 没有固定上限时，连续这么多秒没有 429 就不再限流
+RELEASE_SECONDS = 60.0
+# 429 未带 Retry-After 时的暂停秒数
+DEFAULT_RETRY_AFTER = 1.0
+# Retry-After 的上限，避免异常的响应头让工具长时间挂起
+MAX_RETRY_AFTER = 60.0
+
+_limiters: dict[str, 'RateLimiter'] = {}
+_limiters_lock = threading.Lock()
+
+
+def parse_rate(value: Any) -> Optional[float]:
+    """
+    解析速率配置
+
+    Returns:
+        每秒请求数；空值返回 None，0 表示不设固定上限
+
+    Raises:
+        ValueError: 不是非负数
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    rate = float(value)
+    if rate < 0 or rate != rate:
+        raise ValueError(f"invalid rate limit: {value!r}")
+    return rate
+
+
+def _env_float(name: str) -> Optional[float]:
+    try:
+        return parse_rate(os.getenv(name))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={os.getenv(name)!r}")
+        return None
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> float:
+    """解析 Retry-After（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        current = datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc)
+        seconds = (retry_at - current).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RateLimiter:
+    """
+    单个站点的令牌桶
+
+    ``acquire`` 预占一个令牌，令牌不足时算出需要等待的时长并在锁外睡眠，
+    等待者按到达顺序依次获得发送时间，不会在锁上互相争抢。429 暂停会清空此前的预占，
+    每次暂停加一个轮次号；等待者醒来时轮次未变就直接使用原来的预占，变了才重新排队，
+    一次发送只占一个令牌。
+
+    速率按 AIMD 调整：429 时乘以 DECREASE_FACTOR 并记为门限；低于门限时每秒翻倍（尚无门限时同样翻倍，
+    用于从粗略的初始估计快速回升），达到门限后每秒只加一小步，直到下一次 429。
+    """
+
+    def __init__(self, site: str, limit: float = 0.0, burst: Optional[float] = None):
+        self.site = site
+        self._lock = threading.Lock()
+        self._limit = 0.0
+        self._burst: Optional[float] = None
+        # 当前速率，None 表示不限流
+        self._rate: Optional[float] = None
+        # 上一次 429 后降低的速率，低于它时快速回升；None 表示还不知道站点的承受能力
+        self._threshold: Optional[float] = None
+        self._tokens = 0.0
+        # 令牌从该时刻开始累积；暂停期间位于将来
+        self._updated = time.monotonic()
+        self._recovered_at = self._updated
+        self._paused_until = 0.0
+        self._throttled_at: Optional[float] = None
+        # 每次 429 暂停加一，之前的预占随之作废
+        self._epoch = 0
+        # 最近一秒站点成功处理的请求数，用于无上限时估计站点能承受的速率
+        self._window_start = self._updated
+        self._window_count = 0
+        self._observed = 0.0
+        # 注册表对所有调用方可见，标签用摘要而不是站点地址
+        self._gauge = registry.gauge('halo_rate_limit_rps', site=site_label(site))
+        self.configure(limit, burst)
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def configure(self, limit: float, burst: Optional[float] = None) -> None:
+        """设置速率上限（0 为不设上限）和突发容量"""
+        with self._lock:
+            if limit == self._limit and burst == self._burst:
+                return
+            self._limit = limit
+            self._burst = burst
+            if limit:
+                self._rate = limit if self._rate is None else min(self._rate, limit)
+                self._tokens = min(self._tokens, self._capacity()) if self._tokens else self._capacity()
+            elif self._throttled_at is None:
+                self._rate = None
+            self._gauge.set(self._rate or 0)
+
+    def _capacity(self) -> float:
+        return self._burst or max(1.0, self._rate or 1.0)
+
+    def completed(self) -> None:
+        """站点正常处理了一个请求（非 429）"""
+        with self._lock:
+            now = time.monotonic()
+            self._window_count += 1
+            elapsed = now - self._window_start
+            if elapsed >= 1.0:
+                self._observed = self._window_count / elapsed
+                self._window_start = now
+                self._window_count = 0
+
+    def _recover(self, now: float) -> None:
+        if self._rate is None or now <= self._recovered_at:
+            return
+        elapsed = now - self._recovered_at
+        self._recovered_at = now
+        if not self._limit and now - self._throttled_at >= RELEASE_SECONDS:
+            # 没有固定上限，且长时间没有再收到 429，重新放开
+            self._rate = None
+            self._threshold = None
+            self._throttled_at = None
+            self._gauge.set(0)
+            return
+        if self._threshold is None or self._rate < self._threshold:
+            rate = self._rate * 2 ** elapsed
+            if self._threshold is not None:
+                rate = min(rate, self._threshold)
+        else:
+            rate = self._rate + max(1.0, (self._limit or self._threshold) / RECOVERY_SECONDS) * elapsed
+        self._rate = min(rate, self._limit) if self._limit else rate
+        self._gauge.set(self._rate)
+
+    def _reserve(self) -> tuple[float, int]:
+        """预占一个令牌，返回 (需要等待的秒数, 预占所在的轮次)"""
+        with self._lock:
+            now = time.monotonic()
+            self._recover(now)
+            if self._rate is None:
+                return self._paused_until - now, self._epoch
+            if now > self._updated:
+                self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+            self._tokens -= 1
+            return max(self._updated - now, 0.0) + max(-self._tokens, 0.0) / self._rate, self._epoch
+
+    def acquire(self) -> float:
+        """预占一次发送机会，必要时等待；返回等待的秒数"""
+        waited = 0.0
+        while True:
+            wait, epoch = self._reserve()
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+            # 等待期间没有新的 429，预占仍然有效；否则它已随暂停清空，需要重新排队
+            if self._epoch == epoch:
+                return waited
+
+    def throttle(self, retry_after: float) -> None:
+        """站点返回 429：暂停 retry_after 秒并降低速率"""
+        with self._lock:
+            now = time.monotonic()
+            # 同一次突发中多个请求先后收到 429，只在暂停之外的第一次降速
+            if now >= self._paused_until:
+                if self._rate is None:
+                    # 此前不限流：以最近一秒成功处理的请求数粗略估计，不足一秒的窗口直接按计数
+                    self._rate = max(MIN_RATE, max(self._observed, float(self._window_count)) * DECREASE_FACTOR)
+                else:
+                    self._rate = max(MIN_RATE, self._rate * DECREASE_FACTOR)
+                    self._threshold = self._rate
+                self._gauge.set(self._rate)
+            self._throttled_at = now
+            self._paused_until = max(self._paused_until, now + retry_after)
+            self._tokens = 0.0
+            self._epoch += 1
+            self._updated = self._paused_until
+            self._recovered_at = self._paused_until
+            rate = self._rate
+        logger.info(f"Halo at {self.site} is throttling requests, pausing {retry_after:.1f}s (rate {rate:.1f}/s)")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'site': self.site,
+            'limit': self._limit,
+            'rate': round(self._rate, 3) if self._rate is not None else None,
+            'paused_for': round(max(self._paused_until - time.monotonic(), 0.0), 3),
+        }
+
+
+def limiter_for(base_url: str, rate_limit: Any = None) -> RateLimiter:
+    """
+    获取站点的限流器
+
+    Args:
+        base_url: Halo 站点地址
+        rate_limit: 凭据中的 ``rate_limit``。None 表示调用方不指定（预热、凭据验证等），
+            已有的限流器保持原配置；空字符串表示凭据未填写，使用 HALO_RATE_LIMIT
+    """
+    site = base_url.strip().rstrip('/')
+    limiter = _limiters.get(site)
+    if limiter is not None and rate_limit is None:
+        return limiter
+
+    try:
+        limit = parse_rate(rate_limit)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid rate_limit {rate_limit!r} for {site}")
+        limit = None
+    if limit is None:
+        limit = _env_float('HALO_RATE_LIMIT') or 0.0
+    burst = _env_float('HALO_RATE_BURST') or None
+
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(site)
+            if limiter is None:
+                limiter = _limiters[site] = RateLimiter(site, limit, burst)
+                return limiter
+    limiter.configure(limit, burst)
+    return limiter
+
+
+def limiters() -> list[RateLimiter]:
+    with _limiters_lock:
+        return list(_limiters.values())
@@ -0,0 +1,105 @@
+"""
+站点统计快照
+
+并发发起若干 ``size=1`` 的计数请求（只取 ListResult.total），汇总成一份按站点
+缓存的快照，供 halo-setup 展示。其它工具用 ``cached_site_stats`` 只读缓存、不发请求，
+例如 halo-post-migrate-content 按文章总数预估页数并发扫描。创建、更新、删除文章和创建动态的工具在写入成功后
+调用 ``invalidate_site_stats``，下一次读取会重新统计，不会在 SITE_STATS_TTL 内显示旧的数字。
+"""
+
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession
+from utils.taxonomy import cached_index
+
+logger = logging.getLogger(__name__)
+
+SITE_STATS_TTL = 60
+
+# 统计项 -> (API 路径, labelSelector)
+COUNT_QUERIES = {
+    'posts_total': ('/apis/content.halo.run/v1alpha1/posts', None),
+    'posts_published': ('/apis/content.halo.run/v1alpha1/posts', 'content.halo.run/published=true'),
+    'categories_total': ('/apis/content.halo.run/v1alpha1/categories', None),
+    'tags_total': ('/apis/content.halo.run/v1alpha1/tags', None),
+    'moments_total': ('/apis/moment.halo.run/v1alpha1/moments', None),
+}
+
+_stats_cache = TTLCache('site_stats', ttl=SITE_STATS_TTL)
+
+
+def _count(session: HaloSession, base_url: str, path: str, label_selector: Optional[str],
+           timeout: float) -> Optional[int]:
+    """返回资源总数；接口不存在（如未安装动态插件）或请求失败时返回 None"""
+    params: dict[str, Any] = {'page': 0, 'size': 1}
+    if label_selector:
+        params['labelSelector'] = label_selector
+    try:
+        response = session.get(f"{base_url}{path}", params=params, timeout=timeout)
+        if response.status_code == 200:
+            return response.json().get('total', 0)
+        logger.info(f"Count query {path} returned status {response.status_code}")
+    except Exception as e:
+        logger.warning(f"Count query {path} failed: {e}")
+    return None
+
+
+def fetch_site_stats(session: HaloSession, base_url: str, timeout: float = 10) -> dict[str, Any]:
+    """并发拉取统计并写入缓存"""
+    base_url = base_url.rstrip('/')
+    counts: dict[str, Optional[int]] = {}
+
+    # 标签和分类索引已在缓存中时直接取数量，省去请求
+    for key, resource in (('tags_total', 'tags'), ('categories_total', 'categories')):
+        index = cached_index(session, resource)
+        if index is not None:
+            counts[key] = len(index)
+
+    queries = {key: query for key, query in COUNT_QUERIES.items() if key not in counts}
+    with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix='halo-stats') as executor:
+        futures = {key: executor.submit(_count, session, base_url, path, selector, timeout)
+                   for key, (path, selector) in queries.items()}
+        counts.update({key: future.result() for key, future in futures.items()})
+
+    posts_total, posts_published = counts['posts_total'], counts['posts_published']
+    stats = {
+        'posts_total': posts_total or 0,
+        'posts_published': posts_published or 0,
+        'posts_draft': max((posts_total or 0) - (posts_published or 0), 0),
+        'categories_total': counts['categories_total'] or 0,
+        'tags_total': counts['tags_total'] or 0,
+        'moments_total': counts['moments_total'] or 0,
+        # 动态接口不可用通常意味着未安装动态插件
+        'moments_available': counts['moments_total'] is not None,
+        'fetched_at': time.time(),
+    }
+    if session.site_key:
+        _stats_cache.set(session.site_key, stats)
+    return stats
+
+
+def get_site_stats(session: HaloSession, base_url: str, refresh: bool = False) -> dict[str, Any]:
+    """获取站点统计快照（缓存 SITE_STATS_TTL 秒）"""
+    if not refresh and session.site_key:
+        stats = _stats_cache.get(session.site_key)
+        if stats is not None:
+            return stats
+    return fetch_site_stats(session, base_url)
+
+
+def cached_site_stats(session: HaloSession) -> Optional[dict[str, Any]]:
+    """仅查缓存的统计快照（只读副本），不发请求；快照过期或被作废时返回 None"""
+    if not session.site_key:
+        return None
+    stats = _stats_cache.get(session.site_key)
+    return dict(stats) if stats is not None else None
+
+
+def invalidate_site_stats(session: HaloSession) -> None:
+    """站点内容变化后丢弃统计快照"""
+    if session.site_key:
+        _stats_cache.invalidate(session.site_key)
@@ -0,0 +1,125 @@
+"""
+全站标签统计
+
+标签列表工具原先只用当前页计算统计，标签多于一页时数字是错的。这里基于缓存的
+全站标签索引计算统计并按站点缓存；索引刷新或写入新标签后，只对文章数或版本号
+发生变化的标签做增量修正。热门标签用堆取前 K 个，不对整个列表排序。
+"""
+
+from typing import Any, NamedTuple, Optional
+import heapq
+import threading
+import time
+
+from utils.cache import TTLCache
+from utils.halo_client import HaloSession
+from utils.models import Tag
+from utils.taxonomy import TaxonomyIndex, get_index
+
+# 统计跟随标签索引同步，这里的 TTL 只用于回收不再访问的站点
+_stats_cache = TTLCache('tag_stats', ttl=3600)
+
+
+class TagEntry(NamedTuple):
+    display_name: str
+    post_count: int
+    visible_post_count: int
+    version: Any
+
+
+def _entry(tag: Tag) -> TagEntry:
+    return TagEntry(tag.display_name, tag.post_count, tag.visible_post_count, tag.version)
+
+
+class TagStatistics:
+    """单个站点的标签统计"""
+
+    def __init__(self):
+        self._entries: dict[str, TagEntry] = {}
+        self.total_posts = 0
+        self.total_visible_posts = 0
+        self.tags_with_posts = 0
+        self.updated_at = 0.0
+        # 最近一次同步修正的标签数
+        self.last_changed = 0
+        self._synced: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _apply(self, name: str, entry: Optional[TagEntry]) -> None:
+        old = self._entries.pop(name, None)
+        if old is not None:
+            self.total_posts -= old.post_count
+            self.total_visible_posts -= old.visible_post_count
+            self.tags_with_posts -= old.post_count > 0
+        if entry is not None:
+            self._entries[name] = entry
+            self.total_posts += entry.post_count
+            self.total_visible_posts += entry.visible_post_count
+            self.tags_with_posts += entry.post_count > 0
+
+    def sync(self, index: TaxonomyIndex) -> int:
+        """
+        与标签索引同步，只修正新增、删除或有变化的标签
+
+        Returns:
+            修正的标签数；索引自上次同步后未变化时为 0
+        """
+        with self._lock:
+            marker = (id(index), index.revision)
+            if marker == self._synced:
+                return 0
+            changed = 0
+            seen = set()
+            for tag in index.items():
+                name = tag.name
+                seen.add(name)
+                entry = _entry(tag)
+                if self._entries.get(name) != entry:
+                    self._apply(name, entry)
+                    changed += 1
+            for name in [name for name in self._entries if name not in seen]:
+                self._apply(name, None)
+                changed += 1
+            self._synced = marker
+            self.last_changed = changed
+            self.updated_at = time.time()
+            return changed
+
+    def top(self, k: int) -> list[dict[str, Any]]:
+        """文章数最多的前 k 个标签（文章数相同时保持索引顺序）"""
+        with self._lock:
+            entries = [(name, entry) for name, entry in self._entries.items() if entry.post_count > 0]
+        return [{'id': name, 'name': entry.display_name, 'post_count': entry.post_count,
+                 'visible_post_count': entry.visible_post_count}
+                for name, entry in heapq.nlargest(k, entries, key=lambda pair: pair[1].post_count)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_dict(self, top_k: int = 10) -> dict[str, Any]:
+        return {
+            'scope': 'site',
+            'total_tags': len(self),
+            'tags_with_posts': self.tags_with_posts,
+            'total_posts_in_tags': self.total_posts,
+            'total_visible_posts_in_tags': self.total_visible_posts,
+            'popular_tags': self.top(top_k),
+            'updated_at': self.updated_at,
+            'last_changed': self.last_changed,
+        }
+
+
+def get_tag_statistics(session: HaloSession, base_url: str, refresh: bool = False) -> TagStatistics:
+    """
+    获取全站标签统计
+
+    标签索引在缓存期内不发请求；refresh=True 时重新拉取索引，统计仍按变化量修正。
+    """
+    index = get_index(session, base_url, 'tags', refresh=refresh)
+    stats = _stats_cache.get(session.site_key) if session.site_key else None
+    if stats is None:
+        stats = TagStatistics()
+        if session.site_key:
+            _stats_cache.set(session.site_key, stats)
+    stats.sync(index)
+    return stats
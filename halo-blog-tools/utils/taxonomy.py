@@ -0,0 +1,277 @@
+"""
+标签 / 分类索引
+
+按站点缓存全部标签和分类，提供显示名称 -> 资源的查找，避免每处理一个标签
+就拉取一次完整列表。工具创建新标签/分类后直接写回索引。索引中保存的是
+``utils.models`` 的 Tag / Category，而不是整份原始 JSON。
+
+索引同时写入持久化缓存（见 ``utils.disk_cache``），插件重启后先从磁盘恢复。
+磁盘副本与内存索引共用 TAXONOMY_TTL：按首次拉取的时间（``loaded_at``）计算，
+过期后不再恢复，避免站点外新建的标签/分类长期不可见。
+"""
+
+from typing import Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+from utils import disk_cache, json_codec
+from utils.cache import TTLCache
+from utils.concurrency import AdaptiveConcurrency, map_adaptive
+from utils.halo_client import HaloSession
+from utils.priority import current_priority, priority
+from utils.models import MODEL_VERSION, TERM_MODELS, Category, Tag
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_RESOURCES = ('tags', 'categories')
+TAXONOMY_TTL = 300
+PAGE_SIZE = 200
+# 已知总页数后并发拉取剩余页面的线程数
+FETCH_WORKERS = 4
+# 一次创建多个新标签/分类时的并发上限
+CREATE_WORKERS = 8
+
+_index_cache = TTLCache('taxonomy', ttl=TAXONOMY_TTL)
+
+
+class TaxonomyIndex:
+    """单个站点的标签或分类索引"""
+
+    def __init__(self, resource: str, items: list[Union[dict[str, Any], Tag, Category]],
+                 loaded_at: Optional[float] = None):
+        self.resource = resource
+        self.model = TERM_MODELS[resource]
+        self.loaded_at = loaded_at or time.time()
+        self._by_name: dict[str, Union[Tag, Category]] = {}
+        self._by_display_name: dict[str, Union[Tag, Category]] = {}
+        self._lock = threading.Lock()
+        # 每次写入加一，派生数据（如标签统计）据此判断是否需要同步
+        self.revision = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Union[dict[str, Any], Tag, Category]) -> Optional[Union[Tag, Category]]:
+        """写入一个标签或分类（原始 JSON 或模型），返回索引中的模型"""
+        term = self.model.from_json(item) if isinstance(item, dict) else item
+        if not term.name:
+            return None
+        with self._lock:
+            self.revision += 1
+            self._by_name[term.name] = term
+            # 显示名称重复时保留第一个，与原先线性查找的结果一致
+            if term.display_name and term.display_name not in self._by_display_name:
+                self._by_display_name[term.display_name] = term
+        return term
+
+    def get(self, name: str) -> Optional[Union[Tag, Category]]:
+        """按 metadata.name 查找"""
+        return self._by_name.get(name)
+
+    def find(self, display_name: str) -> Optional[Union[Tag, Category]]:
+        """按显示名称查找"""
+        return self._by_display_name.get(display_name)
+
+    def items(self) -> list[Union[Tag, Category]]:
+        return list(self._by_name.values())
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+
+def _fetch_page(session: HaloSession, base_url: str, resource: str, page: int, timeout: float) -> dict[str, Any]:
+    response = session.get(
+        f"{base_url}/apis/content.halo.run/v1alpha1/{resource}",
+        params={'page': page, 'size': PAGE_SIZE},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_all(session: HaloSession, base_url: str, resource: str, timeout: float = 10) -> list[dict[str, Any]]:
+    """
+    分页拉取全部标签或分类，请求失败时抛出异常
+
+    第一页返回总页数后，其余页面并发拉取；接口未返回总页数时按 hasNext 逐页拉取。
+    """
+    first = _fetch_page(session, base_url, resource, 1, timeout)
+    items: list[dict[str, Any]] = list(first.get('items', []))
+    if not first.get('hasNext'):
+        return items
+
+    total_pages = first.get('totalPages') or 0
+    if total_pages > 1:
+        pages = range(2, total_pages + 1)
+        lane = current_priority()
+
+        def fetch(page: int) -> dict[str, Any]:
+            with priority(lane):
+                return _fetch_page(session, base_url, resource, page, timeout)
+
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(pages)),
+                                thread_name_prefix='halo-taxonomy') as executor:
+            for data in executor.map(fetch, pages):
+                items.extend(data.get('items', []))
+        return items
+
+    page = 2
+    while True:
+        data = _fetch_page(session, base_url, resource, page, timeout)
+        items.extend(data.get('items', []))
+        if not data.get('hasNext'):
+            return items
+        page += 1
+
+
+def _persist_key(session: HaloSession, resource: str) -> str:
+    return f"{session.site_key}|{resource}" if session.site_key else ''
+
+
+def persist_index(session: HaloSession, index: TaxonomyIndex) -> None:
+    """把索引写入持久化缓存"""
+    disk_cache.store('taxonomy', _persist_key(session, index.resource),
+                     {'loaded_at': index.loaded_at, 'rows': [term.to_row() for term in index.items()]},
+                     TAXONOMY_TTL, MODEL_VERSION)
+
+
+def load_index(session: HaloSession, base_url: str, resource: str, timeout: float = 10) -> TaxonomyIndex:
+    """重新拉取并缓存索引"""
+    index = TaxonomyIndex(resource, fetch_all(session, base_url, resource, timeout=timeout))
+    if session.site_key:
+        _index_cache.set((session.site_key, resource), index)
+        persist_index(session, index)
+    return index
+
+
+def cached_index(session: HaloSession, resource: str) -> Optional[TaxonomyIndex]:
+    """仅查缓存（内存，其次持久化缓存），不发请求"""
+    if not session.site_key:
+        return None
+    index = _index_cache.get((session.site_key, resource))
+    if index is None:
+        persisted = disk_cache.load('taxonomy', _persist_key(session, resource), MODEL_VERSION)
+        # 写回新标签时会刷新磁盘记录的过期时间，这里按首次拉取的时间判断是否过期
+        remaining = TAXONOMY_TTL - (time.time() - persisted['loaded_at']) if persisted is not None else 0
+        if remaining > 0:
+            model = TERM_MODELS[resource]
+            index = TaxonomyIndex(resource, [model.from_row(row) for row in persisted['rows']],
+                                  loaded_at=persisted['loaded_at'])
+            _index_cache.set((session.site_key, resource), index, ttl=remaining)
+    return index
+
+
+def get_index(session: HaloSession, base_url: str, resource: str, refresh: bool = False) -> TaxonomyIndex:
+    """获取站点的标签或分类索引（缓存 TAXONOMY_TTL 秒）"""
+    if not refresh:
+        index = cached_index(session, resource)
+        if index is not None:
+            return index
+    return load_index(session, base_url, resource)
+
+
+def invalidate(session: HaloSession, resource: Optional[str] = None) -> None:
+    """丢弃站点缓存的索引"""
+    for name in ([resource] if resource else TAXONOMY_RESOURCES):
+        _index_cache.invalidate((session.site_key, name))
+        disk_cache.discard('taxonomy', _persist_key(session, name))
+
+
+def _create_payload(resource: str, display_name: str) -> dict[str, Any]:
+    slug = display_name.lower().replace(' ', '-').replace('中文', 'chinese')
+    if resource == 'tags':
+        return {
+            "apiVersion": "content.halo.run/v1alpha1",
+            "kind": "Tag",
+            "metadata": {
+                "generateName": "tag-"
+            },
+            "spec": {
+                "displayName": display_name,
+                "slug": f"{slug}-{int(time.time())}",
+                "color": "#6366f1",
+                "cover": ""
+            }
+        }
+    return {
+        "apiVersion": "content.halo.run/v1alpha1",
+        "kind": "Category",
+        "metadata": {
+            "generateName": "category-"
+        },
+        "spec": {
+            "displayName": display_name,
+            "slug": f"{slug}-{int(time.time())}",
+            "description": "",
+            "cover": "",
+            "template": "",
+            "priority": 0,
+            "children": []
+        }
+    }
+
+
+def ensure_terms(session: HaloSession, base_url: str, resource: str,
+                 display_names: list[str]) -> list[Union[Tag, Category]]:
+    """
+    确保标签或分类存在，不存在则创建
+
+    Args:
+        resource: 'tags' 或 'categories'
+        display_names: 显示名称列表
+
+    Returns:
+        已存在或新建的 Tag / Category，顺序与输入一致；处理失败的名称会被跳过并记录日志
+    """
+    label = '标签' if resource == 'tags' else '分类'
+    try:
+        index = get_index(session, base_url, resource)
+    except Exception as e:
+        logger.error(f"获取{label}列表失败: {e}")
+        return []
+
+    created: dict[str, Union[Tag, Category]] = {}
+    missing = [name for name in dict.fromkeys(display_names) if not index.find(name)]
+
+    def create(display_name: str) -> Optional[Union[Tag, Category]]:
+        try:
+            create_response = session.post(
+                f"{base_url}/apis/content.halo.run/v1alpha1/{resource}",
+                data=json_codec.dumps(_create_payload(resource, display_name)),
+                timeout=10
+            )
+            if create_response.status_code in [200, 201]:
+                term = index.add(create_response.json())
+                if term is None:
+                    logger.error(f"{label} '{display_name}' 创建响应缺少名称: {create_response.text}")
+                    return None
+                logger.info(f"{label} '{display_name}' 创建成功: {term.name}")
+                return term
+            logger.error(f"{label} '{display_name}' 创建失败: {create_response.text}")
+        except Exception as e:
+            logger.error(f"处理{label} '{display_name}' 时出错: {e}")
+        return None
+
+    # 缺失的名称相互独立，按站点响应自适应并发创建
+    if missing:
+        controller = AdaptiveConcurrency(f'{resource}-create', min(CREATE_WORKERS, len(missing)))
+        # 沿用调用方的通道：交互工具顺带创建的标签不排到批量任务后面
+        for i, term in map_adaptive(create, missing, controller, thread_name_prefix=f'halo-{resource}-create',
+                                    lane=current_priority()):
+            if term is not None:
+                created[missing[i]] = term
+
+    resolved = []
+    for display_name in display_names:
+        term = created.get(display_name)
+        if term is None:
+            term = index.find(display_name)
+            if term is None:
+                continue
+            logger.info(f"{label} '{display_name}' 已存在: {term.name}")
+        resolved.append(term)
+
+    if created:
+        persist_index(session, index)
+    return resolved
@@ -0,0 +1,157 @@
+"""
+启动预热
+
+插件重启后的第一次工具调用需要同时承担 DNS 解析、TCP/TLS 握手、用户查询和
+标签/分类索引加载。预热在后台线程中提前完成这些工作：并发探测站点能力（含用户查询）、
+拉取标签和分类，既填充缓存，也在共享会话的连接池中留下可复用的连接。
+
+预热从不阻塞调用方，整体受 ``deadline`` 限制，失败只记录日志。失败的预热在 RETRY_SECONDS
+之后允许再次触发（例如下一次验证凭据时）。调用方站点的预热状态见 halo-metrics 的 ``warmup``，
+全部站点的就绪情况见 ``halo_warmup_ready`` 指标（按 ``site_label`` 区分）。
+"""
+
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import os
+import threading
+import time
+
+from utils.halo_client import get_session, site_key
+from utils.capabilities import discover_capabilities
+from utils.metrics import registry, site_label
+from utils.taxonomy import TAXONOMY_RESOURCES, load_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE = 10.0
+CONNECT_TIMEOUT = 3.0
+# 预热失败后至少间隔这么多秒才允许重新预热
+RETRY_SECONDS = 60.0
+
+_states: dict[str, 'WarmupState'] = {}
+_states_lock = threading.Lock()
+
+
+def warmup_enabled() -> bool:
+    """HALO_WARMUP=false 时关闭预热"""
+    return os.getenv('HALO_WARMUP', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+class WarmupState:
+    """单个站点的预热状态，``ready`` 在预热结束（无论成败）后置位"""
+
+    def __init__(self, base_url: str, site: str):
+        self.base_url = base_url
+        # 站点标识（base_url + 令牌摘要），同一站点的不同令牌分别预热
+        self.site = site
+        self.ready = threading.Event()
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.results: dict[str, Any] = {}
+        self.errors: dict[str, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.ready.is_set() and not self.errors
+
+    def retryable(self, now: float) -> bool:
+        """预热已失败且超过 RETRY_SECONDS，可以重新预热"""
+        return (self.ready.is_set() and bool(self.errors)
+                and now - (self.finished_at or self.started_at) >= RETRY_SECONDS)
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+        self.ready.set()
+        registry.gauge('halo_warmup_ready', site=site_label(self.site)).set(1 if self.ok else 0)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'base_url': self.base_url,
+            'site': self.site,
+            'ready': self.ready.is_set(),
+            'ok': self.ok,
+            'duration_seconds': round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+            'results': dict(self.results),
+            'errors': dict(self.errors),
+        }
+
+
+def _run(state: WarmupState, access_token: str, deadline: float) -> None:
+    base_url = state.base_url
+    session = get_session(base_url, access_token)
+    timeout = (CONNECT_TIMEOUT, deadline)
+
+    def capabilities() -> dict[str, Any]:
+        discovered = discover_capabilities(session, base_url, timeout=timeout)
+        if not discovered.owner:
+            raise LookupError('current user not found')
+        return discovered.to_dict()
+
+    def taxonomy(resource: str) -> int:
+        return len(load_index(session, base_url, resource, timeout=timeout))
+
+    tasks = {'capabilities': capabilities}
+    tasks.update({resource: (lambda r=resource: taxonomy(r)) for resource in TAXONOMY_RESOURCES})
+
+    executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='halo-warmup')
+    try:
+        futures = {executor.submit(task): name for name, task in tasks.items()}
+        done, pending = wait(futures, timeout=deadline)
+        for future in done:
+            name = futures[future]
+            try:
+                state.results[name] = future.result()
+            except Exception as e:
+                state.errors[name] = f"{type(e).__name__}: {e}"
+        for future in pending:
+            state.errors[futures[future]] = 'deadline exceeded'
+    finally:
+        executor.shutdown(wait=False)
+        state.finish()
+
+    if state.errors:
+        logger.warning(f"Halo warm-up for {base_url} finished with errors: {state.errors}")
+    else:
+        logger.info(f"Halo warm-up for {base_url} finished in "
+                    f"{state.finished_at - state.started_at:.2f}s: {state.results}")
+
+
+def start_warmup(base_url: str, access_token: str, deadline: float = DEFAULT_DEADLINE) -> WarmupState:
+    """
+    在后台线程中预热站点，立即返回状态对象
+
+    同一站点正在预热或已成功预热时直接返回已有状态；上一次预热失败且超过 RETRY_SECONDS
+    时重新预热。
+
+    Args:
+        base_url: Halo 站点地址
+        access_token: Halo 个人访问令牌
+        deadline: 预热整体耗时上限（秒）
+    """
+    base_url = base_url.strip().rstrip('/')
+    key = site_key(base_url, access_token)
+    with _states_lock:
+        state = _states.get(key)
+        if state is not None and not state.retryable(time.time()):
+            return state
+        state = _states[key] = WarmupState(base_url, key)
+        registry.gauge('halo_warmup_ready', site=site_label(key)).set(0)
+
+    def target() -> None:
+        try:
+            _run(state, access_token, deadline)
+        except Exception as e:
+            state.errors['warmup'] = f"{type(e).__name__}: {e}"
+            state.finish()
+            logger.warning(f"Halo warm-up for {base_url} failed: {e}")
+
+    threading.Thread(target=target, name='halo-warmup', daemon=True).start()
+    return state
+
+
+def warmup_state(site: str) -> Optional[dict[str, Any]]:
+    """指定站点（``site_key``）最近一次预热的状态，未预热过时返回 None"""
+    with _states_lock:
+        state = _states.get(site)
+    return state.to_dict() if state is not None else None